@@ -9,6 +9,9 @@ from mimiclabs.mimiclabs.utils import get_robosuite_version
 import robosuite
 import robomimic.envs.env_base as EB
 
+# registers the MimicLabs envs with robosuite
+import mimiclabs.mimiclabs.envs.problems
+
 
 def get_controller_cfg(controller_types, controller_overrides, robots):
     """
@@ -3,6 +3,10 @@ import numpy as np
 from mimicgen.env_interfaces.robosuite import RobosuiteInterface
 import mimicgen.utils.pose_utils as PoseUtils
 
+# registers the MimicLabs envs with robosuite, which the scripts using this interface
+# create by name (mimiclabs.mimiclabs.envs only imports them on first access)
+import mimiclabs.mimiclabs.envs.problems
+
 
 class MG_MimicLabs(RobosuiteInterface):
     """
@@ -79,12 +79,20 @@ def main(args):
     config_dir = generate_config_templates(args)
     print(colored(f"Generated config templates", "green"), f"--> {config_dir}")
 
+    python_cmd = "python"
+    if args.use_zygote:
+        # launch jobs through the zygote server, or as usual if it is not running
+        zygote_script = os.path.join(
+            mimiclabs.__path__[0], "mimiclabs", "scripts", "zygote.py"
+        )
+        python_cmd = f"python {zygote_script} run --fallback"
+
     with open(os.path.join(config_dir, "jobs.sh"), "w") as f:
         f.write("#!/bin/bash\n")
         for config_file in os.listdir(config_dir):
             if config_file.endswith(".json"):
                 f.write(
-                    f"python scripts/generate_dataset.py --config {os.path.join(config_dir, config_file)} --auto-remove-exp &\n"
+                    f"{python_cmd} scripts/generate_dataset.py --config {os.path.join(config_dir, config_file)} --auto-remove-exp &\n"
                 )
 
     print(
@@ -167,6 +175,11 @@ if __name__ == "__main__":
         help="camera width to use for rendering",
         default=84,
     )
+    parser.add_argument(
+        "--use_zygote",
+        action="store_true",
+        help="launch the jobs through the zygote server (mimiclabs/scripts/zygote.py serve)",
+    )
 
     args = parser.parse_args()
     main(args)
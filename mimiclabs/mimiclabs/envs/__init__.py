@@ -1,3 +1,22 @@
 import os
+import importlib
 
-from .problems import *
+# The problem classes (and with them robosuite, mujoco and the object modules) are only
+# imported on first access, so that submodules like bddl_utils can be imported without
+# the simulator stack. Importing this package therefore does not register the MimicLabs
+# envs with robosuite: code that creates them by name has to import envs.problems (or
+# envs.bddl_base_domain) first, or access / star-import the problem classes from here.
+
+
+def _get_problems_module():
+    return importlib.import_module(f"{__name__}.problems")
+
+
+def __getattr__(name):
+    problems = _get_problems_module()
+    if name == "__all__":
+        return [k for k in vars(problems) if not k.startswith("_")]
+    try:
+        return getattr(problems, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1 +1 @@
-from .table_arena import TableArena
+from .table_arena import TableArena, get_table_arena
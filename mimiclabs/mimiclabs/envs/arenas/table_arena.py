@@ -1,5 +1,6 @@
 from mimiclabs.mimiclabs.envs.arenas.style import STYLE_MAPPING
 import numpy as np
+from copy import deepcopy
 
 from robosuite.models.arenas import Arena
 from robosuite.utils.mjcf_utils import (
@@ -127,3 +128,19 @@ class TableArena(Arena):
             np.array: (x,y,z) table position
         """
         return string_to_array(self.floor.get("pos")) + self.table_offset
+
+
+# pristine arenas, keyed by their constructor arguments, see get_table_arena()
+_TABLE_ARENA_CACHE = {}
+
+
+def get_table_arena(**kwargs):
+    """
+    Returns a TableArena constructed with @kwargs. Arenas are built once per process and
+    set of arguments, and handed out as copies, so that scene XMLs are not parsed again
+    on every model load. The returned arena can be edited freely.
+    """
+    key = repr(sorted(kwargs.items()))
+    if key not in _TABLE_ARENA_CACHE:
+        _TABLE_ARENA_CACHE[key] = TableArena(**kwargs)
+    return deepcopy(_TABLE_ARENA_CACHE[key])
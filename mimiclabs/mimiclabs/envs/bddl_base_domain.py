@@ -4,11 +4,12 @@ Base environment class for BDDL-based tasks in MimicLabs (adapted from LIBERO).
 
 import os
 import numpy as np
-import cv2
 import pathlib
 import uuid
 import time
 import datetime
+from copy import deepcopy
+from collections import OrderedDict
 
 import mujoco
 
@@ -20,6 +21,14 @@ from mimiclabs.mimiclabs import assets_root as ASSETS_ROOT
 import mimiclabs.mimiclabs.envs.bddl_utils as BDDLUtils
 from ..utils import *
 from .utils import *
+from .env_snapshot import EnvSnapshot, get_model_signature, get_texture_buffer
+from .mesh_utils import (
+    apply_preconverted_meshes,
+    apply_visual_mesh_lod,
+    select_mesh_lod,
+)
+from .spec_assembly import HAS_MJSPEC, SpecModelBuilder, pin_model_xml
+from .threaded_batch_env import SharedRenderContext
 from .arenas import *
 from .object_states import *
 from .objects import *
@@ -38,23 +47,32 @@ else:
 from robosuite.models.tasks import ManipulationTask
 from robosuite.utils.placement_samplers import SequentialCompositeSampler
 from robosuite.utils.observables import Observable, sensor
+from robosuite.utils.binding_utils import MjSim
 
-try:
-    # try to import mimicgen environments
-    import mimicgen
+_OPTIONAL_PACKAGE_PATHS = {}
 
-    MIMICGEN_PATH = mimicgen.__path__[0]
-except ImportError:
-    print("WARNING: could not import mimicgen envs")
 
-try:
-    # try to import robocasa environments
-    with disable_module_import("robocasa"):
-        from robocasa.models import assets_root as robocasa_assets_root
+def get_optional_package_path(package_name):
+    """
+    Returns the root folder of the optional package @package_name ("mimicgen" or
+    "robocasa"), whose assets may be referenced by object XMLs. The package is imported
+    on first use, so that envs that do not use its assets do not need it installed.
+    """
+    if package_name not in _OPTIONAL_PACKAGE_PATHS:
+        if package_name == "mimicgen":
+            import mimicgen
 
-        ROBOCASA_PATH = os.path.dirname(os.path.dirname(robocasa_assets_root))
-except ImportError:
-    print("WARNING: could not import robocasa envs")
+            _OPTIONAL_PACKAGE_PATHS[package_name] = mimicgen.__path__[0]
+        elif package_name == "robocasa":
+            with disable_module_import("robocasa"):
+                from robocasa.models import assets_root as robocasa_assets_root
+
+            _OPTIONAL_PACKAGE_PATHS[package_name] = os.path.dirname(
+                os.path.dirname(robocasa_assets_root)
+            )
+        else:
+            raise ValueError(f"Unknown optional package {package_name}")
+    return _OPTIONAL_PACKAGE_PATHS[package_name]
 
 
 MIMICLABS_TMP_FOLDER = macros.MIMICLABS_TMP_FOLDER
@@ -108,6 +126,12 @@ class BDDLBaseDomain(RobosuiteEnv):
         scene_xml="scenes/mimiclabs_scenes/lab2/lab2.xml",
         scene_properties={},
         use_depth_obs=False,  # NOTE(VS) unused; maybe replicate Robomimic's EnvRobosuite behavior
+        weld_static_objects=False,
+        filter_static_contacts=False,
+        visual_mesh_lod=None,
+        use_mjspec=False,
+        shared_sim=None,
+        pin_xml=False,
         **kwargs,
     ):
         # settings for table top (hardcoded since it's not an essential part of the environment)
@@ -130,6 +154,10 @@ class BDDLBaseDomain(RobosuiteEnv):
             self.object_property_initializers = object_property_initializers
         else:
             self.object_property_initializers = list()
+        # user-provided initializers, kept when switching tasks with load_task()
+        self._task_independent_property_initializers = list(
+            self.object_property_initializers
+        )
 
         # Keep track of movable objects in the tasks
         self.objects_dict = {}
@@ -169,6 +197,58 @@ class BDDLBaseDomain(RobosuiteEnv):
         )
         self._arena_properties = scene_properties
 
+        # whether to weld objects that never move to the world, see _weld_static_objects()
+        self.weld_static_objects = weld_static_objects
+        self._welded_object_names = set()
+
+        # whether to drop unreachable static geoms from collision checking, see
+        # _update_static_contact_filter()
+        self.filter_static_contacts = filter_static_contacts
+        self._unfiltered_contact_bits = None
+        # site colors of the current model before visualization sites toggled them
+        self._default_site_rgba = None
+
+        # level of detail of visual meshes. Off (None or 0) by default since it changes
+        # rendered images, "auto" picks it from the camera resolution. LODs are only used
+        # where generated by scripts/generate_mesh_lods.py
+        if visual_mesh_lod == "auto":
+            visual_mesh_lod = (
+                0 if has_renderer else select_mesh_lod(camera_heights, camera_widths)
+            )
+        self.visual_mesh_lod = visual_mesh_lod if visual_mesh_lod is not None else 0
+
+        # (MjModel, xml) pair compiled ahead of the next hard reset, see prepare_hard_reset()
+        self._prepared_sim_model = None
+
+        # source of the randomization sampled at model load time (camera pose, lighting,
+        # textures), the global numpy RNG unless replaced by a np.random.RandomState
+        self.model_rng = np.random
+
+        # whether sim.model.get_xml() exports the XML each model was compiled from rather
+        # than the last XML parsed in the process, for envs that run alongside other envs
+        # compiling models (see DoubleBufferedResetWrapper and pin_model_xml())
+        self._pin_xml = pin_xml
+
+        # compile models through a persistent mjSpec that is updated in place across hard
+        # resets (mujoco>=3.3), see envs/spec_assembly.py
+        if use_mjspec and not HAS_MJSPEC:
+            print("WARNING: use_mjspec requires mujoco>=3.3, compiling models from XML")
+        self._spec_builder = SpecModelBuilder() if use_mjspec and HAS_MJSPEC else None
+
+        # MjSim of another instance of this task whose MjModel is shared instead of
+        # compiling one, see envs/threaded_batch_env.py. The shared model must not change
+        # between resets, so fixture placements stay as sampled by its owner
+        if shared_sim is not None and hard_reset:
+            raise ValueError("Sharing a model with shared_sim requires hard_reset=False.")
+        if shared_sim is not None and filter_static_contacts:
+            raise ValueError("filter_static_contacts edits the model, cannot share it.")
+        self._shared_sim = shared_sim
+        self._model_frozen = shared_sim is not None
+
+        # observation keys declared through set_observation_spec(), None for all keys
+        self._obs_spec = None
+        self._default_observable_flags = None
+
         super().__init__(
             robots=robots,
             env_configuration=env_configuration,
@@ -231,7 +311,8 @@ class BDDLBaseDomain(RobosuiteEnv):
             ]
             if len(check_lst) > 0:
                 ind = max(check_lst)  # last occurrence index
-                new_path_split = MIMICGEN_PATH.split("/") + old_path_split[ind + 1 :]
+                package_path = get_optional_package_path("mimicgen")
+                new_path_split = package_path.split("/") + old_path_split[ind + 1 :]
                 new_path = "/".join(new_path_split)
                 elem.set("file", new_path)
                 continue  # path may contain "robosuite", hence continue
@@ -242,7 +323,8 @@ class BDDLBaseDomain(RobosuiteEnv):
             ]
             if len(check_lst) > 0:
                 ind = max(check_lst)  # last occurrence index
-                new_path_split = ROBOCASA_PATH.split("/") + old_path_split[ind + 1 :]
+                package_path = get_optional_package_path("robocasa")
+                new_path_split = package_path.split("/") + old_path_split[ind + 1 :]
                 new_path = "/".join(new_path_split)
                 elem.set("file", new_path)
 
@@ -295,6 +377,11 @@ class BDDLBaseDomain(RobosuiteEnv):
                 new_path = "/".join(new_path_split)
                 elem.set("file", new_path)
 
+        deduplicate_assets(root)
+        apply_visual_mesh_lod(root, self.visual_mesh_lod)
+        if macros.USE_PRECONVERTED_MESHES:
+            apply_preconverted_meshes(root)
+
         return ET.tostring(root, encoding="utf8").decode("utf8")
 
     def reward(self, action=None):
@@ -311,10 +398,16 @@ class BDDLBaseDomain(RobosuiteEnv):
         Returns:
             float: reward value
         """
+        return self._sparse_reward(self._check_success())
+
+    def _sparse_reward(self, success):
+        """
+        Returns the reward for a step that did (@success) or did not complete the task.
+        """
         reward = 0.0
 
         # sparse completion reward
-        if self._check_success():
+        if success:
             reward = 1.0
 
         # Scale reward if requested
@@ -420,6 +513,10 @@ class BDDLBaseDomain(RobosuiteEnv):
         """
         Loads an xml model, puts it in self.model
         """
+        if self._prepared_sim_model is not None:
+            # model for this hard reset was already built by prepare_hard_reset()
+            return
+
         super()._load_model()
         # Adjust base pose accordingly
 
@@ -428,7 +525,7 @@ class BDDLBaseDomain(RobosuiteEnv):
                 self.table_full_size[0]
             )
             self.robots[0].robot_model.set_base_xpos(xpos)
-            mujoco_arena = TableArena(
+            mujoco_arena = get_table_arena(
                 table_full_size=self.table_full_size,
                 table_offset=self.workspace_offset,
                 table_friction=(0.6, 0.005, 0.0001),
@@ -459,6 +556,10 @@ class BDDLBaseDomain(RobosuiteEnv):
 
         self._load_sites_in_arena(mujoco_arena)
 
+        self._welded_object_names = set()
+        if self.weld_static_objects:
+            self._weld_static_objects()
+
         self._generate_object_state_wrapper()
 
         self._setup_placement_initializer(mujoco_arena)
@@ -466,8 +567,11 @@ class BDDLBaseDomain(RobosuiteEnv):
         self.objects = list(self.objects_dict.values())
         self.fixtures = list(self.fixtures_dict.values())
 
-        # randomize textures if specified in bddl
-        self._randomize_object_textures(mujoco_arena)
+        # randomize textures if specified in bddl. Envs sharing another env's model
+        # render its textures, so they neither randomize nor write their own
+        self._randomized_texture_names = []
+        if self._shared_sim is None:
+            self._randomize_object_textures(mujoco_arena)
 
         self._randomize_lighting_dir(mujoco_arena)
 
@@ -481,9 +585,309 @@ class BDDLBaseDomain(RobosuiteEnv):
         for fixture in self.fixtures:
             self.model.merge_assets(fixture)
 
+        # objects sharing meshes or textures each bring their own copy
+        deduplicate_assets(self.model.root)
+
+        apply_visual_mesh_lod(self.model.root, self.visual_mesh_lod)
+        if macros.USE_PRECONVERTED_MESHES:
+            apply_preconverted_meshes(self.model.root)
+
+    def _get_static_object_names(self):
+        """
+        Returns the names of objects that are expected to stay where they are placed: objects
+        that are neither in :obj_of_interest nor referenced (directly or through one of their
+        regions) by the goal or demonstration predicates, and that are not initially placed
+        on such an object. Articulated objects, and other objects whose object states use
+        their joints (e.g. to turn them on), are kept as they are.
+        """
+
+        def _collect_object_names(group, names):
+            if isinstance(group, list):
+                for g in group:
+                    _collect_object_names(g, names)
+            elif group in self.objects_dict:
+                names.add(group)
+            elif group in self.object_sites_dict:
+                names.add(self.object_sites_dict[group].parent_name)
+
+        movable_names = set(self.obj_of_interest)
+        _collect_object_names(self.parsed_problem["goal_state"], movable_names)
+        _collect_object_names(self.parsed_problem["demonstration_states"], movable_names)
+
+        # objects resting on a movable object have to move along with it
+        changed = True
+        while changed:
+            changed = False
+            for state in self.parsed_problem["initial_state"]:
+                if len(state) != 3 or state[0] not in ["on", "in"]:
+                    continue
+                if state[1] in movable_names:
+                    continue
+                support_names = set()
+                _collect_object_names(state[2], support_names)
+                if len(support_names & movable_names) > 0:
+                    movable_names.add(state[1])
+                    changed = True
+
+        return [
+            name
+            for name, obj in self.objects_dict.items()
+            if name not in movable_names
+            and "articulation" not in obj.object_properties
+            and not any(
+                hasattr(obj, attr)
+                for attr in ["object_state_joints", "is_open", "turn_on"]
+            )
+        ]
+
+    def _weld_static_objects(self):
+        """
+        Removes the free joints of objects returned by _get_static_object_names(), which
+        welds them to the world and drops 6 DoF per object from nq / nv. Welded objects are
+        placed like fixtures in _reset_internal(), by moving their root body in the model.
+        Since they do not settle under gravity, they are then lowered onto the surface
+        below them, see _lower_welded_objects(). Their bodies, geoms and sites
+        are unchanged, so predicates and pose observables keep working.
+        """
+        for name in self._get_static_object_names():
+            obj = self.objects_dict[name]
+            root_body = obj.get_obj()
+            free_joints = [
+                joint
+                for joint in root_body.findall("joint")
+                if joint.get("type") == "free"
+            ]
+            if len(free_joints) == 0:
+                continue
+            for joint in free_joints:
+                root_body.remove(joint)
+            # keep obj.joints in sync with the XML
+            free_joint_names = [joint.get("name") for joint in free_joints]
+            obj._joints = [
+                joint
+                for joint in obj._joints
+                if obj.correct_naming(joint) not in free_joint_names
+            ]
+            self._welded_object_names.add(name)
+
+    def _lower_welded_objects(self, names):
+        """
+        Lowers the welded objects @names, in order, onto the first surface below their
+        bottom. Placement samplers place objects slightly above their support, which
+        movable objects close by falling, but welded objects would keep floating.
+        """
+        model = self.sim.model._model
+        data = self.sim.data._data
+        geom_id = np.zeros(1, dtype=np.int32)
+        for name in names:
+            obj = self.objects_dict[name]
+            body_id = self.sim.model.body_name2id(obj.root_body)
+            # poses of the objects lowered so far
+            mujoco.mj_kinematics(model, data)
+            bottom = data.xpos[body_id] + data.xmat[body_id].reshape(3, 3).dot(
+                obj.bottom_offset
+            )
+            dist = mujoco.mj_ray(
+                model,
+                data,
+                bottom,
+                np.array([0.0, 0.0, -1.0]),
+                None,
+                1,
+                body_id,
+                geom_id,
+            )
+            if dist > 0:
+                self.sim.model.body_pos[body_id][2] -= dist
+
+    def _postprocess_model(self):
+        """
+        Update from superclass (robosuite>=1.5) to skip models that prepare_hard_reset()
+        already post-processed.
+        """
+        if self._prepared_sim_model is None:
+            super()._postprocess_model()
+
+    def prepare_hard_reset(self):
+        """
+        Builds and compiles the model for the next hard reset ahead of time, so that the
+        following reset() only has to swap it in. All randomization that happens at model
+        load time (textures, lighting, camera pose) is sampled here, from model_rng.
+
+        This only touches the python-side model and the newly compiled MjModel, and may be
+        called from a worker thread as long as this env is not stepped in the meantime
+        (see DoubleBufferedResetWrapper).
+        """
+        self._prepared_sim_model = None
+        self._load_model()
+        if get_robosuite_version() >= "1.5":
+            self._postprocess_model()
+        xml = self.model.get_xml()
+        if self._xml_processor is not None:
+            xml = self._xml_processor(xml)
+        self._prepared_sim_model = (self._compile_model(xml), xml)
+
+    def _compile_model(self, xml):
+        """
+        Compiles @xml into a mujoco.MjModel, through the persistent mjSpec if enabled.
+        """
+        if self._spec_builder is not None:
+            return self._spec_builder.compile(xml)
+        return mujoco.MjModel.from_xml_string(xml)
+
+    def _initialize_sim(self, xml_string=None):
+        """
+        Update from superclass to use the model shared with another env or compiled by
+        prepare_hard_reset(), if any, and to compile models through the persistent mjSpec
+        if enabled. The XML that sim.model.get_xml() exports is pinned for these models,
+        and for all models with pin_xml (see pin_model_xml).
+        """
+        if xml_string is None and self._shared_sim is not None:
+            mj_model = self._shared_sim.model._model
+            xml = self._shared_sim.model.get_xml()
+        elif xml_string is None and self._prepared_sim_model is not None:
+            mj_model, xml = self._prepared_sim_model
+            self._prepared_sim_model = None
+        elif self._spec_builder is not None or self._pin_xml:
+            xml = xml_string if xml_string else self.model.get_xml()
+            if self._xml_processor is not None:
+                xml = self._xml_processor(xml)
+            mj_model = self._compile_model(xml)
+        else:
+            super()._initialize_sim(xml_string=xml_string)
+            return
+
+        self.sim = MjSim(mj_model)
+        # the model is not (or may soon not be) the last one parsed from XML in this process
+        pin_model_xml(self.sim, xml, body_names=self._get_placed_body_names())
+        shared_context = (
+            self._shared_sim._render_context_offscreen
+            if self._shared_sim is not None
+            else None
+        )
+        if shared_context is not None:
+            # render through the GL context that already holds the shared model's assets
+            self.sim.add_render_context(SharedRenderContext(shared_context, self.sim))
+        self.sim.forward()
+        self.initialize_time(self.control_freq)
+
+    def _get_placed_body_names(self):
+        """
+        Returns the root bodies of fixtures and welded objects, which _reset_internal()
+        places by moving them in the model.
+        """
+        return [
+            obj.root_body
+            for obj in list(self.fixtures_dict.values())
+            + [self.objects_dict[name] for name in sorted(self._welded_object_names)]
+        ]
+
+    def freeze_model(self):
+        """
+        Stops resets from writing fixture (and welded object) placements into the model,
+        so that the compiled model can be shared with other instances of this task (see
+        envs/threaded_batch_env.py). Fixtures keep their current placement.
+        """
+        if self.filter_static_contacts:
+            raise ValueError("filter_static_contacts edits the model, cannot freeze it.")
+        self._model_frozen = True
+
+    def load_task(self, bddl_file_name):
+        """
+        Switches this env to the task in @bddl_file_name, which must be a problem of the
+        same class (e.g. another variant of the same lab), and returns the observations
+        after resetting to it.
+
+        The env instance, its robot, controller, camera and renderer settings and its
+        offscreen GL context are kept; only the objects, regions and predicates of the new
+        task are loaded. The model is
+        rebuilt once (with the arena and robot models copied from their caches, see
+        get_table_arena() and CachedRobot), instead of the two builds of creating and
+        resetting a new env.
+
+        Observables are set up again for the new objects, so the observation spec
+        declared with set_observation_spec() is cleared and has to be declared again.
+
+        Args:
+            bddl_file_name (str): path to the BDDL file of the new task
+
+        Returns:
+            OrderedDict: observations after resetting to the new task
+        """
+        if self._shared_sim is not None:
+            raise ValueError("Cannot switch tasks in an env that shares its model.")
+        bddl_file_name = BDDLUtils.resolve_bddl_file_name(bddl_file_name)
+        parsed_problem = BDDLUtils.robosuite_parse_problem(bddl_file_name)
+        if parsed_problem["problem_name"] != self.__class__.__name__.lower():
+            raise ValueError(
+                f"Cannot load problem {parsed_problem['problem_name']} in an env of "
+                f"class {self.__class__.__name__}."
+            )
+        self.bddl_file_name = bddl_file_name
+        self.parsed_problem = parsed_problem
+        self.obj_of_interest = self.parsed_problem["obj_of_interest"]
+
+        # drop the state of the previous task, rebuilt by _load_model()
+        self.objects_dict = {}
+        self.fixtures_dict = {}
+        self.object_sites_dict = {}
+        self.object_states_dict = {}
+        self.tracking_object_states_change = []
+        self.objects = []
+        self.fixtures = []
+        if hasattr(self, "visualization_sites_list"):
+            self.visualization_sites_list = []
+        self.object_property_initializers = list(
+            self._task_independent_property_initializers
+        )
+        self._prepared_sim_model = None
+        self._unfiltered_contact_bits = None
+        self._default_site_rgba = None
+
+        # the offscreen GL context is kept for the new model
+        render_context = self.sim._render_context_offscreen
+        self.sim._render_context_offscreen = None
+        self._destroy_viewer()
+        self._destroy_sim()
+        self._load_model()
+        if get_robosuite_version() >= "1.5":
+            self._postprocess_model()
+        self._initialize_sim()
+        if render_context is not None:
+            self._reattach_render_context(render_context)
+        self._reset_internal()
+        self.sim.forward()
+
+        # observables depend on the objects of the task
+        self._obs_cache = {}
+        self._observables = self._setup_observables()
+        self._obs_spec = None
+        self._default_observable_flags = None
+        self.visualize(vis_settings={vis: False for vis in self._visualizations})
+
+        return self._get_observations(force_update=True)
+
+    def _reattach_render_context(self, render_context):
+        """
+        Points @render_context, the offscreen render context of the previous sim, at the
+        current sim, and uploads the assets of the new model to its GL context. Camera
+        and visualization options of the context are kept.
+        """
+        render_context.gl_ctx.make_current()
+        render_context.sim = self.sim
+        render_context.model = self.sim.model
+        render_context.data = self.sim.data
+        render_context.scn = mujoco.MjvScene(
+            self.sim.model._model, maxgeom=render_context.scn.maxgeom
+        )
+        render_context.con.free()
+        del render_context.con
+        render_context._set_mujoco_context_and_buffers()
+        self.sim.add_render_context(render_context)
+
     def _sample_camera_pose(self, degrees=False):
         ranges_r_theta_phi = self.parsed_problem["camera"]["ranges"]
-        range_choice = np.random.choice(range(len(ranges_r_theta_phi)))
+        range_choice = self.model_rng.choice(range(len(ranges_r_theta_phi)))
         range_r_theta_phi = ranges_r_theta_phi[range_choice]
         range_r = [range_r_theta_phi[0], range_r_theta_phi[3]]
         range_theta = [range_r_theta_phi[1], range_r_theta_phi[4]]
@@ -492,25 +896,25 @@ class BDDLBaseDomain(RobosuiteEnv):
         jitter_mode = self.parsed_problem["camera"]["jitter_mode"]
 
         if jitter_mode == "uniform":
-            sample_r = (range_r[1] - range_r[0]) * np.random.random_sample() + range_r[
+            sample_r = (range_r[1] - range_r[0]) * self.model_rng.random_sample() + range_r[
                 0
             ]
             sample_theta = (
                 range_theta[1] - range_theta[0]
-            ) * np.random.random_sample() + range_theta[0]
+            ) * self.model_rng.random_sample() + range_theta[0]
             sample_phi = (
                 range_phi[1] - range_phi[0]
-            ) * np.random.random_sample() + range_phi[0]
+            ) * self.model_rng.random_sample() + range_phi[0]
         elif jitter_mode == "normal":
             sample_r = np.clip(
-                np.random.normal(
+                self.model_rng.normal(
                     (range_r[1] + range_r[0]) / 2.0, (range_r[1] - range_r[0]) / 6.0
                 ),
                 range_r[0],
                 range_r[1],
             )
             sample_theta = np.clip(
-                np.random.normal(
+                self.model_rng.normal(
                     (range_theta[1] + range_theta[0]) / 2.0,
                     (range_theta[1] - range_theta[0]) / 6.0,
                 ),
@@ -518,7 +922,7 @@ class BDDLBaseDomain(RobosuiteEnv):
                 range_theta[1],
             )
             sample_phi = np.clip(
-                np.random.normal(
+                self.model_rng.normal(
                     (range_phi[1] + range_phi[0]) / 2.0,
                     (range_phi[1] - range_phi[0]) / 6.0,
                 ),
@@ -556,20 +960,20 @@ class BDDLBaseDomain(RobosuiteEnv):
             ranges_r_theta_phi = lighting_params.get(
                 "source", [[1.0, 0.0, 0.0, 1.0, 0.0, 0.0]]
             )  # default: top-down light source
-            range_choice = np.random.choice(range(len(ranges_r_theta_phi)))
+            range_choice = self.model_rng.choice(range(len(ranges_r_theta_phi)))
             range_r_theta_phi = ranges_r_theta_phi[range_choice]
             range_r = [range_r_theta_phi[0], range_r_theta_phi[3]]
             range_theta = [range_r_theta_phi[1], range_r_theta_phi[4]]
             range_phi = [range_r_theta_phi[2], range_r_theta_phi[5]]
-            sample_r = (range_r[1] - range_r[0]) * np.random.random_sample() + range_r[
+            sample_r = (range_r[1] - range_r[0]) * self.model_rng.random_sample() + range_r[
                 0
             ]
             sample_theta = (
                 range_theta[1] - range_theta[0]
-            ) * np.random.random_sample() + range_theta[0]
+            ) * self.model_rng.random_sample() + range_theta[0]
             sample_phi = (
                 range_phi[1] - range_phi[0]
-            ) * np.random.random_sample() + range_phi[0]
+            ) * self.model_rng.random_sample() + range_phi[0]
             pos, _ = convert_spherical_to_pos_quat((sample_r, sample_theta, sample_phi))
             light.attrib["dir"] = f"{-pos[0]} {-pos[1]} {-pos[2]}"
 
@@ -578,6 +982,9 @@ class BDDLBaseDomain(RobosuiteEnv):
         The following texture types are supported:
             file, wood, color, fractal, jitter
         """
+        # only needed for texture randomization, imported here to keep env imports light
+        import cv2
+
         for obj_name, texture_params in self.parsed_problem["textures"].items():
             if "table" in obj_name:
                 tex = mujoco_arena.asset.find("./texture[@name='tex-table']")
@@ -601,7 +1008,7 @@ class BDDLBaseDomain(RobosuiteEnv):
                             ASSETS_ROOT, "scenes/mimiclabs_scenes/textures/object"
                         )
                     texture_files = os.listdir(texture_folder)
-                    tex_file = np.random.choice(texture_files)
+                    tex_file = self.model_rng.choice(texture_files)
                     tex.attrib["file"] = os.path.join(texture_folder, tex_file)
 
                     image = cv2.imread(tex.attrib["file"])
@@ -609,9 +1016,9 @@ class BDDLBaseDomain(RobosuiteEnv):
                     if "hsv" in texture_params:
                         hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
                         hsv_ranges = texture_params["hsv"]
-                        hsv_range_choice = np.random.choice(range(len(hsv_ranges)))
+                        hsv_range_choice = self.model_rng.choice(range(len(hsv_ranges)))
                         hsv_range = hsv_ranges[hsv_range_choice]
-                        hue = np.random.choice(range(hsv_range[0], hsv_range[3] + 1))
+                        hue = self.model_rng.choice(range(hsv_range[0], hsv_range[3] + 1))
                         hsv_image[:, :, 0] = (hsv_image[:, :, 0] + hue) % 180
 
                         out_rgb = cv2.cvtColor(hsv_image, cv2.COLOR_HSV2BGR)
@@ -628,7 +1035,7 @@ class BDDLBaseDomain(RobosuiteEnv):
                             ASSETS_ROOT, "scenes/mimiclabs_scenes/textures/wood"
                         )
                     texture_files = os.listdir(texture_folder)
-                    tex_file = np.random.choice(texture_files)
+                    tex_file = self.model_rng.choice(texture_files)
                     tex.attrib["file"] = os.path.join(texture_folder, tex_file)
 
                     image = cv2.imread(tex.attrib["file"])
@@ -636,9 +1043,9 @@ class BDDLBaseDomain(RobosuiteEnv):
                     if "hsv" in texture_params:
                         hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
                         hsv_ranges = texture_params["hsv"]
-                        hsv_range_choice = np.random.choice(range(len(hsv_ranges)))
+                        hsv_range_choice = self.model_rng.choice(range(len(hsv_ranges)))
                         hsv_range = hsv_ranges[hsv_range_choice]
-                        hue = np.random.choice(range(hsv_range[0], hsv_range[3] + 1))
+                        hue = self.model_rng.choice(range(hsv_range[0], hsv_range[3] + 1))
                         hsv_image[:, :, 0] = (hsv_image[:, :, 0] + hue) % 180
 
                         out_rgb = cv2.cvtColor(hsv_image, cv2.COLOR_HSV2RGB)
@@ -649,23 +1056,23 @@ class BDDLBaseDomain(RobosuiteEnv):
                     image = cv2.imread(tex_file)
                     hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
                     hsv_ranges = texture_params["hsv"]
-                    hsv_range_choice = np.random.choice(range(len(hsv_ranges)))
+                    hsv_range_choice = self.model_rng.choice(range(len(hsv_ranges)))
                     hsv_range = hsv_ranges[hsv_range_choice]
-                    hue = np.random.choice(range(hsv_range[0], hsv_range[3] + 1))
+                    hue = self.model_rng.choice(range(hsv_range[0], hsv_range[3] + 1))
                     hsv_image[:, :, 0] = (hsv_image[:, :, 0] + hue) % 180
 
                     out_rgb = cv2.cvtColor(hsv_image, cv2.COLOR_HSV2RGB)
 
                 elif texture_params["texture_type"] == "fractal":
                     hsv_ranges = texture_params["hsv"]
-                    hsv_range_choice = np.random.choice(range(len(hsv_ranges)))
+                    hsv_range_choice = self.model_rng.choice(range(len(hsv_ranges)))
                     hsv_range = hsv_ranges[hsv_range_choice]
                     turbulence = texture_params["turbulence"]
                     sigma = texture_params["sigma"]
 
-                    hue = np.random.choice(range(hsv_range[0], hsv_range[3] + 1))
-                    sat = np.random.choice(range(hsv_range[1], hsv_range[4] + 1))
-                    val = np.random.choice(range(hsv_range[2], hsv_range[5] + 1))
+                    hue = self.model_rng.choice(range(hsv_range[0], hsv_range[3] + 1))
+                    sat = self.model_rng.choice(range(hsv_range[1], hsv_range[4] + 1))
+                    val = self.model_rng.choice(range(hsv_range[2], hsv_range[5] + 1))
                     # 170-10 is red, 50-70 is green, 110-130 is blue
                     out_hsv = np.stack(
                         [
@@ -681,7 +1088,7 @@ class BDDLBaseDomain(RobosuiteEnv):
                     ratio = H
                     while ratio != 1:
                         noise = cv2.resize(
-                            np.random.normal(0, sigma, (H // ratio, W // ratio, 3)),
+                            self.model_rng.normal(0, sigma, (H // ratio, W // ratio, 3)),
                             dsize=(W, H),
                             interpolation=cv2.INTER_LINEAR,
                         )
@@ -692,12 +1099,12 @@ class BDDLBaseDomain(RobosuiteEnv):
 
                 elif texture_params["texture_type"] == "jitter":
                     hsv_ranges = texture_params["hsv"]
-                    hsv_range_choice = np.random.choice(range(len(hsv_ranges)))
+                    hsv_range_choice = self.model_rng.choice(range(len(hsv_ranges)))
                     hsv_range = hsv_ranges[hsv_range_choice]
 
-                    hue = np.random.choice(range(hsv_range[0], hsv_range[3] + 1))
-                    sat = np.random.choice(range(hsv_range[1], hsv_range[4] + 1))
-                    val = np.random.choice(range(hsv_range[2], hsv_range[5] + 1))
+                    hue = self.model_rng.choice(range(hsv_range[0], hsv_range[3] + 1))
+                    sat = self.model_rng.choice(range(hsv_range[1], hsv_range[4] + 1))
+                    val = self.model_rng.choice(range(hsv_range[2], hsv_range[5] + 1))
 
                     img_hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
                     h, s, v = cv2.split(img_hsv)
@@ -722,6 +1129,7 @@ class BDDLBaseDomain(RobosuiteEnv):
                 cv2.imwrite(out_path, cv2.cvtColor(out_rgb, cv2.COLOR_RGB2BGR))
 
                 tex.attrib["file"] = out_path
+                self._randomized_texture_names.append(tex.attrib["name"])
 
     def _setup_placement_initializer(self, mujoco_arena):
         self.placement_initializer = SequentialCompositeSampler(name="ObjectSampler")
@@ -797,16 +1205,21 @@ class BDDLBaseDomain(RobosuiteEnv):
         sensors.append(world_pose_in_gripper)
         names.append("world_pose_in_gripper")
 
+        # Poses of all objects are computed by a single batched sensor, which the
+        # per-object sensors read their slice of through the observation cache
+        if len(self.objects) > 0:
+            sensors.append(self._create_batched_obj_sensor(modality="object"))
+            names.append("object_poses")
         for i, obj in enumerate(self.objects):
             obj_sensors, obj_sensor_names = self._create_obj_sensors(
-                obj_name=obj.name, modality="object"
+                obj_name=obj.name, obj_index=i, modality="object"
             )
 
             sensors += obj_sensors
             names += obj_sensor_names
 
         for name, s in zip(names, sensors):
-            if name == "world_pose_in_gripper":
+            if name in ["world_pose_in_gripper", "object_poses"]:
                 observables[name] = Observable(
                     name=name,
                     sensor=s,
@@ -821,13 +1234,53 @@ class BDDLBaseDomain(RobosuiteEnv):
 
         return observables
 
-    def _create_obj_sensors(self, obj_name, modality="object"):
+    def _create_batched_obj_sensor(self, modality="object"):
+        """
+        Creates a single sensor for the poses of all movable objects. Object poses are
+        gathered with one indexed read of body_xpos / body_xquat, and their poses relative
+        to the end effector are computed as one stacked matrix product.
+
+        The sensor returns an array of shape (num_objects, 14) holding (pos, quat,
+        to_eef_pos, to_eef_quat) for every object, which the per-object sensors of
+        _create_obj_sensors() read from the observation cache.
+
+        Args:
+            modality (str): Modality to assign to the sensor
+
+        Returns:
+            function: sensor for the batched object poses
+        """
+        body_ids = np.array([self.obj_body_id[obj.name] for obj in self.objects])
+
+        @sensor(modality=modality)
+        def object_poses(obs_cache):
+            obj_pos = self.sim.data.body_xpos[body_ids]
+            obj_quat = self.sim.data.body_xquat[body_ids]
+            poses = np.zeros((len(body_ids), 14))
+            poses[:, :3] = obj_pos
+            poses[:, 3:7] = obj_quat[:, [1, 2, 3, 0]]  # to xyzw
+            if "world_pose_in_gripper" in obs_cache:
+                world_pose_in_gripper = obs_cache["world_pose_in_gripper"]
+                rot = world_pose_in_gripper[:3, :3]
+                poses[:, 7:10] = (
+                    obj_pos.astype(np.float32) @ rot.T + world_pose_in_gripper[:3, 3]
+                )
+                poses[:, 10:14] = batch_mat2quat(rot @ batch_quat2mat(obj_quat))
+            return poses
+
+        return object_poses
+
+    def _create_obj_sensors(self, obj_name, obj_index, modality="object"):
         """
         Helper function to create sensors for a given object. This is abstracted in a separate function call so that we
         don't have local function naming collisions during the _setup_observables() call.
 
+        The sensors read the pose of the object from the batched "object_poses"
+        observable (see _create_batched_obj_sensor()), which is updated before them.
+
         Args:
             obj_name (str): Name of object to create sensors for
+            obj_index (int): Index of the object in self.objects
             modality (str): Modality to assign to all sensors
 
         Returns:
@@ -837,49 +1290,22 @@ class BDDLBaseDomain(RobosuiteEnv):
         """
         pf = self.robots[0].robot_model.naming_prefix
 
-        @sensor(modality=modality)
-        def obj_pos(obs_cache):
-            return np.array(self.sim.data.body_xpos[self.obj_body_id[obj_name]])
-
-        @sensor(modality=modality)
-        def obj_quat(obs_cache):
-            return T.convert_quat(
-                self.sim.data.body_xquat[self.obj_body_id[obj_name]], to="xyzw"
-            )
-
-        @sensor(modality=modality)
-        def obj_to_eef_pos(obs_cache):
-            # Immediately return default value if cache is empty
-            if any(
-                [
-                    name not in obs_cache
-                    for name in [
-                        f"{obj_name}_pos",
-                        f"{obj_name}_quat",
-                        "world_pose_in_gripper",
-                    ]
-                ]
-            ):
-                return np.zeros(3)
-            obj_pose = T.pose2mat(
-                (obs_cache[f"{obj_name}_pos"], obs_cache[f"{obj_name}_quat"])
-            )
-            rel_pose = T.pose_in_A_to_pose_in_B(
-                obj_pose, obs_cache["world_pose_in_gripper"]
-            )
-            rel_pos, rel_quat = T.mat2pose(rel_pose)
-            obs_cache[f"{obj_name}_to_{pf}eef_quat"] = rel_quat
-            return rel_pos
-
-        @sensor(modality=modality)
-        def obj_to_eef_quat(obs_cache):
-            return (
-                obs_cache[f"{obj_name}_to_{pf}eef_quat"]
-                if f"{obj_name}_to_{pf}eef_quat" in obs_cache
-                else np.zeros(4)
-            )
-
-        sensors = [obj_pos, obj_quat, obj_to_eef_pos, obj_to_eef_quat]
+        def _pose_slice(start, end):
+            @sensor(modality=modality)
+            def obj_pose_slice(obs_cache):
+                # Immediately return default value if cache is empty
+                if "object_poses" not in obs_cache:
+                    return np.zeros(end - start)
+                return obs_cache["object_poses"][obj_index, start:end]
+
+            return obj_pose_slice
+
+        sensors = [
+            _pose_slice(0, 3),
+            _pose_slice(3, 7),
+            _pose_slice(7, 10),
+            _pose_slice(10, 14),
+        ]
         names = [
             f"{obj_name}_pos",
             f"{obj_name}_quat",
@@ -889,6 +1315,92 @@ class BDDLBaseDomain(RobosuiteEnv):
 
         return sensors, names
 
+    def _get_observations(self, force_update=False):
+        """
+        Update from superclass to only return the keys of the observation spec.
+        """
+        observations = super()._get_observations(force_update=force_update)
+        if self._obs_spec is not None:
+            observations = OrderedDict(
+                (k, v) for k, v in observations.items() if k in self._obs_spec
+            )
+        return observations
+
+    def set_observation_spec(self, keys=None):
+        """
+        Declares the observation keys that the caller needs from reset(), reset_to(), step()
+        and _get_observations(). Only the observables required for these keys are computed:
+        cameras are rendered only if one of their image / depth / segmentation keys is
+        requested, and object poses only if an object key or "object-state" is requested.
+        Robot proprioception observables stay enabled since they are cheap and read each
+        other through the observation cache, but only requested keys are returned.
+
+        The spec persists across resets, including hard resets.
+
+        Args:
+            keys (None or list of str): observation keys to return, which may include
+                modality keys such as "object-state" or "robot0_proprio-state". If None,
+                restores the default of computing and returning all observations.
+        """
+        if self._default_observable_flags is None:
+            self._default_observable_flags = {
+                name: (obs.is_enabled(), obs.is_active())
+                for name, obs in self._observables.items()
+            }
+
+        if keys is None:
+            self._obs_spec = None
+            for name, (enabled, active) in self._default_observable_flags.items():
+                self._set_observable_flags(name, enabled, active)
+            return
+
+        keys = set(keys)
+        internal_keys = {"world_pose_in_gripper", "object_poses"}
+        known_keys = (set(self._observables.keys()) - internal_keys) | {
+            f"{obs.modality}-state" for obs in self._observables.values()
+        }
+        unknown_keys = keys - known_keys
+        if len(unknown_keys) > 0:
+            raise ValueError(
+                f"Unknown observation keys {sorted(unknown_keys)}. Options are: {sorted(known_keys)}"
+            )
+
+        # modality keys only cover the observables that are active by default, the same
+        # ones robosuite concatenates into them. world_pose_in_gripper and object_poses
+        # are only inputs of the per-object observables and are never returned
+        active = set()
+        for name, obs in self._observables.items():
+            if name in internal_keys:
+                continue
+            if name in keys or (
+                f"{obs.modality}-state" in keys
+                and self._default_observable_flags[name][1]
+            ):
+                active.add(name)
+
+        enabled = set(active)
+        if any(self._observables[name].modality == "object" for name in active):
+            enabled.update(internal_keys & set(self._observables.keys()))
+        for cam_name in self.camera_names:
+            if f"{cam_name}_depth" in enabled:
+                # depth is rendered along with rgb by the image sensor
+                enabled.add(f"{cam_name}_image")
+
+        for name, obs in self._observables.items():
+            if obs.modality not in ["image", "object"]:
+                enabled.add(name)
+            self._set_observable_flags(name, name in enabled, name in active)
+        self._obs_spec = keys
+
+    def _set_observable_flags(self, name, enabled, active):
+        """
+        Sets enabled / active flags of an observable, only resetting it if they change.
+        """
+        obs = self._observables[name]
+        if obs.is_enabled() != enabled:
+            obs.set_enabled(enabled)
+        obs.set_active(active)
+
     def _add_placement_initializer(self):
 
         mapping_inv = {}
@@ -1076,6 +1588,14 @@ class BDDLBaseDomain(RobosuiteEnv):
         """
         super()._reset_internal()
 
+        # visualization sites toggle their alpha in the model, which outlives the episode
+        # unless the model is recompiled (and is shared by envs with shared_sim)
+        model = self.sim.model._model
+        if self._default_site_rgba is None or self._default_site_rgba[0] is not model:
+            self._default_site_rgba = (model, np.array(model.site_rgba))
+        else:
+            model.site_rgba[:] = self._default_site_rgba[1]
+
         # Reset all object positions using initializer sampler if we're not directly loading from an xml
         if not self.deterministic_reset:
 
@@ -1106,17 +1626,63 @@ class BDDLBaseDomain(RobosuiteEnv):
                 )
             )
             for obj_pos, obj_quat, obj in object_placements.values():
-                if obj.name not in list(self.fixtures_dict.keys()):
+                if (
+                    obj.name not in self.fixtures_dict
+                    and obj.name not in self._welded_object_names
+                ):
                     # This is for movable object resetting (setting free joint)
                     self.sim.data.set_joint_qpos(
                         obj.joints[-1],
                         np.concatenate([np.array(obj_pos), np.array(obj_quat)]),
                     )
-                else:
-                    # This is for fixture resetting
+                elif not self._model_frozen:
+                    # This is for fixture (and welded object) resetting
                     body_id = self.sim.model.body_name2id(obj.root_body)
                     self.sim.model.body_pos[body_id] = obj_pos
                     self.sim.model.body_quat[body_id] = obj_quat
+            if not self._model_frozen:
+                self._lower_welded_objects(
+                    [
+                        obj.name
+                        for _, _, obj in object_placements.values()
+                        if obj.name in self._welded_object_names
+                    ]
+                )
+
+        if self.filter_static_contacts:
+            self._update_static_contact_filter()
+
+    def _update_static_contact_filter(self):
+        """
+        Disables collisions for static scene geometry (walls, scenery, far away fixtures)
+        that is out of reach of the robot and the table workspace, see
+        filter_static_contacts(). The unfiltered bitmasks of the current model are kept, so
+        that the filter can be recomputed after every reset from the new object placements.
+        """
+        model = self.sim.model._model
+        data = self.sim.data._data
+        if (
+            self._unfiltered_contact_bits is None
+            or self._unfiltered_contact_bits[0] is not model
+        ):
+            self._unfiltered_contact_bits = (
+                model,
+                np.array(model.geom_contype),
+                np.array(model.geom_conaffinity),
+            )
+        _, geom_contype, geom_conaffinity = self._unfiltered_contact_bits
+
+        mujoco.mj_kinematics(model, data)
+        table_geom_id = mujoco.mj_name2id(
+            model, mujoco.mjtObj.mjOBJ_GEOM, "table_collision"
+        )
+        filter_static_contacts(
+            model,
+            data,
+            geom_contype,
+            geom_conaffinity,
+            anchor_geom_ids=[table_geom_id] if table_geom_id >= 0 else [],
+        )
 
     def reset_to(self, state):
         """
@@ -1139,6 +1705,112 @@ class BDDLBaseDomain(RobosuiteEnv):
 
         return self._get_observations(force_update=True)
 
+    def snapshot(self):
+        """
+        Captures the current sim state together with the per-episode randomization baked
+        into the compiled model and the object-state tracker flags.
+
+        Returns:
+            EnvSnapshot: picklable snapshot that can be passed to restore()
+        """
+        model = self.sim.model._model
+        tex_buffer, tex_nchannel = get_texture_buffer(model)
+        textures = {}
+        for tex_name in self._randomized_texture_names:
+            tex_id = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_TEXTURE, tex_name)
+            if tex_id < 0:
+                continue
+            adr = model.tex_adr[tex_id]
+            size = model.tex_height[tex_id] * model.tex_width[tex_id]
+            textures[int(tex_id)] = np.array(
+                tex_buffer[adr : adr + size * tex_nchannel[tex_id]]
+            )
+
+        fixture_body_ids = [
+            self.obj_body_id[name]
+            for name in list(self.fixtures_dict) + sorted(self._welded_object_names)
+        ]
+
+        vis_site_names = {}
+        for query_dict in [self.objects_dict, self.fixtures_dict]:
+            for name, obj in query_dict.items():
+                props = getattr(obj, "object_properties", {})
+                if props.get("vis_site_names"):
+                    vis_site_names[name] = deepcopy(props["vis_site_names"])
+
+        return EnvSnapshot(
+            model_signature=get_model_signature(model),
+            sim_state=np.array(self.sim.get_state().flatten()),
+            cam_pos=np.array(model.cam_pos),
+            cam_quat=np.array(model.cam_quat),
+            light_pos=np.array(model.light_pos),
+            light_dir=np.array(model.light_dir),
+            light_castshadow=np.array(model.light_castshadow),
+            body_pos={i: np.array(model.body_pos[i]) for i in fixture_body_ids},
+            body_quat={i: np.array(model.body_quat[i]) for i in fixture_body_ids},
+            site_rgba=np.array(model.site_rgba),
+            textures=textures,
+            vis_site_names=vis_site_names,
+            timestep=self.timestep,
+            cur_time=self.cur_time,
+            done=self.done,
+        )
+
+    def restore(self, snapshot):
+        """
+        Restores a snapshot taken with snapshot() onto the current compiled model. The
+        model must have been compiled from the same BDDL task, but may come from a
+        different episode or env instance; no XML is parsed or compiled.
+
+        Args:
+            snapshot (EnvSnapshot): snapshot to restore
+
+        Returns:
+            OrderedDict: observations at the restored state
+        """
+        model = self.sim.model._model
+        if not snapshot.is_compatible(model):
+            raise ValueError(
+                "Snapshot was taken on a model that is incompatible with the current one."
+            )
+
+        model.cam_pos[:] = snapshot.cam_pos
+        model.cam_quat[:] = snapshot.cam_quat
+        model.light_pos[:] = snapshot.light_pos
+        model.light_dir[:] = snapshot.light_dir
+        model.light_castshadow[:] = snapshot.light_castshadow
+        for body_id, pos in snapshot.body_pos.items():
+            model.body_pos[body_id] = pos
+        for body_id, quat in snapshot.body_quat.items():
+            model.body_quat[body_id] = quat
+        if snapshot.site_rgba is not None:
+            model.site_rgba[:] = snapshot.site_rgba
+
+        tex_buffer, _ = get_texture_buffer(model)
+        render_context = self.sim._render_context_offscreen
+        for tex_id, data in snapshot.textures.items():
+            adr = model.tex_adr[tex_id]
+            tex_buffer[adr : adr + data.size] = data
+            if render_context is not None:
+                # textures live on the GPU once a render context exists
+                render_context.gl_ctx.make_current()
+                mujoco.mjr_uploadTexture(model, render_context.con, tex_id)
+
+        for name, vis_site_names in snapshot.vis_site_names.items():
+            self.get_object(name).object_properties["vis_site_names"] = deepcopy(
+                vis_site_names
+            )
+
+        self.sim.reset()
+        self.sim.set_state_from_flattened(snapshot.sim_state)
+        self.sim.forward()
+
+        self.timestep = snapshot.timestep
+        self.cur_time = snapshot.cur_time
+        self.done = snapshot.done
+
+        return self._get_observations(force_update=True)
+
     def reset_from_xml_string(self, xml_string):
         """
         Resets object textures to ones currently in the model before
@@ -1165,9 +1837,11 @@ class BDDLBaseDomain(RobosuiteEnv):
         for _, obj in self.objects_dict.items():
             objtex = obj.asset.find("./texture")
             texname = objtex.attrib["name"]
-            asset.find(f"./texture[@name='{texname}']").attrib["file"] = objtex.attrib[
-                "file"
-            ]
+            tex = asset.find(f"./texture[@name='{texname}']")
+            if tex is None:
+                # merged into an identical texture, see deduplicate_assets()
+                continue
+            tex.attrib["file"] = objtex.attrib["file"]
 
         modified_xml_string = ET.tostring(root, encoding="utf8").decode("utf8")
         super().reset_from_xml_string(modified_xml_string)
@@ -1193,17 +1867,132 @@ class BDDLBaseDomain(RobosuiteEnv):
         # Run superclass method first
         super().visualize(vis_settings=vis_settings)
 
-    def step(self, action):
+    def _convert_action(self, action):
         if self.action_dim == 4 and len(action) > 4:
             # Convert OSC_POSITION action
             action = np.array(action)
             action = np.concatenate((action[:3], action[-1:]), axis=-1)
+        return action
+
+    def step(self, action):
+        action = self._convert_action(action)
 
         obs, reward, done, info = super().step(action)
         done = self._check_success()
 
         return obs, reward, done, info
 
+    def step_sequence(self, actions, obs_every=None, stop_on_success=True):
+        """
+        Executes a chunk of @actions open-loop in one call. Unlike calling step() for each
+        action, observations are only computed after every @obs_every-th step and after
+        the last step, and the task predicates are only evaluated on these steps (or on
+        every step with @stop_on_success). Each action is applied exactly as by step().
+
+        The sequence ends after the last action, when the episode reaches its horizon, or
+        with @stop_on_success after the first step that completes the task. If it ends
+        early on a step whose observation was not scheduled, that observation is
+        computed from the final state. A sequence cut short by the horizon is reported
+        in the returned info (and with a warning), the remaining actions are dropped.
+
+        Args:
+            actions (np.array): actions of shape (num_actions, action_dim)
+
+            obs_every (int or None): compute observations after every @obs_every-th
+                step, in addition to the last one
+
+            stop_on_success (bool): whether to stop after the first successful step
+
+        Returns:
+            4-tuple:
+
+                - (OrderedDict) observations of the recorded steps, each key stacked
+                    into an array of shape (num_recorded, ...)
+                - (np.array) rewards of the recorded steps
+                - (np.array) whether the task is completed after each recorded step
+                - (dict) "num_steps", the number of executed actions, "obs_steps", the
+                    indices of the recorded steps in @actions, "success", and
+                    "truncated", whether the horizon was reached before the last action
+        """
+        if self.done:
+            raise ValueError("executing action in terminated episode")
+        assert len(actions) > 0, "no actions to execute"
+        assert obs_every is None or obs_every > 0
+
+        observations, rewards, dones, obs_steps = [], [], [], []
+        success = False
+        for t, action in enumerate(actions):
+            action = self._convert_action(action)
+            self.timestep += 1
+            self.done = (self.timestep >= self.horizon) and not self.ignore_done
+            record = (
+                t == len(actions) - 1
+                or self.done
+                or (obs_every is not None and (t + 1) % obs_every == 0)
+            )
+
+            # observables are only sampled on recorded steps
+            self._simulate_control_step(action, update_observables=record)
+            self._post_process()
+
+            if self.viewer is not None and self.renderer != "mujoco":
+                self.viewer.update()
+
+            if record or stop_on_success:
+                success = self._check_success()
+            stop = stop_on_success and success
+            if record or stop:
+                obs = self._get_observations(force_update=not record)
+                # observation buffers are overwritten by the next call
+                observations.append({k: np.array(v) for k, v in obs.items()})
+                rewards.append(self._sparse_reward(success))
+                dones.append(success)
+                obs_steps.append(t)
+            if self.done or stop:
+                break
+
+        truncated = self.done and t < len(actions) - 1 and not stop
+        if truncated:
+            print(
+                f"WARNING: step_sequence reached the horizon ({self.horizon}) after "
+                f"{t + 1} of {len(actions)} actions, the remaining actions were dropped"
+            )
+
+        stacked_obs = OrderedDict(
+            (k, np.stack([obs[k] for obs in observations])) for k in observations[0]
+        )
+        info = dict(
+            num_steps=t + 1,
+            obs_steps=np.array(obs_steps),
+            success=success,
+            truncated=truncated,
+        )
+        return stacked_obs, np.array(rewards), np.array(dones, dtype=bool), info
+
+    def _simulate_control_step(self, action, update_observables=True):
+        """
+        Runs the physics substeps of one control step with @action, as the loop in
+        robosuite's MujocoEnv.step() does (including its lite_physics mode on robosuite
+        1.5). Observables are only updated with @update_observables.
+        """
+        lite_physics = getattr(self, "lite_physics", False)
+        policy_step = True
+        for _ in range(int(self.control_timestep / self.model_timestep)):
+            if lite_physics:
+                self.sim.step1()
+            else:
+                self.sim.forward()
+            self._pre_action(action, policy_step)
+            if lite_physics:
+                self.sim.step2()
+            else:
+                self.sim.step()
+            if update_observables:
+                self._update_observables()
+            policy_step = False
+        # Note: this is done all at once to avoid floating point inaccuracies
+        self.cur_time += self.control_timestep
+
     def _pre_action(self, action, policy_step=False):
         super()._pre_action(action, policy_step=policy_step)
 
@@ -1245,3 +2034,7 @@ class BDDLBaseDomain(RobosuiteEnv):
         ]:
             if object_name in query_dict:
                 return query_dict[object_name]
+
+
+# register the problem classes in TASK_MAPPING (envs/__init__.py imports them lazily)
+from . import problems
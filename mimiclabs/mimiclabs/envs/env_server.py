@@ -0,0 +1,656 @@
+"""
+Local env server that hosts a pool of warm BDDL envs for all trainer and evaluator
+processes of a node, so that each of them does not build (and hold in memory) its own
+envs.
+
+Each pooled env runs in a worker process of the server (see envs/vector_env.py) and is
+keyed by its BDDL file and env kwargs. A client (RemoteVectorEnv) connects over a Unix
+socket (macros.ENV_SERVER_SOCKET_PATH) and checks out a batch of envs of one task, which
+are reused from the pool when possible and built otherwise. Observations are written by
+the workers into shared-memory buffers that the client maps, so they are never pickled.
+When the client closes (or disconnects), its envs go back to the pool, and the least
+recently used idle envs are shut down when the pool holds more than
+macros.ENV_SERVER_MAX_INSTANCES envs.
+
+Clients authenticate with a key that the server writes next to its socket, readable by
+its user only (see get_env_server_authkey). Envs go back to the pool in their default
+state: a client's observation spec is reset, and envs on which the client called any
+other method are shut down instead, since the changes of arbitrary calls cannot be
+undone.
+
+See scripts/env_server.py for the command line interface.
+"""
+
+import os
+import json
+import threading
+import traceback
+import multiprocessing as mp
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+import mimiclabs.mimiclabs.macros as macros
+import mimiclabs.mimiclabs.envs.bddl_utils as BDDLUtils
+from mimiclabs.mimiclabs.envs.vector_env import _worker, attach_buffers
+
+
+def _get_authkey_path(socket_path):
+    return socket_path + ".key"
+
+
+def _create_authkey(socket_path):
+    """
+    Writes a new random key for the server on @socket_path, readable by the user only,
+    and returns it.
+    """
+    authkey = os.urandom(32)
+    authkey_path = _get_authkey_path(socket_path)
+    if os.path.exists(authkey_path):
+        os.remove(authkey_path)
+    fd = os.open(authkey_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(authkey)
+    return authkey
+
+
+def get_env_server_authkey(socket_path=None):
+    """
+    Returns the key that clients of the env server on @socket_path authenticate with, or
+    None if the server did not write one.
+    """
+    socket_path = (
+        socket_path if socket_path is not None else macros.ENV_SERVER_SOCKET_PATH
+    )
+    try:
+        with open(_get_authkey_path(socket_path), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class _Instance:
+    """
+    Pooled env running in a worker process.
+    """
+
+    def __init__(self, key, env_config, ctx):
+        self.key = key
+        self.obs_spec = None
+        self.broken = False
+        self.pipe, child_pipe = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker, args=(child_pipe, env_config), daemon=True
+        )
+        self.process.start()
+        child_pipe.close()
+
+    def send(self, cmd, data=None):
+        self.pipe.send((cmd, data))
+
+    def receive(self):
+        """
+        Returns the result of the last command, or raises RuntimeError with the worker's
+        traceback. If the worker process exited, the instance is marked as broken.
+        """
+        try:
+            status, result = self.pipe.recv()
+        except (EOFError, ConnectionResetError):
+            self.broken = True
+            status, result = "error", "worker process exited"
+        if status == "error":
+            raise RuntimeError(result)
+        return result
+
+    def close(self):
+        try:
+            if self.process.is_alive():
+                self.send("close")
+        except (BrokenPipeError, EOFError):
+            pass
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.pipe.close()
+
+
+class _Session:
+    """
+    Batch of envs checked out by one client, with the shared observation buffers.
+    """
+
+    def __init__(self, instances, obs_keys, auto_reset):
+        self.instances = instances
+        self.num_envs = len(instances)
+        # envs whose observation spec must be reset before they go back to the pool,
+        # and envs that cannot go back to the pool
+        self.spec_changed = set()
+        self.retired = set()
+        obs_spec = instances[0].obs_spec
+        if obs_keys is None:
+            obs_keys = list(obs_spec.keys())
+        missing = [k for k in obs_keys if k not in obs_spec]
+        if len(missing) > 0:
+            raise ValueError(f"Observations {missing} are not provided by the env")
+
+        self.shms = []
+        self.buffer_specs = {}
+        for k in obs_keys:
+            shape, dtype = obs_spec[k]
+            shape = (self.num_envs,) + tuple(shape)
+            nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.shms.append(shm)
+            self.buffer_specs[k] = (shm.name, shape, dtype)
+        self.run(
+            "attach",
+            [(i, self.buffer_specs, auto_reset) for i in range(self.num_envs)],
+        )
+        # envs from the pool are in the middle of an episode of the previous client
+        self.run("reset", [None] * self.num_envs)
+
+    def run(self, cmd, data, indices=None):
+        """
+        Sends @cmd to the envs at @indices (all envs by default) with one item of @data
+        each, and returns their results.
+        """
+        indices = list(range(self.num_envs)) if indices is None else list(indices)
+        assert len(data) == len(indices)
+        if cmd == "call":
+            for i, (name, _, _) in zip(indices, data):
+                if name == "set_observation_spec":
+                    self.spec_changed.add(i)
+                else:
+                    self.retired.add(i)
+        for i, d in zip(indices, data):
+            self.instances[i].send(cmd, d)
+        results, errors = [], []
+        for i in indices:
+            try:
+                results.append(self.instances[i].receive())
+            except RuntimeError as e:
+                errors.append(f"env {i}:\n{e}")
+                results.append(None)
+        if len(errors) > 0:
+            raise RuntimeError("Error in env server worker\n" + "\n".join(errors))
+        return results
+
+    def close(self):
+        """
+        Detaches the envs from the buffers, restores their default state and frees the
+        buffers. Returns the envs, where envs that could not be restored are marked as
+        broken so that they are shut down.
+        """
+        for i, instance in enumerate(self.instances):
+            if i in self.retired:
+                instance.broken = True
+            if instance.broken:
+                continue
+            commands = [("detach", None)]
+            if i in self.spec_changed:
+                commands.append(("call", ("set_observation_spec", (None,), {})))
+            try:
+                for cmd, data in commands:
+                    instance.send(cmd, data)
+                    instance.receive()
+            except (RuntimeError, BrokenPipeError):
+                instance.broken = True
+        for shm in self.shms:
+            shm.close()
+            shm.unlink()
+        self.shms = []
+        return self.instances
+
+
+class EnvServer:
+    """
+    Serves batches of pooled envs to clients on @socket_path, keeping at most
+    @max_instances envs (idle or in use) when possible. Only clients with the key
+    written by serve_forever() can connect.
+    """
+
+    def __init__(self, socket_path=None, max_instances=None, context="spawn"):
+        self.socket_path = (
+            socket_path if socket_path is not None else macros.ENV_SERVER_SOCKET_PATH
+        )
+        self.max_instances = (
+            max_instances
+            if max_instances is not None
+            else macros.ENV_SERVER_MAX_INSTANCES
+        )
+        self._ctx = mp.get_context(context)
+        self._lock = threading.Lock()
+        # idle instances, least recently used first
+        self._idle = OrderedDict()
+        self._instances = set()
+        self._listener = None
+        self._authkey = None
+        self._stopping = False
+
+    @staticmethod
+    def _get_key(env_config):
+        return json.dumps(env_config, sort_keys=True)
+
+    def _evict(self, num_instances):
+        """
+        Removes least recently used idle instances from the pool until at most
+        @num_instances instances are left (or none is idle), and returns them. Must be
+        called with the lock held.
+        """
+        evicted = []
+        while len(self._instances) > num_instances and len(self._idle) > 0:
+            _, instance = self._idle.popitem(last=False)
+            self._instances.remove(instance)
+            evicted.append(instance)
+        return evicted
+
+    def checkout(self, env_config, num_envs):
+        """
+        Returns @num_envs instances of the env in @env_config, taken from the pool or
+        started. They are ready once received().
+        """
+        key = self._get_key(env_config)
+        with self._lock:
+            instances = [
+                instance for instance in self._idle.values() if instance.key == key
+            ][-num_envs:]
+            for instance in instances:
+                del self._idle[id(instance)]
+            num_new = num_envs - len(instances)
+            evicted = self._evict(self.max_instances - num_new)
+            if len(self._instances) + num_new > self.max_instances:
+                print(
+                    f"WARNING: env server runs {len(self._instances) + num_new} envs, "
+                    f"more than max_instances ({self.max_instances})"
+                )
+            new_instances = [
+                _Instance(key, env_config, self._ctx) for _ in range(num_new)
+            ]
+            self._instances.update(new_instances)
+        for instance in evicted:
+            instance.close()
+
+        errors = []
+        for instance in new_instances:
+            try:
+                instance.obs_spec = instance.receive()
+            except RuntimeError as e:
+                errors.append(str(e))
+        instances += new_instances
+        if len(errors) > 0:
+            self.release(instances)
+            raise RuntimeError("Error creating env\n" + "\n".join(errors))
+        return instances
+
+    def release(self, instances):
+        """
+        Returns @instances to the pool, and shuts down broken ones and the least
+        recently used idle ones above max_instances.
+        """
+        broken = [instance for instance in instances if instance.broken]
+        with self._lock:
+            for instance in instances:
+                if instance.broken:
+                    self._instances.discard(instance)
+                else:
+                    self._idle[id(instance)] = instance
+            evicted = self._evict(self.max_instances)
+        for instance in broken + evicted:
+            instance.close()
+
+    def status(self):
+        """
+        Returns the number of envs in the pool and the number of idle envs per task
+        (BDDL file).
+        """
+        with self._lock:
+            idle = {}
+            for instance in self._idle.values():
+                env_config = json.loads(instance.key)
+                task = env_config["env_kwargs"].get(
+                    "bddl_file_name", env_config.get("env_name")
+                )
+                idle[task] = idle.get(task, 0) + 1
+            return dict(num_instances=len(self._instances), idle=idle)
+
+    def serve_forever(self):
+        """
+        Serves clients, each on its own thread, until a stop request is received.
+        """
+        if is_env_server_running(self.socket_path):
+            raise RuntimeError(
+                f"An env server is already listening on {self.socket_path}"
+            )
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+
+        self._authkey = _create_authkey(self.socket_path)
+        self._listener = Listener(
+            self.socket_path, family="AF_UNIX", authkey=self._authkey
+        )
+        print(f"env server: listening on {self.socket_path} (pid {os.getpid()})")
+        try:
+            while not self._stopping:
+                try:
+                    conn = self._listener.accept()
+                except (mp.AuthenticationError, EOFError, ConnectionResetError):
+                    # client without the key
+                    continue
+                if self._stopping:
+                    conn.close()
+                    break
+                threading.Thread(
+                    target=self._serve_client, args=(conn,), daemon=True
+                ).start()
+        finally:
+            self._listener.close()
+            if os.path.exists(_get_authkey_path(self.socket_path)):
+                os.remove(_get_authkey_path(self.socket_path))
+            with self._lock:
+                instances = list(self._instances)
+                self._instances.clear()
+                self._idle.clear()
+            for instance in instances:
+                instance.close()
+            print("env server: stopped")
+
+    def _serve_client(self, conn):
+        session = None
+        try:
+            while True:
+                try:
+                    cmd, data = conn.recv()
+                except (EOFError, ConnectionResetError):
+                    break
+                try:
+                    if cmd == "make":
+                        assert session is None, "the client already has envs"
+                        instances = self.checkout(data["env_config"], data["num_envs"])
+                        try:
+                            session = _Session(
+                                instances, data["obs_keys"], data["auto_reset"]
+                            )
+                        except Exception:
+                            self.release(instances)
+                            raise
+                        result = session.buffer_specs
+                    elif cmd in ["step", "reset", "reset_to", "call", "get_attr"]:
+                        assert session is not None, "the client has no envs"
+                        items, indices = data
+                        result = session.run(cmd, items, indices)
+                    elif cmd == "status":
+                        result = self.status()
+                    elif cmd == "stop":
+                        self._stopping = True
+                        result = None
+                    elif cmd == "close":
+                        # back in the pool before the client returns
+                        if session is not None:
+                            self.release(session.close())
+                            session = None
+                        result = None
+                    else:
+                        raise ValueError(f"Unknown command {cmd}")
+                    conn.send(("ok", result))
+                except Exception:
+                    conn.send(("error", traceback.format_exc()))
+                if cmd in ["close", "stop"]:
+                    break
+        finally:
+            if session is not None:
+                self.release(session.close())
+            conn.close()
+            if self._stopping:
+                # wake up the accept() of the main thread
+                try:
+                    Client(
+                        self.socket_path, family="AF_UNIX", authkey=self._authkey
+                    ).close()
+                except (OSError, mp.AuthenticationError):
+                    pass
+
+
+def _request(conn, cmd, data=None):
+    conn.send((cmd, data))
+    status, result = conn.recv()
+    if status == "error":
+        raise RuntimeError(f"Error in env server\n{result}")
+    return result
+
+
+def _connect(socket_path):
+    socket_path = (
+        socket_path if socket_path is not None else macros.ENV_SERVER_SOCKET_PATH
+    )
+    authkey = get_env_server_authkey(socket_path)
+    if authkey is None:
+        raise ConnectionError(
+            f"No env server on {socket_path}, start one with scripts/env_server.py serve"
+        )
+    try:
+        return Client(socket_path, family="AF_UNIX", authkey=authkey)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise ConnectionError(
+            f"No env server on {socket_path}, start one with scripts/env_server.py serve"
+        ) from e
+
+
+def is_env_server_running(socket_path=None):
+    """
+    Returns True if an env server accepts connections on @socket_path.
+    """
+    try:
+        _connect(socket_path).close()
+        return True
+    except mp.AuthenticationError:
+        # a server with another key
+        return True
+    except ConnectionError:
+        return False
+
+
+def get_env_server_status(socket_path=None):
+    """
+    Returns the pool status of the env server on @socket_path (see EnvServer.status).
+    """
+    conn = _connect(socket_path)
+    try:
+        return _request(conn, "status")
+    finally:
+        conn.close()
+
+
+def stop_env_server(socket_path=None):
+    """
+    Asks the env server on @socket_path to stop. Clients lose their envs.
+    """
+    conn = _connect(socket_path)
+    try:
+        _request(conn, "stop")
+    finally:
+        conn.close()
+
+
+class RemoteVectorEnv:
+    """
+    Batch of @num_envs envs of the task in @bddl_file, hosted by the env server on
+    @socket_path. The interface is that of SubprocVectorEnv (see envs/vector_env.py).
+
+    Example usage:
+        env = RemoteVectorEnv(
+            bddl_file, num_envs=8, env_kwargs=dict(robots="Panda", ...)
+        )
+        obs = env.reset()
+        for _ in range(horizon):
+            obs, rewards, dones, infos = env.step(policy(obs))
+        env.close()
+
+    Args:
+        bddl_file (str): BDDL file of the task
+
+        num_envs (int): number of envs
+
+        env_kwargs (dict or None): keyword arguments passed to robosuite.make, envs
+            are only reused by clients with the same kwargs
+
+        obs_keys (list or None): observation keys to batch, defaults to all keys
+
+        auto_reset (bool): whether envs are reset as soon as their episode ends
+
+        copy_obs (bool): whether returned observations are copies, or views into the
+            shared buffers that are overwritten by the next step / reset
+
+        socket_path (str or None): socket of the env server, defaults to
+            macros.ENV_SERVER_SOCKET_PATH
+    """
+
+    def __init__(
+        self,
+        bddl_file,
+        num_envs=1,
+        env_kwargs=None,
+        obs_keys=None,
+        auto_reset=True,
+        copy_obs=True,
+        socket_path=None,
+    ):
+        env_kwargs = dict(env_kwargs) if env_kwargs is not None else {}
+        env_kwargs["bddl_file_name"] = os.path.abspath(
+            BDDLUtils.resolve_bddl_file_name(bddl_file)
+        )
+        self.num_envs = num_envs
+        self.copy_obs = copy_obs
+        self.closed = False
+        self._waiting = None
+        self._shms = []
+        self.buffers = {}
+
+        self._conn = _connect(socket_path)
+        try:
+            buffer_specs = _request(
+                self._conn,
+                "make",
+                dict(
+                    env_config=dict(env_kwargs=env_kwargs),
+                    num_envs=num_envs,
+                    obs_keys=obs_keys,
+                    auto_reset=auto_reset,
+                ),
+            )
+            # this process was not started by the server, see attach_buffers
+            self._shms, self.buffers = attach_buffers(buffer_specs, untrack=True)
+        except Exception:
+            self._conn.close()
+            self.closed = True
+            raise
+
+    def _get_indices(self, indices):
+        return list(range(self.num_envs)) if indices is None else list(indices)
+
+    def _request(self, cmd, items, indices):
+        assert not self.closed, "RemoteVectorEnv is closed"
+        return _request(self._conn, cmd, (items, indices))
+
+    def _get_obs(self, indices):
+        if indices == list(range(self.num_envs)):
+            obs = self.buffers
+        else:
+            obs = {k: buf[indices] for k, buf in self.buffers.items()}
+        if self.copy_obs:
+            obs = {k: np.array(v) for k, v in obs.items()}
+        return obs
+
+    def step_async(self, actions, indices=None):
+        """
+        Starts stepping the envs at @indices (all envs by default) with @actions, one
+        action per env. Call step_wait() for the results.
+        """
+        assert not self.closed, "RemoteVectorEnv is closed"
+        assert self._waiting is None, "step_async() called twice without step_wait()"
+        indices = self._get_indices(indices)
+        assert len(actions) == len(indices)
+        self._conn.send(("step", (list(actions), indices)))
+        self._waiting = indices
+
+    def step_wait(self):
+        """
+        Waits for the envs stepped by step_async(). See SubprocVectorEnv.step_wait for
+        the return values.
+        """
+        assert self._waiting is not None, "step_wait() called without step_async()"
+        indices, self._waiting = self._waiting, None
+        status, results = self._conn.recv()
+        if status == "error":
+            raise RuntimeError(f"Error in env server\n{results}")
+        rewards = np.array([r[0] for r in results], dtype=np.float64)
+        dones = np.array([r[1] for r in results], dtype=bool)
+        infos = [r[2] for r in results]
+        return self._get_obs(indices), rewards, dones, infos
+
+    def step(self, actions, indices=None):
+        """
+        Steps the envs at @indices (all envs by default) with @actions, one action per
+        env. See step_wait() for the return values.
+        """
+        self.step_async(actions, indices=indices)
+        return self.step_wait()
+
+    def reset(self, indices=None):
+        """
+        Resets the envs at @indices (all envs by default) and returns their batched
+        observations.
+        """
+        indices = self._get_indices(indices)
+        self._request("reset", [None] * len(indices), indices)
+        return self._get_obs(indices)
+
+    def reset_to(self, states, indices=None):
+        """
+        Resets the envs at @indices (all envs by default) to @states, one state
+        dictionary (see BDDLBaseDomain.reset_to) per env, and returns their batched
+        observations.
+        """
+        indices = self._get_indices(indices)
+        assert len(states) == len(indices)
+        self._request("reset_to", list(states), indices)
+        return self._get_obs(indices)
+
+    def call(self, name, *args, indices=None, **kwargs):
+        """
+        Calls method @name of the envs at @indices and returns the list of results.
+        """
+        indices = self._get_indices(indices)
+        return self._request("call", [(name, args, kwargs)] * len(indices), indices)
+
+    def get_attr(self, name, indices=None):
+        """
+        Returns the list of values of attribute @name of the envs at @indices.
+        """
+        indices = self._get_indices(indices)
+        return self._request("get_attr", [name] * len(indices), indices)
+
+    def close(self):
+        """
+        Returns the envs to the server's pool.
+        """
+        if self.closed:
+            return
+        self.buffers = {}
+        for shm in self._shms:
+            shm.close()
+        self._shms = []
+        try:
+            if self._waiting is not None:
+                self._conn.recv()
+            _request(self._conn, "close")
+        except (EOFError, OSError, RuntimeError):
+            pass
+        self._conn.close()
+        self.closed = True
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
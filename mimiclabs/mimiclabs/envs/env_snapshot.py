@@ -0,0 +1,92 @@
+"""
+Lightweight, picklable snapshots of a BDDL env, see BDDLBaseDomain.snapshot() and
+BDDLBaseDomain.restore().
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+def get_texture_buffer(model):
+    """
+    Returns the flat texture pixel buffer of a mujoco.MjModel and its number of channels.
+    MuJoCo renamed tex_rgb to tex_data (with a per-texture channel count) in 3.2.
+    """
+    if hasattr(model, "tex_data"):
+        return model.tex_data, model.tex_nchannel
+    return model.tex_rgb, np.full(model.ntex, 3)
+
+
+def get_model_signature(model):
+    """
+    Sizes that must match between the model a snapshot was taken on and the model it is
+    restored onto.
+    """
+    return (
+        model.nq,
+        model.nv,
+        model.nu,
+        model.nbody,
+        model.ngeom,
+        model.nsite,
+        model.ncam,
+        model.nlight,
+        model.ntex,
+    )
+
+
+@dataclass
+class EnvSnapshot:
+    """
+    Compact state of a BDDL env mid-episode. Besides the flattened sim state, this keeps
+    the parts of the compiled model that are randomized per episode (camera poses,
+    lighting, fixture placements, sampled textures) and the object-state tracker flags,
+    so that it can be restored onto any model compiled from the same BDDL task.
+
+    Args:
+        model_signature (tuple): model sizes, see get_model_signature()
+        sim_state (np.array): flattened sim state (time, qpos, qvel)
+        cam_pos (np.array): (ncam, 3) camera positions
+        cam_quat (np.array): (ncam, 4) camera orientations
+        light_pos (np.array): (nlight, 3) light positions
+        light_dir (np.array): (nlight, 3) light directions
+        light_castshadow (np.array): (nlight,) light shadow flags
+        body_pos (dict): fixture root body id -> body position
+        body_quat (dict): fixture root body id -> body orientation
+        site_rgba (np.array): (nsite, 4) site colors, toggled by visualization sites
+        textures (dict): texture id -> pixel data for textures randomized from the BDDL file
+        vis_site_names (dict): object name -> copy of its "vis_site_names" object property
+        timestep (int): env timestep
+        cur_time (float): env time
+        done (bool): env done flag
+    """
+
+    model_signature: tuple
+    sim_state: np.ndarray
+    cam_pos: np.ndarray
+    cam_quat: np.ndarray
+    light_pos: np.ndarray
+    light_dir: np.ndarray
+    light_castshadow: np.ndarray
+    body_pos: dict = field(default_factory=dict)
+    body_quat: dict = field(default_factory=dict)
+    site_rgba: np.ndarray = None
+    textures: dict = field(default_factory=dict)
+    vis_site_names: dict = field(default_factory=dict)
+    timestep: int = 0
+    cur_time: float = 0.0
+    done: bool = False
+
+    def is_compatible(self, model):
+        """
+        Returns True if this snapshot can be restored onto @model (a mujoco.MjModel).
+        """
+        if get_model_signature(model) != tuple(self.model_signature):
+            return False
+        _, tex_nchannel = get_texture_buffer(model)
+        for tex_id, data in self.textures.items():
+            size = model.tex_height[tex_id] * model.tex_width[tex_id]
+            if data.size != size * tex_nchannel[tex_id]:
+                return False
+        return True
@@ -0,0 +1,525 @@
+"""
+Mesh file utilities: reading OBJ / STL / MuJoCo binary (.msh) meshes, writing .msh files,
+binary preconversion of OBJ / STL meshes, and precomputed level-of-detail (LOD) variants
+of visual meshes for low-resolution cameras.
+
+Preconverted meshes are generated once by scripts/preconvert_meshes.py and stored next to
+the original mesh file, as <file>.msh, which MuJoCo loads without parsing text. The
+manifest at macros.MESH_MANIFEST_PATH records the hash, size and modification time of
+every converted file, and apply_preconverted_meshes() only uses conversions whose
+original file is unchanged. They are only used if macros.USE_PRECONVERTED_MESHES is set.
+
+LOD meshes are generated offline by scripts/generate_mesh_lods.py and stored next to
+the original mesh file, as <file>.lod<level>.msh, so that the original file can always be
+recovered from model XMLs saved with LODs. With visual_mesh_lod="auto", BDDLBaseDomain
+picks a LOD level from its camera resolution (see select_mesh_lod()) and points visual
+geoms at the LOD files that exist, see apply_visual_mesh_lod(). Collision geoms always
+keep the original meshes.
+"""
+
+import os
+import re
+import json
+import struct
+import hashlib
+import numpy as np
+import xml.etree.ElementTree as ET
+
+import mimiclabs.mimiclabs.macros as macros
+
+
+# fraction of the original faces kept at each LOD level
+MESH_LOD_FACE_RATIOS = {1: 0.25, 2: 0.08}
+
+# largest camera dimension (in pixels) up to which each LOD level is used
+MESH_LOD_MAX_RESOLUTIONS = {1: 256, 2: 128}
+
+
+def _triangulate(polygon):
+    """
+    Fan triangulation of a polygon given as a list of corner indices.
+    """
+    return [
+        (polygon[0], polygon[i], polygon[i + 1]) for i in range(1, len(polygon) - 1)
+    ]
+
+
+def _load_obj(path):
+    """
+    Reads a Wavefront OBJ file. Corners are made unique per (position, texcoord, normal)
+    triplet, since .msh files store one texcoord and normal per vertex. Texcoords are
+    flipped vertically, as done by MuJoCo's OBJ loader.
+    """
+    positions, texcoords, normals = [], [], []
+    corner_ids = {}
+    corners = []
+    faces = []
+    with open(path, "r", errors="ignore") as f:
+        for line in f:
+            tokens = line.split()
+            if len(tokens) == 0:
+                continue
+            if tokens[0] == "v":
+                positions.append([float(x) for x in tokens[1:4]])
+            elif tokens[0] == "vt":
+                texcoords.append([float(x) for x in tokens[1:3]])
+            elif tokens[0] == "vn":
+                normals.append([float(x) for x in tokens[1:4]])
+            elif tokens[0] == "f":
+                polygon = []
+                for token in tokens[1:]:
+                    ids = token.split("/")
+                    corner = []
+                    for k, values in enumerate([positions, texcoords, normals]):
+                        if k < len(ids) and ids[k] != "":
+                            idx = int(ids[k])
+                            corner.append(idx - 1 if idx > 0 else len(values) + idx)
+                        else:
+                            corner.append(-1)
+                    corner = tuple(corner)
+                    if corner not in corner_ids:
+                        corner_ids[corner] = len(corners)
+                        corners.append(corner)
+                    polygon.append(corner_ids[corner])
+                faces.extend(_triangulate(polygon))
+
+    corners = np.array(corners, dtype=np.int64).reshape(-1, 3)
+    mesh = dict(
+        vertices=np.array(positions, dtype=np.float32).reshape(-1, 3)[corners[:, 0]],
+        faces=np.array(faces, dtype=np.int32).reshape(-1, 3),
+        normals=None,
+        texcoords=None,
+    )
+    if len(texcoords) > 0 and np.all(corners[:, 1] >= 0):
+        uv = np.array(texcoords, dtype=np.float32).reshape(-1, 2)[corners[:, 1]]
+        uv[:, 1] = 1.0 - uv[:, 1]
+        mesh["texcoords"] = uv
+    if len(normals) > 0 and np.all(corners[:, 2] >= 0):
+        mesh["normals"] = np.array(normals, dtype=np.float32).reshape(-1, 3)[
+            corners[:, 2]
+        ]
+    return mesh
+
+
+def _load_stl(path):
+    """
+    Reads an ASCII or binary STL file.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    num_faces = struct.unpack("<I", data[80:84])[0] if len(data) >= 84 else 0
+    if len(data) == 84 + 50 * num_faces:
+        record = np.dtype(
+            [("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attr", "<u2")]
+        )
+        records = np.frombuffer(data[84:], dtype=record, count=num_faces)
+        vertices = records["vertices"].reshape(-1, 3)
+    else:
+        vertices = [
+            [float(x) for x in line.split()[1:4]]
+            for line in data.decode("utf8", errors="ignore").splitlines()
+            if line.strip().startswith("vertex")
+        ]
+        vertices = np.array(vertices, dtype=np.float32).reshape(-1, 3)
+    return dict(
+        vertices=np.array(vertices, dtype=np.float32),
+        faces=np.arange(len(vertices), dtype=np.int32).reshape(-1, 3),
+        normals=None,
+        texcoords=None,
+    )
+
+
+def _load_msh(path):
+    """
+    Reads a MuJoCo binary mesh file.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    num_vertex, num_normal, num_texcoord, num_face = np.frombuffer(
+        data, dtype="<i4", count=4
+    )
+    offset = 16
+    arrays = []
+    for count, dtype in [
+        (3 * num_vertex, "<f4"),
+        (3 * num_normal, "<f4"),
+        (2 * num_texcoord, "<f4"),
+        (3 * num_face, "<i4"),
+    ]:
+        arrays.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset))
+        offset += 4 * count
+    vertices, normals, texcoords, faces = arrays
+    return dict(
+        vertices=vertices.reshape(-1, 3).copy(),
+        faces=faces.reshape(-1, 3).copy(),
+        normals=normals.reshape(-1, 3).copy() if num_normal > 0 else None,
+        texcoords=texcoords.reshape(-1, 2).copy() if num_texcoord > 0 else None,
+    )
+
+
+def load_mesh(path):
+    """
+    Reads a mesh file (.obj, .stl or .msh).
+
+    Returns:
+        dict: with keys "vertices" (N, 3), "faces" (F, 3), and per-vertex "normals" (N, 3)
+            and "texcoords" (N, 2), which are None if the file does not define them
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".obj":
+        return _load_obj(path)
+    elif ext == ".stl":
+        return _load_stl(path)
+    elif ext == ".msh":
+        return _load_msh(path)
+    raise ValueError(f"Unsupported mesh format {ext} for {path}")
+
+
+def write_msh(path, mesh):
+    """
+    Writes @mesh (see load_mesh()) to a MuJoCo binary mesh file.
+    """
+    vertices = np.ascontiguousarray(mesh["vertices"], dtype="<f4")
+    normals = mesh.get("normals")
+    texcoords = mesh.get("texcoords")
+    normals = np.zeros((0, 3)) if normals is None else normals
+    texcoords = np.zeros((0, 2)) if texcoords is None else texcoords
+    faces = np.ascontiguousarray(mesh["faces"], dtype="<i4")
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(
+            np.array(
+                [len(vertices), len(normals), len(texcoords), len(faces)], dtype="<i4"
+            ).tobytes()
+        )
+        f.write(vertices.tobytes())
+        f.write(np.ascontiguousarray(normals, dtype="<f4").tobytes())
+        f.write(np.ascontiguousarray(texcoords, dtype="<f4").tobytes())
+        f.write(faces.tobytes())
+    os.replace(tmp_path, path)
+
+
+def weld_vertices(mesh):
+    """
+    Merges vertices with identical position, normal and texcoord, and returns the welded
+    mesh. MuJoCo does this when loading OBJ and STL files but not .msh files, so meshes
+    are welded before conversion to keep the compiled models equally small.
+    """
+    columns = [mesh["vertices"]] + [
+        mesh[key] for key in ["normals", "texcoords"] if mesh.get(key) is not None
+    ]
+    _, first, index = np.unique(
+        np.concatenate(columns, axis=1), axis=0, return_index=True, return_inverse=True
+    )
+    welded = dict(mesh)
+    for key in ["vertices", "normals", "texcoords"]:
+        if mesh.get(key) is not None:
+            welded[key] = mesh[key][first]
+    welded["faces"] = index.reshape(-1)[mesh["faces"]].astype(np.int32)
+    return welded
+
+
+def _cluster_vertices(mesh, cell_size):
+    """
+    Vertex clustering: merges all vertices that fall into the same cell of a grid of
+    @cell_size (and the same cell of a proportionally sized texture grid, so that texture
+    seams stay separate), keeping the first vertex of each cluster. Returns the decimated
+    mesh.
+    """
+    vertices = mesh["vertices"]
+    keys = np.floor((vertices - vertices.min(axis=0)) / cell_size).astype(np.int64)
+    if mesh.get("texcoords") is not None:
+        uv_cell_size = cell_size / float(np.max(np.ptp(vertices, axis=0)))
+        uv_keys = np.floor(mesh["texcoords"] / uv_cell_size).astype(np.int64)
+        keys = np.concatenate([keys, uv_keys], axis=1)
+    _, first, cluster = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    cluster = cluster.reshape(-1)
+
+    faces = cluster[mesh["faces"]]
+    valid = (
+        (faces[:, 0] != faces[:, 1])
+        & (faces[:, 1] != faces[:, 2])
+        & (faces[:, 0] != faces[:, 2])
+    )
+    faces = np.unique(faces[valid], axis=0)
+
+    decimated = dict(
+        vertices=vertices[first],
+        faces=faces.astype(np.int32),
+        normals=None,
+        texcoords=None,
+    )
+    for key in ["normals", "texcoords"]:
+        if mesh.get(key) is not None:
+            decimated[key] = mesh[key][first]
+    return decimated
+
+
+def decimate_mesh(mesh, face_ratio, num_iters=12):
+    """
+    Decimates @mesh to roughly @face_ratio of its faces by vertex clustering, searching
+    for the grid cell size that gets closest to the target face count. Normals are
+    dropped from the result so that MuJoCo recomputes them for the new faces.
+    """
+    target = max(int(face_ratio * len(mesh["faces"])), 4)
+    extent = float(np.max(np.ptp(mesh["vertices"], axis=0)))
+    if extent <= 0 or len(mesh["faces"]) <= target:
+        return mesh
+    lo, hi = extent * 1e-4, extent
+    best = None
+    for _ in range(num_iters):
+        cell_size = np.sqrt(lo * hi)
+        decimated = _cluster_vertices(mesh, cell_size)
+        if len(decimated["faces"]) > target:
+            lo = cell_size
+        else:
+            hi = cell_size
+        if best is None or abs(len(decimated["faces"]) - target) < abs(
+            len(best["faces"]) - target
+        ):
+            best = decimated
+    if len(best["faces"]) == 0:
+        return mesh
+    best["normals"] = None
+    return best
+
+
+_MESH_LOD_SUFFIX = re.compile(r"\.lod[0-9]+\.msh$")
+_PRECONVERTED_MESH_SUFFIX = re.compile(r"(\.(obj|stl))\.msh$", re.IGNORECASE)
+
+
+def get_mesh_lod_path(mesh_file, lod):
+    """
+    Returns the path of LOD level @lod of @mesh_file.
+    """
+    return f"{get_original_mesh_path(mesh_file)}.lod{lod}.msh"
+
+
+def get_original_mesh_path(mesh_file):
+    """
+    Returns the original mesh file of @mesh_file, which may be a LOD file or a
+    preconverted mesh.
+    """
+    mesh_file = _MESH_LOD_SUFFIX.sub("", mesh_file)
+    return _PRECONVERTED_MESH_SUFFIX.sub(r"\1", mesh_file)
+
+
+def has_mesh_lod(mesh_file, lod):
+    """
+    Returns True if LOD level @lod of @mesh_file exists and is newer than the original.
+    """
+    lod_file = get_mesh_lod_path(mesh_file, lod)
+    return os.path.exists(lod_file) and os.path.getmtime(lod_file) >= os.path.getmtime(
+        mesh_file
+    )
+
+
+def select_mesh_lod(camera_heights, camera_widths):
+    """
+    Returns the coarsest LOD level whose maximum resolution covers the largest camera
+    dimension, or 0 (original meshes) for high-resolution cameras.
+    """
+    if not isinstance(camera_heights, (list, tuple)):
+        camera_heights = [camera_heights]
+    if not isinstance(camera_widths, (list, tuple)):
+        camera_widths = [camera_widths]
+    resolution = max(list(camera_heights) + list(camera_widths))
+    for lod in sorted(MESH_LOD_MAX_RESOLUTIONS, reverse=True):
+        if resolution <= MESH_LOD_MAX_RESOLUTIONS[lod]:
+            return lod
+    return 0
+
+
+def is_visual_geom(geom, default_geom_attribs=None):
+    """
+    Returns True if @geom (an ET.Element) only serves rendering, i.e. it is in group 1 or
+    has collisions disabled. @default_geom_attribs maps default class names to geom
+    attributes, see get_default_geom_attribs().
+    """
+    attribs = {}
+    if default_geom_attribs is not None:
+        attribs.update(default_geom_attribs.get(geom.get("class", "main"), {}))
+    attribs.update(geom.attrib)
+    if attribs.get("group") == "1":
+        return True
+    return attribs.get("contype") == "0" and attribs.get("conaffinity") == "0"
+
+
+def get_default_geom_attribs(root):
+    """
+    Returns a dictionary mapping default class names in the MJCF @root to the geom
+    attributes they set, including inherited ones.
+    """
+    classes = {}
+
+    def _visit(default, inherited):
+        attribs = dict(inherited)
+        geom = default.find("geom")
+        if geom is not None:
+            attribs.update(geom.attrib)
+        classes[default.get("class", "main")] = attribs
+        for child in default.findall("default"):
+            _visit(child, attribs)
+
+    for default in root.findall("default"):
+        _visit(default, {})
+    return classes
+
+
+def apply_visual_mesh_lod(root, lod):
+    """
+    Points visual geoms in the MJCF @root at LOD level @lod of their meshes, where one
+    has been generated. Meshes that are also used by collision geoms get a separate LOD
+    mesh asset for the visual geoms, so that collisions are unchanged. Mesh files that
+    already point at a LOD (e.g. in model XMLs saved from an env using LODs) are first
+    reverted to the original file.
+
+    Args:
+        root (ET.Element): MJCF root, edited in place
+        lod (int): LOD level, 0 leaves the model unchanged
+
+    Returns:
+        int: number of meshes switched to their LOD
+    """
+    asset = root.find("asset")
+    if asset is None:
+        return 0
+    for mesh in asset.findall("mesh"):
+        if mesh.get("file") is not None:
+            mesh.set("file", get_original_mesh_path(mesh.get("file")))
+    if lod == 0:
+        return 0
+    default_geom_attribs = get_default_geom_attribs(root)
+
+    geoms_by_mesh = {}
+    for geom in root.iter("geom"):
+        if geom.get("mesh") is not None:
+            geoms_by_mesh.setdefault(geom.get("mesh"), []).append(geom)
+
+    num_switched = 0
+    for mesh in asset.findall("mesh"):
+        mesh_file = mesh.get("file")
+        geoms = geoms_by_mesh.get(mesh.get("name"), [])
+        if mesh_file is None or len(geoms) == 0 or not os.path.exists(mesh_file):
+            continue
+        if not has_mesh_lod(mesh_file, lod):
+            continue
+        lod_file = get_mesh_lod_path(mesh_file, lod)
+        visual = [is_visual_geom(g, default_geom_attribs) for g in geoms]
+        if all(visual):
+            mesh.set("file", lod_file)
+        elif any(visual):
+            lod_mesh = ET.SubElement(asset, "mesh", attrib=dict(mesh.attrib))
+            lod_mesh.set("name", f"{mesh.get('name')}_lod{lod}")
+            lod_mesh.set("file", lod_file)
+            for geom, is_visual in zip(geoms, visual):
+                if is_visual:
+                    geom.set("mesh", lod_mesh.get("name"))
+        else:
+            continue
+        num_switched += 1
+    return num_switched
+
+
+def get_preconverted_mesh_path(mesh_file):
+    """
+    Returns the path of the binary preconversion of @mesh_file, or None if @mesh_file is
+    not an OBJ or STL file.
+    """
+    if os.path.splitext(mesh_file)[1].lower() not in [".obj", ".stl"]:
+        return None
+    return f"{mesh_file}.msh"
+
+
+def get_file_hash(path):
+    """
+    Returns the sha1 hex digest of the contents of @path.
+    """
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+# manifest cache, keyed by (path, modification time) of the manifest file
+_mesh_manifest_cache = {}
+
+
+def load_mesh_manifest(path=None):
+    """
+    Returns the manifest of preconverted meshes (see scripts/preconvert_meshes.py), mapping
+    absolute original mesh paths to dicts with keys "sha1", "size", "mtime_ns" and "msh".
+    Returns an empty manifest if none was generated.
+    """
+    path = macros.MESH_MANIFEST_PATH if path is None else path
+    if not os.path.exists(path):
+        return {}
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _mesh_manifest_cache:
+        _mesh_manifest_cache.clear()
+        with open(path, "r") as f:
+            _mesh_manifest_cache[key] = json.load(f)
+    return _mesh_manifest_cache[key]
+
+
+def save_mesh_manifest(manifest, path=None):
+    """
+    Writes @manifest (see load_mesh_manifest()) to @path.
+    """
+    path = macros.MESH_MANIFEST_PATH if path is None else path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# (mesh file, size, modification time) -> hash of the contents, so that each mesh file is
+# only hashed once per process
+_mesh_hash_cache = {}
+
+
+def is_manifest_entry_valid(mesh_file, entry):
+    """
+    Returns True if the manifest @entry of @mesh_file still matches the file on disk, by
+    size, modification time and hash, and its preconverted mesh exists.
+    """
+    if entry is None or not os.path.exists(entry["msh"]):
+        return False
+    stat = os.stat(mesh_file)
+    if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+        return False
+    key = (mesh_file, stat.st_size, stat.st_mtime_ns)
+    if key not in _mesh_hash_cache:
+        _mesh_hash_cache[key] = get_file_hash(mesh_file)
+    return _mesh_hash_cache[key] == entry["sha1"]
+
+
+def apply_preconverted_meshes(root, manifest=None):
+    """
+    Points OBJ and STL mesh assets in the MJCF @root at their preconverted binary meshes,
+    where the manifest holds a valid conversion.
+
+    Args:
+        root (ET.Element): MJCF root, edited in place
+        manifest (dict): manifest of preconverted meshes, loaded from
+            macros.MESH_MANIFEST_PATH if None
+
+    Returns:
+        int: number of meshes switched to their preconverted file
+    """
+    manifest = load_mesh_manifest() if manifest is None else manifest
+    asset = root.find("asset")
+    if asset is None or len(manifest) == 0:
+        return 0
+    num_switched = 0
+    for mesh in asset.findall("mesh"):
+        mesh_file = mesh.get("file")
+        if mesh_file is None or not os.path.isabs(mesh_file):
+            continue
+        entry = manifest.get(mesh_file)
+        if os.path.exists(mesh_file) and is_manifest_entry_valid(mesh_file, entry):
+            mesh.set("file", entry["msh"])
+            num_switched += 1
+    return num_switched
@@ -1,4 +1,5 @@
 import re
+import importlib
 
 from ...utils import disable_module_import
 
@@ -6,20 +7,62 @@ with disable_module_import("libero", "libero", "envs"):
     from libero.libero.envs.base_object import OBJECTS_DICT, VISUAL_CHANGE_OBJECTS_DICT
     from libero.libero.envs.objects.target_zones import *
 
-from .articulated_objects import *
-from .libero_objects import *
-from .mimicgen_objects import *
-from .objaverse_objects import *
+from .object_manifest import OBJECT_MANIFEST
 
-try:
-    from .robocasa_objects import *
-except ImportError:
-    print("WARNING: could not import robocasa objects")
+# Object modules are imported on first use (see get_object_fn), so that optional
+# dependencies of unused modules (robocasa, mimicgen) are not needed.
+OBJECT_MODULES = ["libero_objects"] + sorted(
+    set(module_name for module_name, _ in OBJECT_MANIFEST.values())
+)
+
+
+# Object classes are exported lazily as attributes of this package (see __getattr__),
+# "from ..objects import *" does not import them.
+_CLASS_MODULES = {
+    class_name: module_name for module_name, class_name in OBJECT_MANIFEST.values()
+}
+
+
+def _import_object_module(module_name):
+    return importlib.import_module(f"{__name__}.{module_name}")
+
+
+def _import_all_object_modules():
+    for module_name in OBJECT_MODULES:
+        try:
+            _import_object_module(module_name)
+        except ImportError as e:
+            print(f"WARNING: could not import {module_name}: {e}")
+
+
+def __getattr__(name):
+    if name in _CLASS_MODULES:
+        return getattr(_import_object_module(_CLASS_MODULES[name]), name)
+    # classes of libero's object modules, which libero_objects imports
+    libero_objects = _import_object_module("libero_objects")
+    if hasattr(libero_objects, name):
+        return getattr(libero_objects, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_CLASS_MODULES))
 
 
 def get_object_fn(category_name):
-    return OBJECTS_DICT[category_name.lower()]
+    category_name = category_name.lower()
+    if category_name in OBJECT_MANIFEST:
+        # the class listed in the manifest, whichever object modules were imported before
+        module_name, class_name = OBJECT_MANIFEST[category_name]
+        module = _import_object_module(module_name)
+        if hasattr(module, class_name):
+            return getattr(module, class_name)
+    if category_name not in OBJECTS_DICT:
+        # not in the manifest, or the manifest is out of date
+        _import_all_object_modules()
+    return OBJECTS_DICT[category_name]
 
 
 def get_object_dict():
+    _import_all_object_modules()
     return OBJECTS_DICT
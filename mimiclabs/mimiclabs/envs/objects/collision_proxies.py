@@ -0,0 +1,178 @@
+"""
+Simplified convex collision proxies for mesh-based objects. Proxies are generated offline
+by scripts/generate_collision_proxies.py and stored in macros.COLLISION_PROXY_FOLDER,
+keyed by a hash of the object XML file. Objects that inherit from CollisionProxyMixin
+swap their collision meshes for the cached proxies when macros.USE_COLLISION_PROXIES is
+set, while their visual geoms keep the original meshes.
+
+MuJoCo always collides mesh geoms through their convex hull, so a proxy is the convex
+hull of each collision mesh, reduced to a small number of vertices. Objects whose
+collision geometry is split over several meshes keep one hull per mesh, i.e. a small
+convex decomposition.
+"""
+
+import os
+import hashlib
+import numpy as np
+import xml.etree.ElementTree as ET
+
+import mujoco
+from robosuite.models.base import MujocoXML
+from robosuite.utils.mjcf_utils import array_to_string
+
+import mimiclabs.mimiclabs.macros as macros
+
+
+def get_collision_proxy_path(xml_file):
+    """
+    Returns the cache file holding the collision proxies of the object in @xml_file.
+    """
+    with open(xml_file, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    name = os.path.splitext(os.path.basename(xml_file))[0]
+    return os.path.join(macros.COLLISION_PROXY_FOLDER, f"{name}_{digest}.npz")
+
+
+def is_collision_geom(geom):
+    """
+    Returns True if @geom (an ET.Element) is a collision mesh geom, following robosuite's
+    convention that collision geoms are in group 0.
+    """
+    return geom.get("mesh") is not None and geom.get("group") in {None, "0"}
+
+
+def get_hull_vertices(model, mesh_id):
+    """
+    Returns the vertices of the convex hull that MuJoCo computed for a mesh, expressed
+    in the frame of the mesh asset (i.e. with its scale applied, but without the
+    re-centering and re-alignment done by the compiler).
+    """
+    graph_adr = model.mesh_graphadr[mesh_id]
+    vert_adr = model.mesh_vertadr[mesh_id]
+    if graph_adr < 0:
+        hull_ids = np.arange(model.mesh_vertnum[mesh_id])
+    else:
+        # graph layout: numvert, numface, vert_edgeadr[numvert], vert_globalid[numvert], ...
+        num_vert = model.mesh_graph[graph_adr]
+        start = graph_adr + 2 + num_vert
+        hull_ids = model.mesh_graph[start : start + num_vert]
+    vertices = model.mesh_vert[vert_adr + hull_ids].astype(np.float64)
+    rot = np.zeros(9)
+    mujoco.mju_quat2Mat(rot, model.mesh_quat[mesh_id])
+    return vertices @ rot.reshape(3, 3).T + model.mesh_pos[mesh_id]
+
+
+def decimate_hull(vertices, max_vertices):
+    """
+    Picks at most @max_vertices of the hull @vertices by farthest point sampling, seeded
+    with the extreme points along each axis so that the proxy keeps the extents of the
+    original hull. The hull of the result lies inside the original hull.
+    """
+    if len(vertices) <= max_vertices:
+        return vertices
+    selected = list(
+        dict.fromkeys(
+            np.concatenate([vertices.argmin(axis=0), vertices.argmax(axis=0)]).tolist()
+        )
+    )
+    dist = np.min(
+        np.linalg.norm(vertices[:, None] - vertices[selected][None], axis=-1), axis=1
+    )
+    while len(selected) < max_vertices:
+        idx = int(np.argmax(dist))
+        selected.append(idx)
+        dist = np.minimum(dist, np.linalg.norm(vertices - vertices[idx], axis=1))
+    return vertices[selected]
+
+
+def compute_collision_proxies(xml_file, max_vertices=64):
+    """
+    Computes the collision proxies of the object in @xml_file.
+
+    Args:
+        xml_file (str): path to the object MJCF file
+        max_vertices (int): maximum number of vertices per proxy hull
+
+    Returns:
+        dict: collision mesh name -> (N, 3) proxy vertices in the mesh asset frame
+    """
+    xml = MujocoXML(xml_file)
+    mesh_names = []
+    for geom in xml.worldbody.iter("geom"):
+        if is_collision_geom(geom) and geom.get("mesh") not in mesh_names:
+            mesh_names.append(geom.get("mesh"))
+    if len(mesh_names) == 0:
+        return {}
+
+    # compile the collision meshes alone, MuJoCo computes their convex hulls
+    root = ET.Element("mujoco")
+    asset = ET.SubElement(root, "asset")
+    worldbody = ET.SubElement(root, "worldbody")
+    for mesh_name in mesh_names:
+        asset.append(xml.asset.find(f"./mesh[@name='{mesh_name}']"))
+        ET.SubElement(worldbody, "geom", type="mesh", mesh=mesh_name)
+    model = mujoco.MjModel.from_xml_string(ET.tostring(root, encoding="unicode"))
+
+    proxies = {}
+    for mesh_name in mesh_names:
+        mesh_id = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_MESH, mesh_name)
+        proxies[mesh_name] = decimate_hull(
+            get_hull_vertices(model, mesh_id), max_vertices
+        )
+    return proxies
+
+
+def save_collision_proxies(xml_file, proxies):
+    """
+    Stores @proxies (see compute_collision_proxies()) in the cache and returns the path.
+    """
+    path = get_collision_proxy_path(xml_file)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, **proxies)
+    return path
+
+
+def load_collision_proxies(xml_file):
+    """
+    Returns the cached collision proxies of the object in @xml_file, or None if they
+    have not been generated for the current version of the file.
+    """
+    path = get_collision_proxy_path(xml_file)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {mesh_name: data[mesh_name] for mesh_name in data.files}
+
+
+class CollisionProxyMixin:
+    """
+    Mixin for MujocoXMLObject subclasses that makes collision geoms use the cached convex
+    proxies of their meshes when macros.USE_COLLISION_PROXIES is set. Visual geoms,
+    including the copies made by duplicate_collision_geoms, keep the original meshes.
+    Objects without cached proxies are left unchanged.
+    """
+
+    def _get_object_subtree(self):
+        obj = super()._get_object_subtree()
+        if not macros.USE_COLLISION_PROXIES:
+            return obj
+        proxies = load_collision_proxies(self.file)
+        if proxies is None:
+            return obj
+
+        added_meshes = set()
+        for geom in obj.iter("geom"):
+            mesh_name = geom.get("mesh")
+            if not is_collision_geom(geom) or mesh_name not in proxies:
+                continue
+            proxy_name = f"{mesh_name}_proxy"
+            if proxy_name not in added_meshes:
+                ET.SubElement(
+                    self.asset,
+                    "mesh",
+                    name=proxy_name,
+                    vertex=array_to_string(proxies[mesh_name].reshape(-1)),
+                )
+                added_meshes.add(proxy_name)
+            geom.set("mesh", proxy_name)
+        return obj
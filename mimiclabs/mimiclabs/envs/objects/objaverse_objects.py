@@ -14,8 +14,10 @@ from libero.libero.envs.base_object import (
     register_object,
 )
 
+from .collision_proxies import CollisionProxyMixin
 
-class ObjaverseObject(MujocoXMLObject):
+
+class ObjaverseObject(CollisionProxyMixin, MujocoXMLObject):
     def __init__(self, name, obj_name, joints=[dict(type="free", damping="0.0005")]):
         super().__init__(
             os.path.join(
@@ -0,0 +1,90 @@
+"""
+Object category -> (module in envs/objects, class name), used by get_object_fn()
+to import object modules on first use.
+
+Generated by scripts/generate_object_manifest.py, do not edit by hand.
+"""
+
+OBJECT_MANIFEST = {
+    "blue_cabinet": ("articulated_objects", "BlueCabinet"),
+    "coffee_machine": ("mimicgen_objects", "CoffeeMachine"),
+    "coffee_pod": ("mimicgen_objects", "CoffeePod"),
+    "colorful_cabinet": ("articulated_objects", "ColorfulCabinet"),
+    "lava_cabinet": ("articulated_objects", "LavaCabinet"),
+    "light_wood_cabinet": ("articulated_objects", "LightWoodCabinet"),
+    "marble_cabinet": ("articulated_objects", "MarbleCabinet"),
+    "metal_cabinet": ("articulated_objects", "MetalCabinet"),
+    "microwave_2": ("articulated_objects", "Microwave2"),
+    "microwave_3": ("articulated_objects", "Microwave3"),
+    "microwave_4": ("articulated_objects", "Microwave4"),
+    "microwave_5": ("articulated_objects", "Microwave5"),
+    "microwave_6": ("articulated_objects", "Microwave6"),
+    "microwave_7": ("articulated_objects", "Microwave7"),
+    "microwave_8": ("articulated_objects", "Microwave8"),
+    "objaverse_apple": ("objaverse_objects", "ObjaverseApple"),
+    "objaverse_banana": ("objaverse_objects", "ObjaverseBanana"),
+    "objaverse_can": ("objaverse_objects", "ObjaverseCan"),
+    "objaverse_cap": ("objaverse_objects", "ObjaverseCap"),
+    "objaverse_mug": ("objaverse_objects", "ObjaverseMug"),
+    "objaverse_notebook": ("objaverse_objects", "ObjaverseNotebook"),
+    "robocasa_avocado_0": ("robocasa_objects", "RobocasaAvocado0"),
+    "robocasa_avocado_1": ("robocasa_objects", "RobocasaAvocado1"),
+    "robocasa_bagel_4": ("robocasa_objects", "RobocasaBagel4"),
+    "robocasa_bowl_0": ("robocasa_objects", "RobocasaBowl0"),
+    "robocasa_bowl_1": ("robocasa_objects", "RobocasaBowl1"),
+    "robocasa_bowl_2": ("robocasa_objects", "RobocasaBowl2"),
+    "robocasa_bowl_3": ("robocasa_objects", "RobocasaBowl3"),
+    "robocasa_bowl_4": ("robocasa_objects", "RobocasaBowl4"),
+    "robocasa_bowl_6": ("robocasa_objects", "RobocasaBowl6"),
+    "robocasa_bowl_7": ("robocasa_objects", "RobocasaBowl7"),
+    "robocasa_bowl_8": ("robocasa_objects", "RobocasaBowl8"),
+    "robocasa_broccoli_0": ("robocasa_objects", "RobocasaBroccoli0"),
+    "robocasa_can_0": ("robocasa_objects", "RobocasaCan0"),
+    "robocasa_can_2": ("robocasa_objects", "RobocasaCan2"),
+    "robocasa_can_3": ("robocasa_objects", "RobocasaCan3"),
+    "robocasa_can_4": ("robocasa_objects", "RobocasaCan4"),
+    "robocasa_can_6": ("robocasa_objects", "RobocasaCan6"),
+    "robocasa_can_8": ("robocasa_objects", "RobocasaCan8"),
+    "robocasa_can_9": ("robocasa_objects", "RobocasaCan9"),
+    "robocasa_carrot_0": ("robocasa_objects", "RobocasaCarrot0"),
+    "robocasa_carrot_1": ("robocasa_objects", "RobocasaCarrot1"),
+    "robocasa_carrot_2": ("robocasa_objects", "RobocasaCarrot2"),
+    "robocasa_carrot_3": ("robocasa_objects", "RobocasaCarrot3"),
+    "robocasa_carrot_4": ("robocasa_objects", "RobocasaCarrot4"),
+    "robocasa_carrot_6": ("robocasa_objects", "RobocasaCarrot6"),
+    "robocasa_carrot_7": ("robocasa_objects", "RobocasaCarrot7"),
+    "robocasa_corn_0": ("robocasa_objects", "RobocasaCorn0"),
+    "robocasa_cucumber_0": ("robocasa_objects", "RobocasaCucumber0"),
+    "robocasa_drawer": ("robocasa_objects", "RobocasaDrawer"),
+    "robocasa_egg_0": ("robocasa_objects", "RobocasaEgg0"),
+    "robocasa_kiwi_0": ("robocasa_objects", "RobocasaKiwi0"),
+    "robocasa_microwave": ("robocasa_objects", "RobocasaMicrowave"),
+    "robocasa_mug_1": ("robocasa_objects", "RobocasaMug1"),
+    "robocasa_mug_2": ("robocasa_objects", "RobocasaMug2"),
+    "robocasa_mug_3": ("robocasa_objects", "RobocasaMug3"),
+    "robocasa_mug_4": ("robocasa_objects", "RobocasaMug4"),
+    "robocasa_mug_5": ("robocasa_objects", "RobocasaMug5"),
+    "robocasa_mug_6": ("robocasa_objects", "RobocasaMug6"),
+    "robocasa_mug_8": ("robocasa_objects", "RobocasaMug8"),
+    "robocasa_mug_9": ("robocasa_objects", "RobocasaMug9"),
+    "robocasa_mushroom_0": ("robocasa_objects", "RobocasaMushroom0"),
+    "robocasa_mushroom_1": ("robocasa_objects", "RobocasaMushroom1"),
+    "robocasa_mushroom_2": ("robocasa_objects", "RobocasaMushroom2"),
+    "robocasa_mushroom_3": ("robocasa_objects", "RobocasaMushroom3"),
+    "robocasa_mushroom_4": ("robocasa_objects", "RobocasaMushroom4"),
+    "robocasa_mushroom_5": ("robocasa_objects", "RobocasaMushroom5"),
+    "robocasa_mushroom_6": ("robocasa_objects", "RobocasaMushroom6"),
+    "robocasa_mushroom_7": ("robocasa_objects", "RobocasaMushroom7"),
+    "robocasa_shaker_0": ("robocasa_objects", "RobocasaShaker0"),
+    "robocasa_sink": ("robocasa_objects", "RobocasaSink"),
+    "robocasa_teapot_0": ("robocasa_objects", "RobocasaTeapot0"),
+    "robocasa_teapot_3": ("robocasa_objects", "RobocasaTeapot3"),
+    "robocasa_teapot_5": ("robocasa_objects", "RobocasaTeapot5"),
+    "robocasa_teapot_6": ("robocasa_objects", "RobocasaTeapot6"),
+    "robocasa_teapot_7": ("robocasa_objects", "RobocasaTeapot7"),
+    "robocasa_toaster": ("robocasa_objects", "RobocasaToaster"),
+    "robocasa_water_bottle_0": ("robocasa_objects", "RobocasaWaterBottle0"),
+    "robocasa_water_bottle_1": ("robocasa_objects", "RobocasaWaterBottle1"),
+    "robocasa_water_bottle_2": ("robocasa_objects", "RobocasaWaterBottle2"),
+    "robocasa_water_bottle_3": ("robocasa_objects", "RobocasaWaterBottle3"),
+}
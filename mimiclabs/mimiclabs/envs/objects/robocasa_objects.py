@@ -9,6 +9,7 @@ from libero.libero.envs.base_object import (
 )
 
 from ...utils import disable_module_import
+from .collision_proxies import CollisionProxyMixin
 
 
 with disable_module_import("robocasa"):
@@ -27,7 +28,7 @@ def calculate_midpoint(pos1, pos2):
     return [(a + b) / 2 for a, b in zip(pos1, pos2)]
 
 
-class RobocasaObject(MujocoXMLObject):
+class RobocasaObject(CollisionProxyMixin, MujocoXMLObject):
     def __init__(
         self, relative_path, name, joints=[dict(type="free", damping="0.0005")]
     ):
@@ -0,0 +1,44 @@
+from copy import deepcopy
+
+from ...utils import get_robosuite_version
+
+if get_robosuite_version() == "1.4":
+    from robosuite.robots.single_arm import SingleArm as RobosuiteRobot
+else:
+    from robosuite.robots import FixedBaseRobot as RobosuiteRobot
+
+
+# attributes set by load_model() per robot configuration, see CachedRobot
+_ROBOT_TEMPLATE_CACHE = {}
+
+
+class CachedRobot(RobosuiteRobot):
+    """
+    Robot that builds its robot, mount and gripper models once per process and robot
+    configuration, and hands out copies on later loads. robosuite re-creates robots and
+    re-parses their XMLs on every model load.
+    """
+
+    def __init__(self, robot_type, idn=0, **kwargs):
+        super().__init__(robot_type=robot_type, idn=idn, **kwargs)
+        self._template_key = (
+            type(self).__name__,
+            robot_type,
+            idn,
+            repr(sorted(kwargs.items())),
+        )
+
+    def load_model(self):
+        template = _ROBOT_TEMPLATE_CACHE.get(self._template_key)
+        if template is None:
+            attributes = dict(vars(self))
+            super().load_model()
+            template = {
+                k: v
+                for k, v in vars(self).items()
+                if k not in attributes or attributes[k] is not v
+            }
+            _ROBOT_TEMPLATE_CACHE[self._template_key] = deepcopy(template)
+        else:
+            # copied together so that references between models are preserved
+            vars(self).update(deepcopy(template))
@@ -0,0 +1,214 @@
+"""
+Model compilation through MuJoCo's mjSpec API (MuJoCo >= 3.3), which keeps the parsed
+model between hard resets and only updates the elements whose attributes changed.
+
+Hard resets of a BDDL env rebuild the same scene: the bodies, geoms and assets are
+fixed by the BDDL file, and only the randomization applied at model load time (texture
+files, camera pose, lighting) differs between two builds. SpecModelBuilder compares each
+new model XML with the previous one and, if only such attributes changed, writes them
+into the spec it already holds instead of parsing the XML again. Elements are matched
+by their path of tags and names (see _get_element_paths()); any structural difference
+between the two XMLs, or any other changed attribute, falls back to parsing the full
+XML.
+
+Models compiled from a spec cannot be exported with mj_saveLastXML (which robosuite's
+MjModel.get_xml() relies on), see pin_model_xml().
+"""
+
+import numpy as np
+import xml.etree.ElementTree as ET
+
+import mujoco
+
+
+# specs can only be compiled repeatedly from MuJoCo 3.3 on (3.2 fails on mesh inertias)
+HAS_MJSPEC = hasattr(mujoco, "MjSpec") and tuple(
+    int(x) for x in mujoco.__version__.split(".")[:2]
+) >= (3, 3)
+
+# MJCF tag -> (spec element list, attributes that can be updated in place)
+SPEC_ELEMENT_UPDATES = {
+    "mesh": ("meshes", {"file"}),
+    "texture": ("textures", {"file"}),
+    "material": ("materials", {"rgba"}),
+    "body": ("bodies", {"pos", "quat"}),
+    "geom": ("geoms", {"pos", "quat", "rgba"}),
+    "site": ("sites", {"pos", "quat", "rgba", "size"}),
+    "camera": ("cameras", {"pos", "quat", "fovy"}),
+    "light": (
+        "lights",
+        {"pos", "dir", "castshadow", "directional", "diffuse", "specular", "ambient"},
+    ),
+}
+
+
+def _to_spec_value(attrib, value):
+    """
+    Converts the MJCF attribute string @value to the value stored in an mjSpec element.
+    """
+    if attrib == "file":
+        return value
+    if value in ["true", "false"]:
+        return value == "true"
+    values = np.array(value.split(), dtype=np.float64)
+    return values[0] if attrib == "fovy" else values
+
+
+def _get_element_paths(root):
+    """
+    Returns the elements of the MJCF @root in document order, and their paths from the
+    root. Each step of a path is (tag, name) for named elements and (tag, index among
+    the unnamed siblings with that tag) otherwise, so that inserting or removing an
+    element only changes the paths of its unnamed siblings.
+    """
+    elems, paths = [], []
+
+    def _visit(elem, path):
+        num_unnamed = {}
+        for child in elem:
+            name = child.get("name")
+            if name is None:
+                step = (child.tag, num_unnamed.get(child.tag, 0))
+                num_unnamed[child.tag] = step[1] + 1
+            else:
+                step = (child.tag, name)
+            elems.append(child)
+            paths.append(path + (step,))
+            _visit(child, path + (step,))
+
+    _visit(root, ())
+    return elems, paths
+
+
+def pin_model_xml(sim, xml, body_names=()):
+    """
+    Makes sim.model.get_xml() return @xml. robosuite exports models with
+    mj_saveLastXML, which saves the last XML parsed by MuJoCo in the process rather than
+    the model at hand, so models compiled from a spec or on another thread would export
+    the wrong XML.
+
+    Resets place fixtures (and welded objects) by writing sim.model.body_pos /
+    body_quat after compilation, so the bodies in @body_names are exported with their
+    current pose in the model instead of the one in @xml.
+    """
+    body_names = set(body_names)
+    if len(body_names) == 0:
+        sim.model.get_xml = lambda: xml
+        return
+
+    # parsed on first export, most models are never exported
+    tree = {}
+
+    def get_xml():
+        if "root" not in tree:
+            tree["root"] = ET.fromstring(xml)
+            tree["bodies"] = [
+                body
+                for body in tree["root"].iter("body")
+                if body.get("name") in body_names
+            ]
+        for body in tree["bodies"]:
+            body_id = sim.model.body_name2id(body.get("name"))
+            body.set("pos", " ".join(str(x) for x in sim.model.body_pos[body_id]))
+            body.set("quat", " ".join(str(x) for x in sim.model.body_quat[body_id]))
+            # the quaternion replaces any other orientation of the body
+            for key in ["axisangle", "euler", "xyaxes", "zaxis"]:
+                body.attrib.pop(key, None)
+        return ET.tostring(tree["root"], encoding="unicode")
+
+    sim.model.get_xml = get_xml
+
+
+class SpecModelBuilder:
+    """
+    Compiles model XMLs into MjModels, reusing the mjSpec of the previous XML when the
+    two have the same elements and only differ in attributes listed in
+    SPEC_ELEMENT_UPDATES.
+    """
+
+    def __init__(self):
+        assert HAS_MJSPEC, "mjSpec model assembly requires mujoco>=3.3"
+        self._spec = None
+        self._elems = None
+        self._paths = None
+        self.num_full_parses = 0
+        self.num_updates = 0
+
+    def compile(self, xml):
+        """
+        Compiles @xml and returns the mujoco.MjModel.
+        """
+        root = ET.fromstring(xml)
+        elems, paths = _get_element_paths(root)
+        if self._spec is None or not self._update_spec(elems, paths):
+            self._spec = mujoco.MjSpec.from_string(xml)
+            self.num_full_parses += 1
+        else:
+            self.num_updates += 1
+        self._elems, self._paths = elems, paths
+        try:
+            return self._spec.compile()
+        except Exception:
+            # the spec may be half-updated, parse from scratch next time
+            self._spec = None
+            raise
+
+    def _find_spec_element(self, path):
+        """
+        Returns the spec element at @path (see _get_element_paths()), or None if it cannot
+        be found. Named elements are looked up by name, unnamed ones by their index among
+        the unnamed elements of the same type in their parent body (or in the assets).
+        """
+        tag, key = path[-1]
+        if isinstance(key, str):
+            return getattr(self._spec, tag)(key)
+        if path[0][0] == "asset" and len(path) == 2:
+            parent = self._spec
+        elif path[0][0] == "worldbody" and len(path) == 2:
+            parent = self._spec.worldbody
+        elif path[0][0] == "worldbody" and path[-2][0] == "body":
+            if not isinstance(path[-2][1], str):
+                return None
+            parent = self._spec.body(path[-2][1])
+        else:
+            return None
+        if parent is None:
+            return None
+        unnamed = [
+            e for e in getattr(parent, SPEC_ELEMENT_UPDATES[tag][0]) if e.name == ""
+        ]
+        return unnamed[key] if key < len(unnamed) else None
+
+    def _update_spec(self, elems, paths):
+        """
+        Writes the attributes of the new model XML (@elems at @paths, see
+        _get_element_paths()) that differ from the previously compiled XML into the spec.
+        Returns False, leaving the spec untouched, on any structural difference, or on a
+        change that cannot be written into the spec.
+        """
+        if paths != self._paths:
+            return False
+
+        updates = []
+        for path, old, new in zip(paths, self._elems, elems):
+            if old.text != new.text or old.attrib.keys() != new.attrib.keys():
+                return False
+            if old.attrib == new.attrib:
+                continue
+            tag = new.tag
+            changed = {k for k in new.attrib if new.attrib[k] != old.attrib[k]}
+            if (
+                path[0][0] not in ["asset", "worldbody"]
+                or tag not in SPEC_ELEMENT_UPDATES
+                or not changed.issubset(SPEC_ELEMENT_UPDATES[tag][1])
+            ):
+                return False
+            spec_elem = self._find_spec_element(path)
+            if spec_elem is None:
+                return False
+            updates.append((spec_elem, new, changed))
+
+        for spec_elem, elem, changed in updates:
+            for attrib in changed:
+                setattr(spec_elem, attrib, _to_spec_value(attrib, elem.get(attrib)))
+        return True
@@ -0,0 +1,308 @@
+"""
+Batched stepping of many episodes of the same BDDL task in threads of one process, with
+all episodes sharing a single compiled MjModel.
+
+Each episode is a full BDDL env (robot, controller, predicates) with its own MjData, but
+the model, and with it the meshes and textures of the scene, exists once. MuJoCo
+releases the GIL while stepping, so the physics of the episodes runs in parallel.
+Offscreen rendering is serialized by robosuite (see MjSim.render), and each thread
+renders all of its episodes through one GL context, so the model is uploaded to the GPU
+once per thread instead of once per episode.
+
+Compared with SubprocVectorEnv (envs/vector_env.py), this needs far less memory per
+episode for scenes with large meshes, but all episodes run the same task with the same
+model-level randomization (textures, lighting, camera pose and fixture placements).
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+import robosuite
+from robosuite.utils.binding_utils import MjRenderContextOffscreen, MjSim
+
+
+class SharedRenderContext:
+    """
+    Offscreen render context of @sim that renders through @base_context, the render
+    context of another sim with the same MjModel. Only one of them can render at a time,
+    which robosuite ensures with a global render lock.
+    """
+
+    def __init__(self, base_context, sim):
+        self.base_context = base_context
+        self.sim = sim
+        self.model = sim.model
+        self.data = sim.data
+
+    def __getattr__(self, name):
+        # camera, scene, options and GL context are those of the base context
+        return getattr(self.base_context, name)
+
+    def render(self, width, height, camera_id=None, segmentation=False):
+        self.base_context.gl_ctx.make_current()
+        # the base context renders the state of its own sim again afterwards
+        base_data = self.base_context.data
+        self.base_context.data = self.data
+        try:
+            self.base_context.render(
+                width, height, camera_id=camera_id, segmentation=segmentation
+            )
+        finally:
+            self.base_context.data = base_data
+
+    def read_pixels(self, width, height, depth=False, segmentation=False):
+        return self.base_context.read_pixels(
+            width, height, depth=depth, segmentation=segmentation
+        )
+
+
+class _PinnedThread:
+    """
+    Worker thread that runs the functions submitted to it in order, so that the envs it
+    owns are only ever used (and render) from this thread.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+class ThreadedBatchEnv:
+    """
+    Runs @num_envs episodes of the BDDL env @env_name on @num_threads threads, sharing
+    the MjModel compiled by the first env. Envs are soft-reset (hard_reset=False), and
+    fixture placements are sampled once by the first env (see
+    BDDLBaseDomain.freeze_model), since the model must not change while it is shared.
+
+    The interface follows SubprocVectorEnv: observations are returned as a dictionary
+    from observation key to an array of shape (num_envs, *obs_shape), and with
+    @auto_reset an env whose episode ends is reset right away, the last observation of
+    the finished episode being in info["final_observation"].
+
+    Example usage:
+        env = ThreadedBatchEnv(
+            "MimicLabs_Lab1_Tabletop_Manipulation",
+            num_envs=16,
+            bddl_file_name=bddl_file,
+            robots="Panda",
+        )
+        obs = env.reset()
+        for _ in range(horizon):
+            obs, rewards, dones, infos = env.step(policy(obs))
+        env.close()
+
+    Args:
+        env_name (str): name of the registered BDDL env
+
+        num_envs (int): number of episodes stepped in parallel
+
+        num_threads (int or None): number of threads, defaults to the number of CPUs
+
+        auto_reset (bool): whether envs are reset as soon as their episode ends
+
+        **env_kwargs: keyword arguments passed to robosuite.make for every env
+    """
+
+    def __init__(
+        self, env_name, num_envs, num_threads=None, auto_reset=True, **env_kwargs
+    ):
+        if env_kwargs.get("hard_reset", False):
+            raise ValueError("ThreadedBatchEnv envs share a model and cannot hard reset.")
+        env_kwargs["hard_reset"] = False
+        if num_threads is None:
+            num_threads = os.cpu_count() or 1
+        num_threads = max(min(num_threads, num_envs), 1)
+
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        self.closed = False
+        self._threads = [_PinnedThread() for _ in range(num_threads)]
+        self._env_threads = [self._threads[i % num_threads] for i in range(num_envs)]
+        self.envs = []
+        self._template_sims = []
+
+        try:
+            # the first env compiles the model that all others share
+            owner = self._threads[0].submit(self._make_env, env_name, env_kwargs).result()
+            owner.freeze_model()
+            xml = owner.sim.model.get_xml()
+            self._template_sims = [
+                thread.submit(self._make_template_sim, owner, xml).result()
+                for thread in self._threads[1:]
+            ]
+            template_sims = [owner.sim] + self._template_sims
+            futures = [
+                self._env_threads[i].submit(
+                    self._make_env,
+                    env_name,
+                    dict(env_kwargs, shared_sim=template_sims[i % num_threads]),
+                )
+                for i in range(1, num_envs)
+            ]
+            self.envs = [owner] + [future.result() for future in futures]
+        except Exception:
+            self.close()
+            raise
+
+        self._obs = [None] * num_envs
+
+    @staticmethod
+    def _make_env(env_name, env_kwargs):
+        # registers the BDDL problem classes with robosuite
+        import mimiclabs.mimiclabs.envs.bddl_base_domain
+
+        return robosuite.make(env_name, **env_kwargs)
+
+    @staticmethod
+    def _make_template_sim(owner, xml):
+        """
+        Returns a sim on the owner's model, with a render context created on the calling
+        thread if the owner renders offscreen.
+        """
+        from .spec_assembly import pin_model_xml
+
+        sim = MjSim(owner.sim.model._model)
+        pin_model_xml(sim, xml)
+        if owner.sim._render_context_offscreen is not None:
+            MjRenderContextOffscreen(sim, device_id=owner.render_gpu_device_id)
+        return sim
+
+    @staticmethod
+    def _free_template_sim(sim):
+        sim.free()
+
+    def _get_indices(self, indices):
+        return list(range(self.num_envs)) if indices is None else list(indices)
+
+    def _run(self, fn, indices, args_list):
+        """
+        Runs fn(index, *args) on the thread of each env in @indices and returns the
+        results in order.
+        """
+        assert not self.closed, "ThreadedBatchEnv is closed"
+        futures = [
+            self._env_threads[i].submit(fn, i, *args)
+            for i, args in zip(indices, args_list)
+        ]
+        return [future.result() for future in futures]
+
+    def _batch_obs(self, indices):
+        return {
+            k: np.stack([self._obs[i][k] for i in indices])
+            for k in self._obs[indices[0]]
+        }
+
+    def _step_env(self, i, action):
+        env = self.envs[i]
+        obs, reward, done, info = env.step(action)
+        # BDDL envs report success as done, robosuite flags the end of the horizon
+        terminal = bool(done) or bool(env.done)
+        if terminal and self.auto_reset:
+            info = dict(info)
+            info["final_observation"] = obs
+            obs = env.reset()
+        self._obs[i] = obs
+        return reward, terminal, info
+
+    def _reset_env(self, i, state=None):
+        env = self.envs[i]
+        self._obs[i] = env.reset() if state is None else env.reset_to(state)
+
+    def step(self, actions, indices=None):
+        """
+        Steps the envs at @indices (all envs by default) with @actions, one action per
+        env.
+
+        Returns:
+            4-tuple:
+
+                - (dict) batched observations
+                - (np.array) rewards
+                - (np.array) whether each episode ended
+                - (list) info dictionaries
+        """
+        indices = self._get_indices(indices)
+        assert len(actions) == len(indices)
+        results = self._run(self._step_env, indices, [(a,) for a in actions])
+        rewards = np.array([r[0] for r in results], dtype=np.float64)
+        dones = np.array([r[1] for r in results], dtype=bool)
+        infos = [r[2] for r in results]
+        return self._batch_obs(indices), rewards, dones, infos
+
+    def reset(self, indices=None):
+        """
+        Resets the envs at @indices (all envs by default) and returns their batched
+        observations.
+        """
+        indices = self._get_indices(indices)
+        self._run(self._reset_env, indices, [()] * len(indices))
+        return self._batch_obs(indices)
+
+    def reset_to(self, states, indices=None):
+        """
+        Resets the envs at @indices (all envs by default) to @states, one state
+        dictionary per env, and returns their batched observations. States cannot
+        contain a "model", since all envs share the same one.
+        """
+        indices = self._get_indices(indices)
+        assert len(states) == len(indices)
+        if any("model" in state for state in states):
+            raise ValueError("ThreadedBatchEnv envs share a model, cannot reset to one.")
+        self._run(self._reset_env, indices, [(state,) for state in states])
+        return self._batch_obs(indices)
+
+    def call(self, name, *args, indices=None, **kwargs):
+        """
+        Calls method @name of the envs at @indices on their threads and returns the list
+        of results.
+        """
+        indices = self._get_indices(indices)
+        return self._run(
+            lambda i: getattr(self.envs[i], name)(*args, **kwargs),
+            indices,
+            [()] * len(indices),
+        )
+
+    def close(self):
+        """
+        Closes the envs and stops the threads.
+        """
+        if self.closed:
+            return
+        for i, env in enumerate(self.envs):
+            self._env_threads[i].submit(env.close).result()
+        self.envs = []
+        # GL contexts are freed on the thread that created them
+        for thread, sim in zip(self._threads[1:], self._template_sims):
+            thread.submit(self._free_template_sim, sim).result()
+        self._template_sims = []
+        for thread in self._threads:
+            thread.shutdown()
+        self.closed = True
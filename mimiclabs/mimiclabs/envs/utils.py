@@ -1,3 +1,4 @@
+import mujoco
 import numpy as np
 from transforms3d import euler
 
@@ -21,3 +22,166 @@ def convert_spherical_to_pos_quat(r_theta_phi):
     euler_zxy = (np.pi / 2 + phi, theta, 0)
     quat_wxyz = euler.euler2quat(*euler_zxy, axes="rzxy")
     return pos, quat_wxyz
+
+
+def batch_quat2mat(quat_wxyz):
+    """
+    Batched version of robosuite's transform_utils.quat2mat, taking (w, x, y, z)
+    quaternions as stored by MuJoCo.
+
+    Args:
+        quat_wxyz (np.array): (N, 4) quaternions
+
+    Returns:
+        np.array: (N, 3, 3) float32 rotation matrices
+    """
+    q = np.asarray(quat_wxyz, dtype=np.float32)
+    n = np.einsum("ij,ij->i", q, q)
+    valid = n >= np.finfo(float).eps * 4.0
+    q = q * np.sqrt(2.0 / np.where(valid, n, 1.0))[:, None]
+    q2 = q[:, :, None] * q[:, None, :]
+    rmat = np.empty((q.shape[0], 3, 3), dtype=np.float32)
+    rmat[:, 0, 0] = 1.0 - q2[:, 2, 2] - q2[:, 3, 3]
+    rmat[:, 0, 1] = q2[:, 1, 2] - q2[:, 3, 0]
+    rmat[:, 0, 2] = q2[:, 1, 3] + q2[:, 2, 0]
+    rmat[:, 1, 0] = q2[:, 1, 2] + q2[:, 3, 0]
+    rmat[:, 1, 1] = 1.0 - q2[:, 1, 1] - q2[:, 3, 3]
+    rmat[:, 1, 2] = q2[:, 2, 3] - q2[:, 1, 0]
+    rmat[:, 2, 0] = q2[:, 1, 3] - q2[:, 2, 0]
+    rmat[:, 2, 1] = q2[:, 2, 3] + q2[:, 1, 0]
+    rmat[:, 2, 2] = 1.0 - q2[:, 1, 1] - q2[:, 2, 2]
+    rmat[~valid] = np.eye(3, dtype=np.float32)
+    return rmat
+
+
+def batch_mat2quat(rmat):
+    """
+    Batched version of robosuite's transform_utils.mat2quat, using the same
+    eigenvector formulation and sign convention (w >= 0).
+
+    Args:
+        rmat (np.array): (N, 3, 3) rotation matrices
+
+    Returns:
+        np.array: (N, 4) (x, y, z, w) quaternions
+    """
+    M = np.asarray(rmat, dtype=np.float32)[:, :3, :3]
+    K = np.zeros((M.shape[0], 4, 4), dtype=np.float32)
+    K[:, 0, 0] = M[:, 0, 0] - M[:, 1, 1] - M[:, 2, 2]
+    K[:, 1, 0] = M[:, 0, 1] + M[:, 1, 0]
+    K[:, 1, 1] = M[:, 1, 1] - M[:, 0, 0] - M[:, 2, 2]
+    K[:, 2, 0] = M[:, 0, 2] + M[:, 2, 0]
+    K[:, 2, 1] = M[:, 1, 2] + M[:, 2, 1]
+    K[:, 2, 2] = M[:, 2, 2] - M[:, 0, 0] - M[:, 1, 1]
+    K[:, 3, 0] = M[:, 2, 1] - M[:, 1, 2]
+    K[:, 3, 1] = M[:, 0, 2] - M[:, 2, 0]
+    K[:, 3, 2] = M[:, 1, 0] - M[:, 0, 1]
+    K[:, 3, 3] = M[:, 0, 0] + M[:, 1, 1] + M[:, 2, 2]
+    K /= 3.0
+    # quaternion is the eigenvector of K that corresponds to the largest eigenvalue
+    w, V = np.linalg.eigh(K)
+    q = V[np.arange(M.shape[0]), :, np.argmax(w, axis=-1)][:, [3, 0, 1, 2]]
+    q[q[:, 0] < 0.0] *= -1.0
+    return q[:, [1, 2, 3, 0]]
+
+
+def get_geom_world_aabbs(model, data):
+    """
+    Returns the world-frame axis-aligned bounding boxes of all geoms, as (ngeom, 3) arrays
+    of lower and upper corners. Assumes geom poses in @data are up to date.
+    """
+    xmat = data.geom_xmat.reshape(-1, 3, 3)
+    center = data.geom_xpos + np.einsum("nij,nj->ni", xmat, model.geom_aabb[:, :3])
+    half = np.einsum("nij,nj->ni", np.abs(xmat), model.geom_aabb[:, 3:])
+    return center - half, center + half
+
+
+def filter_static_contacts(
+    model, data, geom_contype, geom_conaffinity, anchor_geom_ids=(), margin=1.0
+):
+    """
+    Disables collisions for static geoms (on bodies welded to the world) that lie
+    outside the workspace, so that their bodies drop out of the broad phase. Pairs of
+    static geoms are already skipped by MuJoCo since they share a weld group, so the
+    cost of static scenery is in broad-phase bookkeeping for bodies that nothing can
+    reach. The workspace is the bounding box of all movable colliding geoms and of
+    @anchor_geom_ids (e.g. the table), grown by @margin. Planes are always kept.
+
+    Args:
+        model (mujoco.MjModel): model to update in place
+        data (mujoco.MjData): data with up-to-date geom poses
+        geom_contype (np.array): unfiltered geom contype bitmasks to start from
+        geom_conaffinity (np.array): unfiltered geom conaffinity bitmasks to start from
+        anchor_geom_ids (list): extra geoms that the workspace must contain
+        margin (float): distance by which to grow the workspace box, which should cover
+            the reach of the robot
+
+    Returns:
+        int: number of geoms whose collisions were disabled
+    """
+    geom_contype = np.asarray(geom_contype)
+    geom_conaffinity = np.asarray(geom_conaffinity)
+    static = model.body_weldid[model.geom_bodyid] == 0
+    colliding = (geom_contype != 0) | (geom_conaffinity != 0)
+
+    lower, upper = get_geom_world_aabbs(model, data)
+    anchors = ~static & colliding
+    anchors[list(anchor_geom_ids)] = True
+    ws_lower = lower[anchors].min(axis=0) - margin
+    ws_upper = upper[anchors].max(axis=0) + margin
+    outside = np.any(upper < ws_lower, axis=1) | np.any(lower > ws_upper, axis=1)
+    is_plane = model.geom_type == mujoco.mjtGeom.mjGEOM_PLANE
+    culled = static & colliding & outside & ~is_plane
+
+    contype = np.where(culled, 0, geom_contype)
+    conaffinity = np.where(culled, 0, geom_conaffinity)
+    model.geom_contype[:] = contype
+    model.geom_conaffinity[:] = conaffinity
+
+    # body bitmasks are the union of their geoms' bitmasks, as computed by the compiler
+    body_contype = np.zeros(model.nbody, dtype=model.body_contype.dtype)
+    body_conaffinity = np.zeros(model.nbody, dtype=model.body_conaffinity.dtype)
+    np.bitwise_or.at(body_contype, model.geom_bodyid, contype)
+    np.bitwise_or.at(body_conaffinity, model.geom_bodyid, conaffinity)
+    model.body_contype[:] = body_contype
+    model.body_conaffinity[:] = body_conaffinity
+    return int(culled.sum())
+
+
+def deduplicate_assets(root):
+    """
+    Merges identical mesh, texture and material assets in the MJCF @root, which objects
+    sharing meshes or textures each bring under their own prefixed name. Assets are
+    identical if all their attributes but the name match (e.g. the same file and scale).
+    References are rewritten to the first asset of each group and the others are removed.
+    Textures are merged before materials, so that materials that only differed by the
+    name of their texture are merged as well.
+
+    Args:
+        root (ET.Element): MJCF root, edited in place
+
+    Returns:
+        int: number of removed assets
+    """
+    asset = root.find("asset")
+    if asset is None:
+        return 0
+    num_removed = 0
+    for tag in ["mesh", "texture", "material"]:
+        kept, renamed = {}, {}
+        for elem in asset.findall(tag):
+            if elem.get("name") is None:
+                continue
+            key = tuple(sorted((k, v) for k, v in elem.attrib.items() if k != "name"))
+            if key in kept:
+                renamed[elem.get("name")] = kept[key]
+                asset.remove(elem)
+                num_removed += 1
+            else:
+                kept[key] = elem.get("name")
+        if len(renamed) == 0:
+            continue
+        for elem in root.iter():
+            if elem.get(tag) in renamed:
+                elem.set(tag, renamed[elem.get(tag)])
+    return num_removed
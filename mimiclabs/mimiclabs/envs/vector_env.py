@@ -0,0 +1,413 @@
+"""
+Vectorized env that runs several BDDL envs (possibly of different tasks) in worker
+processes, for policy evaluation and online training that should use all the cores of
+a node.
+
+Observations are written by the workers into preallocated shared-memory arrays (one
+array of shape (num_envs, *obs_shape) per observation key), so images are never pickled
+through a pipe. Only actions, rewards, dones, infos and states go through pipes.
+"""
+
+import traceback
+import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+def _make_env(env_config):
+    import robosuite
+
+    # registers the BDDL problem classes with robosuite
+    from mimiclabs.mimiclabs.envs.bddl_base_domain import TASK_MAPPING
+    import mimiclabs.mimiclabs.envs.bddl_utils as BDDLUtils
+
+    env_kwargs = env_config.get("env_kwargs", {})
+    env_name = env_config.get("env_name")
+    if env_name is None:
+        # the env of the problem defined in the BDDL file
+        problem_name = BDDLUtils.robosuite_parse_problem(
+            env_kwargs["bddl_file_name"]
+        )["problem_name"]
+        env_name = TASK_MAPPING[problem_name].__name__
+    return robosuite.make(env_name, **env_kwargs)
+
+
+def _get_obs_spec(obs):
+    return {
+        k: (np.asarray(v).shape, np.asarray(v).dtype.str)
+        for k, v in obs.items()
+        if isinstance(v, (np.ndarray, np.number, float, int, bool))
+    }
+
+
+def attach_buffers(buffer_specs, untrack=False):
+    """
+    Attaches to the shared-memory buffers in @buffer_specs, a dictionary from observation
+    key to (shared memory name, shape, dtype), and returns the list of SharedMemory
+    objects and the dictionary of arrays. The creator of the buffers unlinks them.
+
+    Processes started by the creator share its resource tracker. Other processes must
+    pass @untrack, or their resource tracker unlinks the buffers when they exit.
+    """
+    shms, buffers = [], {}
+    for k, (name, shape, dtype) in buffer_specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        shms.append(shm)
+        buffers[k] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return shms, buffers
+
+
+def _worker(pipe, env_config):
+    """
+    Runs in the worker process: creates the env and serves commands from @pipe until
+    "close" is received. Errors raised by a command are sent back, and the worker exits
+    only if creating the env fails. Observations are written into the buffers given by the last
+    "attach" command, at the index given with them.
+    """
+    env = None
+    buffers = {}
+    shms = []
+    index = None
+    auto_reset = True
+
+    def _write_obs(obs):
+        for k, buf in buffers.items():
+            buf[index] = obs[k]
+
+    def _detach():
+        # drop the views before closing the shared memory
+        buffers.clear()
+        for shm in shms:
+            shm.close()
+        shms.clear()
+
+    def _is_terminal(done):
+        # BDDL envs report success as done, robosuite flags the end of the horizon
+        return bool(done) or bool(getattr(env, "done", False))
+
+    try:
+        env = _make_env(env_config)
+        obs = env.reset()
+        pipe.send(("ok", _get_obs_spec(obs)))
+
+        while True:
+            cmd, data = pipe.recv()
+            try:
+                if cmd == "attach":
+                    _detach()
+                    index, buffer_specs, auto_reset = data
+                    new_shms, new_buffers = attach_buffers(buffer_specs)
+                    shms.extend(new_shms)
+                    buffers.update(new_buffers)
+                    _write_obs(obs)
+                    result = None
+                elif cmd == "detach":
+                    _detach()
+                    result = None
+                elif cmd == "step":
+                    obs, reward, done, info = env.step(data)
+                    terminal = _is_terminal(done)
+                    if terminal and auto_reset:
+                        info = dict(info)
+                        info["final_observation"] = obs
+                        obs = env.reset()
+                    _write_obs(obs)
+                    result = (reward, terminal, info)
+                elif cmd == "reset":
+                    obs = env.reset()
+                    _write_obs(obs)
+                    result = None
+                elif cmd == "reset_to":
+                    obs = env.reset_to(data)
+                    _write_obs(obs)
+                    result = None
+                elif cmd == "call":
+                    name, args, kwargs = data
+                    result = getattr(env, name)(*args, **kwargs)
+                elif cmd == "get_attr":
+                    result = getattr(env, data)
+                elif cmd == "close":
+                    break
+                else:
+                    raise ValueError(f"Unknown command {cmd}")
+            except Exception:
+                # the env keeps serving, the caller decides what to do with it
+                pipe.send(("error", traceback.format_exc()))
+                continue
+            pipe.send(("ok", result))
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        pipe.send(("error", traceback.format_exc()))
+    finally:
+        _detach()
+        if env is not None:
+            env.close()
+        pipe.close()
+
+
+class SubprocVectorEnv:
+    """
+    Runs one env per worker process and steps them in parallel.
+
+    Observations are returned as a dictionary from observation key to an array of shape
+    (num_envs, *obs_shape) (or (len(indices), *obs_shape) for calls on a subset of envs).
+    Only keys that every env provides with the same shape and dtype are batched, or
+    @obs_keys if given.
+
+    With @auto_reset, an env whose episode ends (task success, or the end of the horizon
+    unless ignore_done is set) is reset right away: the returned observation is the first
+    one of the next episode, and the last observation of the finished episode is in
+    info["final_observation"].
+
+    Example usage:
+        env_configs = [
+            dict(
+                env_name="MimicLabs_Lab1_Tabletop_Manipulation",
+                env_kwargs=dict(bddl_file_name=bddl_file, robots="Panda", ...),
+            )
+            for bddl_file in bddl_files
+        ]
+        env = SubprocVectorEnv(env_configs)
+        obs = env.reset()
+        for _ in range(horizon):
+            obs, rewards, dones, infos = env.step(policy(obs))
+        env.close()
+
+    Args:
+        env_configs (list): one dictionary per env with the registered "env_name" and
+            the "env_kwargs" passed to robosuite.make. Without "env_name", the env of
+            the problem in env_kwargs["bddl_file_name"] is made
+
+        obs_keys (list or None): observation keys to batch, defaults to all keys that
+            the envs have in common
+
+        auto_reset (bool): whether envs are reset as soon as their episode ends
+
+        copy_obs (bool): whether returned observations are copies, or views into the
+            shared buffers that are overwritten by the next step / reset
+
+        context (str): multiprocessing start method. "spawn" (default) and
+            "forkserver" are safe with GL contexts, "fork" starts faster
+    """
+
+    def __init__(
+        self,
+        env_configs,
+        obs_keys=None,
+        auto_reset=True,
+        copy_obs=True,
+        context="spawn",
+    ):
+        self.num_envs = len(env_configs)
+        self.auto_reset = auto_reset
+        self.copy_obs = copy_obs
+        self.closed = False
+        self._waiting = None
+        self._shms = []
+        self.buffers = {}
+
+        ctx = mp.get_context(context)
+        self._pipes, self._processes = [], []
+        for i, env_config in enumerate(env_configs):
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(child_pipe, env_config),
+                daemon=True,
+            )
+            process.start()
+            child_pipe.close()
+            self._pipes.append(parent_pipe)
+            self._processes.append(process)
+
+        try:
+            obs_specs = self._receive(range(self.num_envs))
+            self.obs_spec = self._get_batched_obs_spec(obs_specs, obs_keys)
+            self._allocate_buffers()
+        except Exception:
+            self.close()
+            raise
+
+    def _get_batched_obs_spec(self, obs_specs, obs_keys):
+        """
+        Returns the observation keys to batch mapped to (shape, dtype), given the
+        observation specs of all envs.
+        """
+        if obs_keys is None:
+            obs_keys = [
+                k
+                for k in obs_specs[0]
+                if all(spec.get(k) == obs_specs[0][k] for spec in obs_specs)
+            ]
+            dropped = set().union(*obs_specs) - set(obs_keys)
+            if len(dropped) > 0:
+                print(
+                    "WARNING: SubprocVectorEnv drops observations that differ between "
+                    f"envs: {sorted(dropped)}"
+                )
+        for i, spec in enumerate(obs_specs):
+            for k in obs_keys:
+                if spec.get(k) != obs_specs[0].get(k):
+                    raise ValueError(
+                        f"Observation {k} differs between env 0 ({obs_specs[0].get(k)}) "
+                        f"and env {i} ({spec.get(k)})"
+                    )
+        return {k: obs_specs[0][k] for k in obs_keys}
+
+    def _allocate_buffers(self):
+        buffer_specs = {}
+        for k, (shape, dtype) in self.obs_spec.items():
+            shape = (self.num_envs,) + tuple(shape)
+            nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._shms.append(shm)
+            self.buffers[k] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            buffer_specs[k] = (shm.name, shape, dtype)
+        self._send(
+            "attach",
+            [(i, buffer_specs, self.auto_reset) for i in range(self.num_envs)],
+            range(self.num_envs),
+        )
+        self._receive(range(self.num_envs))
+
+    def _get_indices(self, indices):
+        return list(range(self.num_envs)) if indices is None else list(indices)
+
+    def _send(self, cmd, data, indices):
+        assert not self.closed, "SubprocVectorEnv is closed"
+        for i, d in zip(indices, data):
+            self._pipes[i].send((cmd, d))
+
+    def _receive(self, indices):
+        results, errors = [], []
+        for i in indices:
+            status, result = self._pipes[i].recv()
+            if status == "error":
+                errors.append(f"env {i}:\n{result}")
+            results.append(result)
+        if len(errors) > 0:
+            raise RuntimeError("Error in SubprocVectorEnv worker\n" + "\n".join(errors))
+        return results
+
+    def _get_obs(self, indices):
+        if indices == list(range(self.num_envs)):
+            obs = self.buffers
+        else:
+            obs = {k: buf[indices] for k, buf in self.buffers.items()}
+        if self.copy_obs:
+            obs = {k: np.array(v) for k, v in obs.items()}
+        return obs
+
+    def step_async(self, actions, indices=None):
+        """
+        Starts stepping the envs at @indices (all envs by default) with @actions, one
+        action per env. Call step_wait() for the results.
+        """
+        assert self._waiting is None, "step_async() called twice without step_wait()"
+        indices = self._get_indices(indices)
+        assert len(actions) == len(indices)
+        self._send("step", actions, indices)
+        self._waiting = indices
+
+    def step_wait(self):
+        """
+        Waits for the envs stepped by step_async().
+
+        Returns:
+            4-tuple:
+
+                - (dict) batched observations
+                - (np.array) rewards
+                - (np.array) whether each episode ended
+                - (list) info dictionaries
+        """
+        assert self._waiting is not None, "step_wait() called without step_async()"
+        indices, self._waiting = self._waiting, None
+        results = self._receive(indices)
+        rewards = np.array([r[0] for r in results], dtype=np.float64)
+        dones = np.array([r[1] for r in results], dtype=bool)
+        infos = [r[2] for r in results]
+        return self._get_obs(indices), rewards, dones, infos
+
+    def step(self, actions, indices=None):
+        """
+        Steps the envs at @indices (all envs by default) with @actions, one action per
+        env. See step_wait() for the return values.
+        """
+        self.step_async(actions, indices=indices)
+        return self.step_wait()
+
+    def reset(self, indices=None):
+        """
+        Resets the envs at @indices (all envs by default) and returns their batched
+        observations.
+        """
+        indices = self._get_indices(indices)
+        self._send("reset", [None] * len(indices), indices)
+        self._receive(indices)
+        return self._get_obs(indices)
+
+    def reset_to(self, states, indices=None):
+        """
+        Resets the envs at @indices (all envs by default) to @states, one state
+        dictionary (see BDDLBaseDomain.reset_to) per env, and returns their batched
+        observations.
+        """
+        indices = self._get_indices(indices)
+        assert len(states) == len(indices)
+        self._send("reset_to", states, indices)
+        self._receive(indices)
+        return self._get_obs(indices)
+
+    def call(self, name, *args, indices=None, **kwargs):
+        """
+        Calls method @name of the envs at @indices and returns the list of results.
+        """
+        indices = self._get_indices(indices)
+        self._send("call", [(name, args, kwargs)] * len(indices), indices)
+        return self._receive(indices)
+
+    def get_attr(self, name, indices=None):
+        """
+        Returns the list of values of attribute @name of the envs at @indices.
+        """
+        indices = self._get_indices(indices)
+        self._send("get_attr", [name] * len(indices), indices)
+        return self._receive(indices)
+
+    def close(self):
+        """
+        Stops the worker processes and frees the shared observation buffers.
+        """
+        if self.closed:
+            return
+        if self._waiting is not None:
+            try:
+                self._receive(self._waiting)
+            except Exception:
+                pass
+        for pipe, process in zip(self._pipes, self._processes):
+            try:
+                if process.is_alive():
+                    pipe.send(("close", None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for pipe, process in zip(self._pipes, self._processes):
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+            pipe.close()
+        self.buffers = {}
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
+        self.closed = True
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
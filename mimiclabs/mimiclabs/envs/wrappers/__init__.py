@@ -0,0 +1 @@
+from .double_buffered_reset import DoubleBufferedResetWrapper
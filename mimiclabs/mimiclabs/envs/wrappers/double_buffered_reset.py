@@ -0,0 +1,105 @@
+"""
+Wrapper that overlaps model building for the next episode with the current episode.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import robosuite
+from robosuite.wrappers import Wrapper
+
+# registers the MimicLabs envs with robosuite
+from .. import problems
+
+
+class DoubleBufferedResetWrapper(Wrapper):
+    """
+    Keeps two instances of the same BDDL env: an active one that is being stepped, and a
+    standby one whose next model is built and compiled on a worker thread (see
+    BDDLBaseDomain.prepare_hard_reset) while the active episode runs. reset() waits for
+    the standby model if it is not ready yet, swaps it in, and starts building the next
+    model on the env that was just retired.
+
+    Notes:
+        - Only the active env holds a sim: the retired env frees its sim (and render
+          context) before building its next model, so the standby env only adds its
+          python-side model and the compiled MjModel.
+        - Building the model is mostly python (ElementTree) and holds the GIL, so it
+          only overlaps with the parts of the episode that release it (physics steps,
+          rendering, policy inference in native code).
+        - Each instance samples its load-time randomization (textures, lighting, camera
+          pose) from its own np.random.RandomState, seeded from the global numpy RNG at
+          construction or by seed(), so seeded runs do not depend on thread timing.
+        - Both instances are created with pin_xml, so sim.model.get_xml() returns the
+          XML the active model was compiled from rather than the one MuJoCo parsed last
+          in this process (which may be the standby model), see pin_model_xml() in
+          envs/spec_assembly.py.
+
+    Example usage:
+        env = DoubleBufferedResetWrapper("MimicLabs_Lab2_Tabletop_Manipulation", **env_kwargs)
+        obs = env.reset()
+        for _ in range(horizon):
+            obs, reward, done, info = env.step(action)
+        obs = env.reset()  # swaps in the model built during the episode above
+
+    Args:
+        env_name (str): name of the registered BDDL env to create
+        **env_kwargs: keyword arguments passed to robosuite.make for both instances
+    """
+
+    def __init__(self, env_name, **env_kwargs):
+        assert env_kwargs.get(
+            "hard_reset", True
+        ), "Double-buffered resets only apply to hard resets."
+        env_kwargs["pin_xml"] = True
+        envs = [robosuite.make(env_name, **env_kwargs) for _ in range(2)]
+        super().__init__(envs[0])
+        self._standby_env = envs[1]
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+        self._seed_model_rngs(np.random.randint(2**31))
+        self._prepare_standby()
+
+    def _seed_model_rngs(self, seed):
+        seeds = np.random.SeedSequence(seed).generate_state(2)
+        self.env.model_rng = np.random.RandomState(seeds[0])
+        self._standby_env.model_rng = np.random.RandomState(seeds[1])
+
+    def _prepare_standby(self):
+        self._standby_env._destroy_viewer()
+        self._standby_env._destroy_sim()
+        self._pending = self._executor.submit(self._standby_env.prepare_hard_reset)
+
+    def seed(self, seed):
+        """
+        Seeds the global numpy RNG and the load-time randomization of both instances,
+        and rebuilds the standby model from the new seed.
+        """
+        self._pending.result()
+        np.random.seed(seed)
+        self._seed_model_rngs(seed)
+        self._prepare_standby()
+
+    def reset(self):
+        """
+        Swaps in the pre-built standby env and starts building the next model on the
+        previously active one.
+
+        Returns:
+            OrderedDict: Environment observation space after reset occurs
+        """
+        # re-raises any error from building the model on the worker thread
+        self._pending.result()
+        obs = self._standby_env.reset()
+        self.env, self._standby_env = self._standby_env, self.env
+        self._prepare_standby()
+        return obs
+
+    def close(self):
+        """
+        Waits for the worker thread and closes both env instances.
+        """
+        self._executor.shutdown(wait=True)
+        self.env.close()
+        self._standby_env.close()
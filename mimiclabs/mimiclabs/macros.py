@@ -9,5 +9,45 @@ MIMICLABS_TMP_FOLDER = os.path.expanduser(
     )
 )
 
+# collision proxies generated by scripts/generate_collision_proxies.py
+COLLISION_PROXY_FOLDER = os.path.expanduser(
+    os.environ.get(
+        "MIMICLABS_COLLISION_PROXY_FOLDER",
+        os.path.join(MIMICLABS_TMP_FOLDER, "collision_proxies"),
+    )
+)
+# whether objaverse / robocasa objects use their collision proxies, if generated
+USE_COLLISION_PROXIES = False
+
+# manifest of binary meshes generated by scripts/preconvert_meshes.py
+MESH_MANIFEST_PATH = os.path.expanduser(
+    os.environ.get(
+        "MIMICLABS_MESH_MANIFEST_PATH",
+        os.path.join(MIMICLABS_TMP_FOLDER, "mesh_manifest.json"),
+    )
+)
+# whether models load the preconverted binary meshes listed in the manifest. Off by
+# default, since the paths of the preconverted meshes are local to this machine and end
+# up in the model XMLs saved to datasets
+USE_PRECONVERTED_MESHES = False
+
+# socket of the fork server started by scripts/zygote.py
+ZYGOTE_SOCKET_PATH = os.path.expanduser(
+    os.environ.get(
+        "MIMICLABS_ZYGOTE_SOCKET_PATH",
+        os.path.join(MIMICLABS_TMP_FOLDER, "zygote.sock"),
+    )
+)
+
+# socket of the env server started by scripts/env_server.py
+ENV_SERVER_SOCKET_PATH = os.path.expanduser(
+    os.environ.get(
+        "MIMICLABS_ENV_SERVER_SOCKET_PATH",
+        os.path.join(MIMICLABS_TMP_FOLDER, "env_server.sock"),
+    )
+)
+# number of envs kept by the env server, least recently used idle envs are shut down
+ENV_SERVER_MAX_INSTANCES = 32
+
 SPACEMOUSE_PRODUCT_ID = 50734
 # SPACEMOUSE_PRODUCT_ID = 50741 ## uncomment for older model
@@ -8,7 +8,8 @@ Example usage:
 
     python scripts/add_obs_to_mimiclabs_datasets.py \
         --input_root_dir ../../datasets/mimiclabs_study \
-        --output_root_dir ../../datasets/mimiclabs_study
+        --output_root_dir ../../datasets/mimiclabs_study \
+        --num_workers 8
 """
 
 import os
@@ -51,7 +52,8 @@ def generate_shell_script(args):
                     f.write(f"{spacing}--output_dir {task_variant_dir} \\\n")
                     f.write(f"{spacing}--camera_names agentview robot0_eye_in_hand \\\n")
                     f.write(f"{spacing}--camera_height 128 \\\n")
-                    f.write(f"{spacing}--camera_width 128 \n")
+                    f.write(f"{spacing}--camera_width 128 \\\n")
+                    f.write(f"{spacing}--num_workers {args.num_workers}\n")
                     f.write("\n")
 
     return output_file
@@ -71,6 +73,12 @@ if __name__ == "__main__":
         required=True,
         help="directory to write converted dataset to",
     )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=1,
+        help="number of processes replaying the demos of each dataset",
+    )
 
     args = parser.parse_args()
 
@@ -0,0 +1,147 @@
+"""
+Script to benchmark collision detection time with and without static contact filtering
+(see the filter_static_contacts option of BDDLBaseDomain) on the MimicLabs lab scenes.
+
+For every BDDL file, the script rolls out the same random actions in an env with and
+without filtering and reports the average broad-phase, mid-phase and narrow-phase time
+per physics step, as measured by MuJoCo's internal timers, along with the number of
+colliding geoms and contacts. Timers go through a python callback, so absolute numbers
+are inflated by a constant per-call overhead; compare the two columns.
+
+Example usage:
+    # one task per lab from the mimiclabs_study task suite
+    python scripts/benchmark_contact_filtering.py --num_steps 500
+
+    python scripts/benchmark_contact_filtering.py \
+        --bddl_files /path/to/task_1.bddl /path/to/task_2.bddl \
+        --num_steps 500
+"""
+
+import os
+import glob
+import time
+import argparse
+import numpy as np
+
+import mujoco
+import robosuite
+
+import mimiclabs
+import mimiclabs.mimiclabs.envs.bddl_utils as BDDLUtils
+from mimiclabs.mimiclabs.envs import *
+from mimiclabs.mimiclabs.envs.bddl_base_domain import TASK_MAPPING
+
+
+TIMERS = {
+    "broad": mujoco.mjtTimer.mjTIMER_COL_BROAD,
+    "mid": mujoco.mjtTimer.mjTIMER_COL_MID,
+    "narrow": mujoco.mjtTimer.mjTIMER_COL_NARROW,
+}
+
+
+def get_default_bddl_files():
+    """
+    Returns one BDDL file per lab from the mimiclabs_study task suite.
+    """
+    suite_dir = os.path.join(
+        mimiclabs.__path__[0], "mimiclabs", "task_suites", "mimiclabs_study"
+    )
+    bddl_files = []
+    for lab_dir in sorted(glob.glob(os.path.join(suite_dir, "lab*"))):
+        lab_bddl_files = sorted(glob.glob(os.path.join(lab_dir, "*", "*.bddl")))
+        if len(lab_bddl_files) > 0:
+            bddl_files.append(lab_bddl_files[0])
+    return bddl_files
+
+
+def run_rollout(bddl_file, actions, seed, filter_static_contacts):
+    """
+    Rolls out @actions and returns the average per-step collision timings (in
+    microseconds), the number of colliding geoms and the average number of contacts.
+    """
+    problem_name = BDDLUtils.robosuite_parse_problem(bddl_file)["problem_name"]
+    env = robosuite.make(
+        TASK_MAPPING[problem_name].__name__,
+        bddl_file_name=bddl_file,
+        robots="Panda",
+        has_renderer=False,
+        has_offscreen_renderer=False,
+        use_camera_obs=False,
+        filter_static_contacts=filter_static_contacts,
+    )
+    np.random.seed(seed)
+    env.reset()
+
+    model = env.sim.model._model
+    data = env.sim.data._data
+    for timer in TIMERS.values():
+        data.timer[timer].duration = 0.0
+        data.timer[timer].number = 0
+    num_contacts = 0
+    for action in actions:
+        env.step(action)
+        num_contacts += data.ncon
+
+    results = {}
+    for name, timer in TIMERS.items():
+        num_calls = max(data.timer[timer].number, 1)
+        results[name] = 1e6 * data.timer[timer].duration / num_calls
+    results["geoms"] = int(
+        np.sum((model.geom_contype != 0) | (model.geom_conaffinity != 0))
+    )
+    results["contacts"] = num_contacts / max(len(actions), 1)
+    env.close()
+    return results
+
+
+def main(args):
+    bddl_files = args.bddl_files if args.bddl_files else get_default_bddl_files()
+
+    # MuJoCo only records timers when a time callback is installed
+    mujoco.set_mjcb_time(time.perf_counter)
+
+    rng = np.random.default_rng(args.seed)
+    header = f"{'task':<40} {'':>8}" + "".join(
+        f"{k:>10}" for k in ["broad(us)", "mid(us)", "narrow(us)", "geoms", "contacts"]
+    )
+    print(header)
+    for bddl_file in bddl_files:
+        actions = rng.uniform(-0.5, 0.5, size=(args.num_steps, 7))
+        name = os.path.splitext(os.path.basename(bddl_file))[0][:40]
+        for filter_static_contacts in [False, True]:
+            results = run_rollout(
+                bddl_file, actions, args.seed, filter_static_contacts
+            )
+            print(
+                f"{name:<40} {'filtered' if filter_static_contacts else 'default':>8}"
+                f"{results['broad']:>10.2f}{results['mid']:>10.2f}"
+                f"{results['narrow']:>10.2f}{results['geoms']:>10d}"
+                f"{results['contacts']:>10.1f}"
+            )
+
+    mujoco.set_mjcb_time(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--bddl_files",
+        type=str,
+        nargs="+",
+        default=None,
+        help="BDDL files to benchmark (defaults to one task per lab of mimiclabs_study)",
+    )
+    parser.add_argument(
+        "--num_steps",
+        type=int,
+        default=500,
+        help="number of env steps per rollout",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed for placements and random actions",
+    )
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,134 @@
+"""
+Script to benchmark offscreen rendering throughput of BDDL envs with the original visual
+meshes and with the level-of-detail meshes selected for the camera resolution (see
+scripts/generate_mesh_lods.py, which must be run first).
+
+For every BDDL file, the script resets the env once per setting and times repeated
+offscreen renders of all cameras, reporting frames per second.
+
+Example usage:
+    # one task per lab from the mimiclabs_study task suite, 84x84 cameras
+    python scripts/benchmark_render_lod.py --camera_height 84 --camera_width 84
+
+    python scripts/benchmark_render_lod.py \
+        --bddl_files /path/to/task_1.bddl /path/to/task_2.bddl \
+        --camera_names agentview robot0_eye_in_hand \
+        --num_renders 200
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+
+import robosuite
+
+import mimiclabs.mimiclabs.envs.bddl_utils as BDDLUtils
+from mimiclabs.mimiclabs.envs import *
+from mimiclabs.mimiclabs.envs.bddl_base_domain import TASK_MAPPING
+from mimiclabs.mimiclabs.envs.mesh_utils import select_mesh_lod
+from mimiclabs.mimiclabs.scripts.benchmark_contact_filtering import (
+    get_default_bddl_files,
+)
+
+
+def benchmark_rendering(bddl_file, visual_mesh_lod, args):
+    """
+    Returns the offscreen rendering throughput (frames per second, one frame per camera)
+    of an env created from @bddl_file with the given visual mesh LOD.
+    """
+    problem_name = BDDLUtils.robosuite_parse_problem(bddl_file)["problem_name"]
+    env = robosuite.make(
+        TASK_MAPPING[problem_name].__name__,
+        bddl_file_name=bddl_file,
+        robots="Panda",
+        has_renderer=False,
+        has_offscreen_renderer=True,
+        use_camera_obs=True,
+        camera_names=args.camera_names,
+        camera_heights=args.camera_height,
+        camera_widths=args.camera_width,
+        visual_mesh_lod=visual_mesh_lod,
+    )
+    np.random.seed(args.seed)
+    env.reset()
+
+    def render_all():
+        for camera_name in args.camera_names:
+            env.sim.render(
+                camera_name=camera_name,
+                width=args.camera_width,
+                height=args.camera_height,
+            )
+
+    # warm up, e.g. texture and mesh upload to the render context
+    for _ in range(5):
+        render_all()
+    start = time.perf_counter()
+    for _ in range(args.num_renders):
+        render_all()
+    elapsed = time.perf_counter() - start
+    env.close()
+    return args.num_renders * len(args.camera_names) / elapsed
+
+
+def main(args):
+    bddl_files = args.bddl_files if args.bddl_files else get_default_bddl_files()
+    lod = select_mesh_lod(args.camera_height, args.camera_width)
+    print(
+        f"{args.camera_height}x{args.camera_width} cameras use LOD {lod}, "
+        f"rendering {args.camera_names}"
+    )
+    print(f"{'task':<40}{'LOD 0 (fps)':>14}{f'LOD {lod} (fps)':>14}{'speedup':>10}")
+    for bddl_file in bddl_files:
+        name = os.path.splitext(os.path.basename(bddl_file))[0][:40]
+        fps_original = benchmark_rendering(bddl_file, 0, args)
+        fps_lod = benchmark_rendering(bddl_file, lod, args)
+        print(
+            f"{name:<40}{fps_original:>14.1f}{fps_lod:>14.1f}"
+            f"{fps_lod / fps_original:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--bddl_files",
+        type=str,
+        nargs="+",
+        default=None,
+        help="BDDL files to benchmark (defaults to one task per lab of mimiclabs_study)",
+    )
+    parser.add_argument(
+        "--camera_names",
+        type=str,
+        nargs="+",
+        default=["agentview", "robot0_eye_in_hand"],
+        help="cameras to render",
+    )
+    parser.add_argument(
+        "--camera_height",
+        type=int,
+        default=84,
+        help="height of rendered images",
+    )
+    parser.add_argument(
+        "--camera_width",
+        type=int,
+        default=84,
+        help="width of rendered images",
+    )
+    parser.add_argument(
+        "--num_renders",
+        type=int,
+        default=200,
+        help="number of timed renders per camera",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed for object placements",
+    )
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,190 @@
+"""
+Script to benchmark stepping BDDL envs in worker processes with SubprocVectorEnv (see
+envs/vector_env.py) against stepping the same envs one after the other in this process.
+With a single BDDL file, the envs are also stepped in threads sharing one model with
+ThreadedBatchEnv (see envs/threaded_batch_env.py). All runs use random actions, camera
+observations and auto-reset, and the script reports env steps per second.
+
+Example usage:
+    # one task per lab from the mimiclabs_study task suite
+    python scripts/benchmark_vector_env.py --num_envs 8 --num_steps 200
+
+    python scripts/benchmark_vector_env.py \
+        --bddl_files /path/to/task_1.bddl /path/to/task_2.bddl \
+        --num_envs 8 \
+        --num_steps 200
+
+    # one task, also compares ThreadedBatchEnv
+    python scripts/benchmark_vector_env.py \
+        --bddl_files /path/to/task.bddl \
+        --num_envs 16 \
+        --num_threads 8
+"""
+
+import time
+import argparse
+import numpy as np
+
+import robosuite
+
+import mimiclabs.mimiclabs.envs.bddl_utils as BDDLUtils
+from mimiclabs.mimiclabs.envs import *
+from mimiclabs.mimiclabs.envs.bddl_base_domain import TASK_MAPPING
+from mimiclabs.mimiclabs.envs.vector_env import SubprocVectorEnv
+from mimiclabs.mimiclabs.envs.threaded_batch_env import ThreadedBatchEnv
+from mimiclabs.mimiclabs.scripts.benchmark_contact_filtering import (
+    get_default_bddl_files,
+)
+
+
+def get_env_configs(bddl_files, num_envs, args):
+    """
+    Returns @num_envs env configs that cycle through @bddl_files.
+    """
+    env_configs = []
+    for i in range(num_envs):
+        bddl_file = bddl_files[i % len(bddl_files)]
+        problem_name = BDDLUtils.robosuite_parse_problem(bddl_file)["problem_name"]
+        env_configs.append(
+            dict(
+                env_name=TASK_MAPPING[problem_name].__name__,
+                env_kwargs=dict(
+                    bddl_file_name=bddl_file,
+                    robots="Panda",
+                    has_renderer=False,
+                    has_offscreen_renderer=True,
+                    use_camera_obs=True,
+                    camera_names=args.camera_names,
+                    camera_heights=args.camera_size,
+                    camera_widths=args.camera_size,
+                    horizon=args.horizon,
+                ),
+            )
+        )
+    return env_configs
+
+
+def run_serial(env_configs, actions):
+    """
+    Steps one env per config in this process and returns env steps per second.
+    """
+    envs = [robosuite.make(c["env_name"], **c["env_kwargs"]) for c in env_configs]
+    for env in envs:
+        env.reset()
+    t = time.time()
+    for step_actions in actions:
+        for env, action in zip(envs, step_actions):
+            _, _, done, _ = env.step(action)
+            if done or env.done:
+                env.reset()
+    steps_per_sec = actions.shape[0] * actions.shape[1] / (time.time() - t)
+    for env in envs:
+        env.close()
+    return steps_per_sec
+
+
+def run_vector(env_configs, actions):
+    """
+    Steps the envs with SubprocVectorEnv and returns env steps per second.
+    """
+    env = SubprocVectorEnv(env_configs, auto_reset=True)
+    env.reset()
+    t = time.time()
+    for step_actions in actions:
+        env.step(step_actions)
+    steps_per_sec = actions.shape[0] * actions.shape[1] / (time.time() - t)
+    env.close()
+    return steps_per_sec
+
+
+def run_threaded(env_configs, actions, num_threads):
+    """
+    Steps the envs of the (single) task of @env_configs with ThreadedBatchEnv and returns
+    env steps per second.
+    """
+    env = ThreadedBatchEnv(
+        env_configs[0]["env_name"],
+        num_envs=len(env_configs),
+        num_threads=num_threads,
+        auto_reset=True,
+        **env_configs[0]["env_kwargs"],
+    )
+    env.reset()
+    t = time.time()
+    for step_actions in actions:
+        env.step(step_actions)
+    steps_per_sec = actions.shape[0] * actions.shape[1] / (time.time() - t)
+    env.close()
+    return steps_per_sec
+
+
+def main(args):
+    bddl_files = args.bddl_files if args.bddl_files else get_default_bddl_files()
+    env_configs = get_env_configs(bddl_files, args.num_envs, args)
+
+    rng = np.random.default_rng(args.seed)
+    actions = rng.uniform(-0.5, 0.5, size=(args.num_steps, args.num_envs, 7))
+
+    serial = run_serial(env_configs, actions)
+    print(f"serial:          {serial:8.1f} steps/s")
+    vector = run_vector(env_configs, actions)
+    print(f"SubprocVectorEnv: {vector:8.1f} steps/s ({vector / serial:.1f}x)")
+    if len(bddl_files) == 1:
+        threaded = run_threaded(env_configs, actions, args.num_threads)
+        print(f"ThreadedBatchEnv: {threaded:8.1f} steps/s ({threaded / serial:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--bddl_files",
+        type=str,
+        nargs="+",
+        default=None,
+        help="BDDL files to run (defaults to one task per lab of mimiclabs_study)",
+    )
+    parser.add_argument(
+        "--num_envs",
+        type=int,
+        default=8,
+        help="number of envs, cycling through the BDDL files",
+    )
+    parser.add_argument(
+        "--num_threads",
+        type=int,
+        default=None,
+        help="number of ThreadedBatchEnv threads (defaults to the number of CPUs)",
+    )
+    parser.add_argument(
+        "--num_steps",
+        type=int,
+        default=200,
+        help="number of steps per env",
+    )
+    parser.add_argument(
+        "--horizon",
+        type=int,
+        default=100,
+        help="episode length, envs are reset at the end of each episode",
+    )
+    parser.add_argument(
+        "--camera_names",
+        type=str,
+        nargs="+",
+        default=["agentview", "robot0_eye_in_hand"],
+        help="cameras rendered at every step",
+    )
+    parser.add_argument(
+        "--camera_size",
+        type=int,
+        default=84,
+        help="camera height and width",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed for the random actions",
+    )
+    args = parser.parse_args()
+    main(args)
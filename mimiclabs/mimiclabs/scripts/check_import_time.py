@@ -0,0 +1,244 @@
+"""
+Script to check that importing lightweight MimicLabs modules stays fast and does not
+pull in the simulator stack. Each module is imported in a fresh interpreter with
+python -X importtime, and the script fails if the import takes longer than its budget
+or imports any of the heavy packages listed for it.
+
+Since the envs package only imports the problem classes on first access, the script also
+checks that the entry points which create envs by name (e.g. the MimicGen scripts)
+register all MimicLabs envs with robosuite.
+
+Example usage:
+    python scripts/check_import_time.py
+
+    python scripts/check_import_time.py \
+        --modules mimiclabs.mimiclabs.envs.bddl_utils \
+        --top 20
+"""
+
+import os
+import ast
+import sys
+import json
+import argparse
+import subprocess
+
+
+HEAVY_MODULES = [
+    "cv2",
+    "mujoco",
+    "robosuite",
+    "robomimic",
+    "mimicgen",
+    "robocasa",
+    "torch",
+]
+
+# module -> (import time budget in seconds, top-level packages it must not import)
+IMPORT_TIME_BUDGETS = {
+    "mimiclabs.mimiclabs.macros": (0.1, HEAVY_MODULES),
+    "mimiclabs.mimiclabs.envs": (0.1, HEAVY_MODULES),
+    "mimiclabs.mimiclabs.envs.bddl_utils": (0.5, HEAVY_MODULES),
+    "mimiclabs.mimiclabs.utils": (0.1, HEAVY_MODULES),
+    "mimiclabs.mimiclabs.envs.mesh_utils": (0.5, HEAVY_MODULES),
+    "mimiclabs.mimiclabs.zygote": (0.1, HEAVY_MODULES),
+    "mimiclabs.mimiclabs.envs.env_server": (0.5, HEAVY_MODULES),
+}
+
+# modules that must register the MimicLabs envs with robosuite when imported
+REGISTRATION_MODULES = [
+    "mimiclabs.mimiclabs.envs.bddl_base_domain",
+    "mimiclabs.mimiclabs.envs.wrappers.double_buffered_reset",
+    "mimiclabs.data_collection.sim.robosuite_teleop",
+    "mimiclabs.mimicgen.env_interface",
+    "mimiclabs.mimicgen.config",
+    "mimiclabs.mimicgen.scripts.prepare_src_dataset",
+    "mimiclabs.mimicgen.scripts.generate_dataset",
+]
+
+PROBLEMS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "envs", "problems"
+)
+
+
+def get_problem_names():
+    """
+    Returns the names of the classes decorated with @register_problem in envs/problems,
+    without importing them.
+    """
+    names = []
+    for file_name in sorted(os.listdir(PROBLEMS_DIR)):
+        if not file_name.endswith(".py"):
+            continue
+        with open(os.path.join(PROBLEMS_DIR, file_name)) as f:
+            tree = ast.parse(f.read())
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and any(
+                isinstance(d, ast.Name) and d.id == "register_problem"
+                for d in node.decorator_list
+            ):
+                names.append(node.name)
+    return names
+
+
+def get_registered_envs(module):
+    """
+    Imports @module in a fresh interpreter and returns the names of the envs registered
+    with robosuite afterwards.
+    """
+    statement = (
+        f"import json, {module}; "
+        "from robosuite.environments.base import REGISTERED_ENVS; "
+        "print(json.dumps(sorted(REGISTERED_ENVS)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", statement], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def parse_importtime(stderr):
+    """
+    Parses the -X importtime output in @stderr into a list of
+    (module name, nesting depth, self time in seconds, cumulative time in seconds).
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append(
+            (name.strip(), depth, int(self_us) / 1e6, int(cumulative_us) / 1e6)
+        )
+    return imports
+
+
+def get_imports(statement):
+    """
+    Runs @statement in a fresh interpreter and returns its parsed import times.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement} failed:\n{result.stderr}")
+    return parse_importtime(result.stderr)
+
+
+def measure_import(module, repeat=3):
+    """
+    Imports @module @repeat times and returns the fastest run as (import time in
+    seconds, list of (module name, nesting depth, self time, cumulative time)), leaving
+    out the modules imported by interpreter startup.
+    """
+    startup_modules = set(name for name, _, _, _ in get_imports("pass"))
+    best = None
+    for _ in range(repeat):
+        imports = [
+            entry
+            for entry in get_imports(f"import {module}")
+            if entry[0] not in startup_modules
+        ]
+        total = sum(cumulative for _, depth, _, cumulative in imports if depth == 0)
+        if best is None or total < best[0]:
+            best = (total, imports)
+    return best
+
+
+def main(args):
+    modules = args.modules if args.modules else list(IMPORT_TIME_BUDGETS.keys())
+
+    failed = []
+    for module in modules:
+        budget, forbidden = IMPORT_TIME_BUDGETS.get(module, (args.budget, HEAVY_MODULES))
+        total, imports = measure_import(module, repeat=args.repeat)
+        imported = set(name.split(".")[0] for name, _, _, _ in imports)
+        heavy = [name for name in forbidden if name in imported]
+
+        ok = total <= budget and len(heavy) == 0
+        print(
+            f"[{'OK' if ok else 'FAIL'}] {module}: {total * 1000:.1f} ms "
+            f"(budget {budget * 1000:.0f} ms), {len(imports)} modules imported"
+        )
+        if len(heavy) > 0:
+            print(f"    imports heavy packages: {', '.join(heavy)}")
+        if not ok or args.verbose:
+            slowest = sorted(
+                (entry for entry in imports if entry[1] <= 1),
+                key=lambda entry: -entry[3],
+            )
+            for name, _, _, cumulative in slowest[: args.top]:
+                print(f"    {cumulative * 1000:8.1f} ms  {name}")
+        if not ok:
+            failed.append(module)
+
+    num_over_budget = len(failed)
+    if num_over_budget > 0:
+        print(f"{num_over_budget} / {len(modules)} modules over their import budget")
+
+    if not args.skip_registration:
+        problem_names = get_problem_names()
+        for module in REGISTRATION_MODULES:
+            missing = sorted(set(problem_names) - set(get_registered_envs(module)))
+            print(
+                f"[{'OK' if len(missing) == 0 else 'FAIL'}] {module}: "
+                f"{len(problem_names) - len(missing)} / {len(problem_names)} envs registered"
+            )
+            if len(missing) > 0:
+                print(f"    missing: {', '.join(missing)}")
+                failed.append(module)
+        num_unregistered = len(failed) - num_over_budget
+        if num_unregistered > 0:
+            print(
+                f"{num_unregistered} / {len(REGISTRATION_MODULES)} modules do not "
+                "register the MimicLabs envs"
+            )
+
+    if len(failed) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--modules",
+        type=str,
+        nargs="+",
+        default=None,
+        help="modules to check (defaults to the modules in IMPORT_TIME_BUDGETS)",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=0.5,
+        help="import time budget in seconds for modules not in IMPORT_TIME_BUDGETS",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="number of imports per module, the fastest one is reported",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="number of slowest imports to print for modules over budget",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="print the slowest imports of every module",
+    )
+    parser.add_argument(
+        "--skip_registration",
+        action="store_true",
+        help="skip checking that the REGISTRATION_MODULES register the MimicLabs envs",
+    )
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,104 @@
+"""
+Script to check that sim.model.get_xml() of a BDDL env exports the model the env is
+running, while DoubleBufferedResetWrapper (see envs/wrappers/double_buffered_reset.py)
+has compiled the model of the next episode on its standby env. The exported XML is
+compiled again and compared with the active model, including the camera poses, lighting
+and fixture placements that are randomized per episode.
+
+Example usage:
+    python scripts/check_model_xml.py --bddl_file /path/to/task.bddl --num_resets 3
+"""
+
+import sys
+import argparse
+import numpy as np
+
+import mujoco
+
+import mimiclabs.mimiclabs.envs.bddl_utils as BDDLUtils
+from mimiclabs.mimiclabs.envs import *
+from mimiclabs.mimiclabs.envs.bddl_base_domain import TASK_MAPPING
+from mimiclabs.mimiclabs.envs.env_snapshot import get_model_signature
+from mimiclabs.mimiclabs.envs.wrappers.double_buffered_reset import (
+    DoubleBufferedResetWrapper,
+)
+
+
+# model fields that are randomized per episode
+COMPARED_FIELDS = [
+    "body_pos",
+    "body_quat",
+    "cam_pos",
+    "cam_quat",
+    "light_pos",
+    "light_dir",
+    "geom_rgba",
+]
+
+
+def compare_model_xml(sim, atol=1e-5):
+    """
+    Compiles the XML exported by @sim and returns the names of the model fields that
+    differ from the model of @sim.
+    """
+    model = sim.model._model
+    exported = mujoco.MjModel.from_xml_string(sim.model.get_xml())
+    if get_model_signature(exported) != get_model_signature(model):
+        return ["model sizes"]
+    return [
+        field
+        for field in COMPARED_FIELDS
+        if not np.allclose(getattr(exported, field), getattr(model, field), atol=atol)
+    ]
+
+
+def main(args):
+    problem_name = BDDLUtils.robosuite_parse_problem(args.bddl_file)["problem_name"]
+    env = DoubleBufferedResetWrapper(
+        TASK_MAPPING[problem_name].__name__,
+        bddl_file_name=args.bddl_file,
+        robots="Panda",
+        has_renderer=False,
+        has_offscreen_renderer=False,
+        use_camera_obs=False,
+    )
+
+    failed = False
+    try:
+        for i in range(args.num_resets):
+            env.reset()
+            # wait for the standby model of the next episode
+            env._pending.result()
+            mismatched = compare_model_xml(env.env.sim)
+            print(
+                f"[{'OK' if len(mismatched) == 0 else 'FAIL'}] reset {i}: "
+                + (
+                    "get_xml() matches the active model"
+                    if len(mismatched) == 0
+                    else f"get_xml() differs in {', '.join(mismatched)}"
+                )
+            )
+            failed = failed or len(mismatched) > 0
+    finally:
+        env.close()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--bddl_file",
+        type=str,
+        required=True,
+        help="path to the BDDL file of the task",
+    )
+    parser.add_argument(
+        "--num_resets",
+        type=int,
+        default=3,
+        help="number of episodes to check",
+    )
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,101 @@
+"""
+Script to check that envs of a ThreadedBatchEnv (see envs/threaded_batch_env.py) that
+render through the same GL context each render their own state. Two envs are run on one
+thread, the second one renders through the render context of the first, and the script
+fails if, after stepping only the second env, both render the same image or the first
+env no longer renders the image it rendered before.
+
+Example usage:
+    python scripts/check_threaded_batch_env.py --bddl_file /path/to/task.bddl
+"""
+
+import sys
+import argparse
+import numpy as np
+
+import mimiclabs.mimiclabs.envs.bddl_utils as BDDLUtils
+from mimiclabs.mimiclabs.envs import *
+from mimiclabs.mimiclabs.envs.bddl_base_domain import TASK_MAPPING
+from mimiclabs.mimiclabs.envs.threaded_batch_env import ThreadedBatchEnv
+
+
+def render_images(env, camera_name):
+    """
+    Re-renders the @camera_name observation of every env of @env and returns the images.
+    """
+    obs = env.call("_get_observations", force_update=True)
+    return [env_obs[f"{camera_name}_image"] for env_obs in obs]
+
+
+def check_shared_rendering(env, camera_name, num_steps=20, seed=0):
+    """
+    Steps only the second env of @env, whose envs must share one render context, and
+    returns a list of error messages (empty if the renders are correct).
+    """
+    env.reset()
+    first_image, _ = render_images(env, camera_name)
+
+    rng = np.random.default_rng(seed)
+    action_dim = env.envs[1].action_dim
+    for _ in range(num_steps):
+        env.step(rng.uniform(-1.0, 1.0, size=(1, action_dim)), indices=[1])
+
+    images = render_images(env, camera_name)
+    errors = []
+    if np.array_equal(images[0], images[1]):
+        errors.append("envs in different states rendered the same image")
+    if not np.array_equal(images[0], first_image):
+        errors.append("first env renders the state of the second env")
+    return errors
+
+
+def main(args):
+    problem_name = BDDLUtils.robosuite_parse_problem(args.bddl_file)["problem_name"]
+    env = ThreadedBatchEnv(
+        TASK_MAPPING[problem_name].__name__,
+        num_envs=2,
+        num_threads=1,
+        auto_reset=False,
+        bddl_file_name=args.bddl_file,
+        robots="Panda",
+        has_renderer=False,
+        has_offscreen_renderer=True,
+        use_camera_obs=True,
+        camera_names=[args.camera_name],
+        camera_heights=args.camera_size,
+        camera_widths=args.camera_size,
+    )
+    try:
+        errors = check_shared_rendering(env, args.camera_name)
+    finally:
+        env.close()
+
+    for error in errors:
+        print(f"[FAIL] {error}")
+    if len(errors) > 0:
+        sys.exit(1)
+    print("[OK] envs sharing a render context render their own state")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--bddl_file",
+        type=str,
+        required=True,
+        help="path to the BDDL file of the task",
+    )
+    parser.add_argument(
+        "--camera_name",
+        type=str,
+        default="agentview",
+        help="camera to render",
+    )
+    parser.add_argument(
+        "--camera_size",
+        type=int,
+        default=84,
+        help="height and width of the rendered images",
+    )
+    args = parser.parse_args()
+    main(args)
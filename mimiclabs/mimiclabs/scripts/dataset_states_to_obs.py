@@ -10,11 +10,27 @@ Example usage:
         --camera_width 128 \
         --n 10 \
         --render
+
+    # replay demos in 8 processes, each writing a shard, and merge the shards
+    python scripts/dataset_states_to_obs.py \
+        --dataset /path/to/dataset.hdf5 \
+        --output_dir /path/to/output_dir \
+        --camera_names agentview robot0_eye_in_hand \
+        --camera_height 128 \
+        --camera_width 128 \
+        --num_workers 8
+
+    # store next obs as virtual datasets over obs (read like regular datasets by h5py)
+    python scripts/dataset_states_to_obs.py \
+        --dataset /path/to/dataset.hdf5 \
+        --output_dir /path/to/output_dir \
+        --virtual_next_obs
 """
 
 import os
 import h5py
 import argparse
+import multiprocessing as mp
 import numpy as np
 from copy import deepcopy
 from tqdm import tqdm
@@ -22,44 +38,151 @@ import json
 
 import robosuite
 
-import robomimic.utils.tensor_utils as TensorUtils
-
 from mimiclabs.mimiclabs.envs import *
 
 
-def extract_trajectory(env, initial_state, states, actions, actions_abs, render=False):
+class BlockWriter:
+    """
+    Writes the observations of a trajectory of known @length to one dataset per key of
+    @group, buffering @block_size steps in memory. Datasets are created at the first
+    write, and observations must be written in step order. Chunks do not depend on
+    @block_size: images are chunked per step, so that training loaders reading single
+    frames do not decompress whole blocks, and low-dimensional observations are chunked
+    by h5py.
+    """
+
+    def __init__(self, group, length, block_size, compress=False):
+        self.group = group
+        self.length = length
+        self.block_size = min(block_size, length)
+        self.compress = compress
+        self.datasets = None
+        self.buffers = None
+        # step of the first buffered observation, and number of buffered observations
+        self.start = 0
+        self.count = 0
+
+    def _create(self, obs):
+        self.datasets, self.buffers = {}, {}
+        for k, v in obs.items():
+            v = np.asarray(v)
+            self.datasets[k] = self.group.create_dataset(
+                k,
+                shape=(self.length,) + v.shape,
+                maxshape=(None,) + v.shape,
+                chunks=(1,) + v.shape if v.ndim >= 3 else True,
+                dtype=v.dtype,
+                compression="gzip" if self.compress else None,
+            )
+            self.buffers[k] = np.empty((self.block_size,) + v.shape, dtype=v.dtype)
+
+    def write(self, t, obs):
+        """
+        Writes observation dictionary @obs at step @t.
+        """
+        if self.datasets is None:
+            self._create(obs)
+        assert t == self.start + self.count, "observations must be written in order"
+        for k, buf in self.buffers.items():
+            # the env may reuse its observation arrays, this is the only copy
+            buf[self.count] = obs[k]
+        self.count += 1
+        if self.count == self.block_size or t == self.length - 1:
+            self.flush()
+
+    def flush(self):
+        for k, dataset in self.datasets.items():
+            dataset[self.start : self.start + self.count] = self.buffers[k][: self.count]
+        self.start += self.count
+        self.count = 0
+
+
+def create_virtual_next_obs(ep_data_grp):
+    """
+    Creates next_obs/<k> in @ep_data_grp as a virtual dataset over obs/<k> shifted by one
+    step, followed by the observation after the last step in final_next_obs/<k>. The
+    sources are referenced within the same file, so the group can be copied to another
+    file (at the same path) or the file moved.
+    """
+    next_obs_grp = ep_data_grp.create_group("next_obs")
+    for k, obs_dataset in ep_data_grp["obs"].items():
+        final_dataset = ep_data_grp["final_next_obs"][k]
+        traj_len = obs_dataset.shape[0]
+        layout = h5py.VirtualLayout(shape=obs_dataset.shape, dtype=obs_dataset.dtype)
+        layout[: traj_len - 1] = h5py.VirtualSource(obs_dataset)[1:]
+        layout[traj_len - 1 :] = h5py.VirtualSource(final_dataset)
+        next_obs_grp.create_virtual_dataset(k, layout)
+
+
+def extract_trajectory(
+    env,
+    ep_data_grp,
+    initial_state,
+    states,
+    actions,
+    actions_abs,
+    render=False,
+    compress=False,
+    exclude_next_obs=False,
+    virtual_next_obs=False,
+    block_size=64,
+):
     """
     Helper function to extract observations, rewards, and dones along a trajectory using
-    the simulator environment.
+    the simulator environment, and write them to @ep_data_grp as they are computed. Each
+    observation is computed once and written to both obs and next_obs, and at most
+    @block_size steps of observations are held in memory.
 
     Args:
         env (instance of EnvBase): environment
+        ep_data_grp (h5py.Group): group to write the trajectory to
         initial_state (dict): initial simulation state to load
         states (np.array): array of simulation states to load to extract information
         actions (np.array): array of actions
+        actions_abs (np.array): array of absolute actions, or None
         render (bool): whether to render the environment
+        compress (bool): whether to compress observations with gzip
+        exclude_next_obs (bool): whether to leave out next_obs
+        virtual_next_obs (bool): whether next_obs only references obs, see
+            create_virtual_next_obs()
+        block_size (int): number of steps written at once, also the HDF5 chunk length
     """
     # assert isinstance(env, EnvBase)
     assert states.shape[0] == actions.shape[0]
+    traj_len = states.shape[0]
+
+    ep_data_grp.create_dataset("actions", data=actions)
+    if actions_abs is not None:
+        ep_data_grp.create_dataset("actions_abs", data=actions_abs)
+    ep_data_grp.create_dataset("states", data=states)
+
+    obs_writer = BlockWriter(
+        ep_data_grp.create_group("obs"), traj_len, block_size, compress=compress
+    )
+    next_obs_writer = None
+    if virtual_next_obs:
+        assert not exclude_next_obs
+        # only the observation after the last step is not in obs
+        next_obs_writer = BlockWriter(
+            ep_data_grp.create_group("final_next_obs"), 1, 1, compress=compress
+        )
+    elif not exclude_next_obs:
+        next_obs_writer = BlockWriter(
+            ep_data_grp.create_group("next_obs"),
+            traj_len,
+            block_size,
+            compress=compress,
+        )
+    rewards = np.zeros(traj_len)
+    dones = np.zeros(traj_len, dtype=bool)
 
     # load the initial state
     obs = env.reset_to(initial_state)
     if render:
         # render to screen
         env.render()
+    obs_writer.write(0, obs)
 
-    traj = dict(
-        obs=[],
-        next_obs=[],
-        rewards=[],
-        dones=[],
-        actions=np.array(actions),
-        states=np.array(states),
-    )
-    if actions_abs is not None:
-        traj["actions_abs"] = np.array(actions_abs)
-
-    traj_len = states.shape[0]
     # iteration variable @t is over "next obs" indices
     for t in range(1, traj_len + 1):
 
@@ -76,50 +199,31 @@ def extract_trajectory(env, initial_state, states, actions, actions_abs, render=
             env.render()
 
         # infer reward signal
-        r = env.reward()
+        rewards[t - 1] = env.reward()
 
         # infer done signal
-        done = env._check_success()
+        dones[t - 1] = env._check_success()
 
         # collect transition
-        traj["obs"].append(obs)
-        traj["next_obs"].append(next_obs)
-        traj["rewards"].append(r)
-        traj["dones"].append(done)
-
-        # update for next iter
-        obs = deepcopy(next_obs)
-
-    # convert list of dict to dict of list for obs dictionaries (for convenient writes to hdf5 dataset)
-    traj["obs"] = TensorUtils.list_of_flat_dict_to_dict_of_list(traj["obs"])
-    traj["next_obs"] = TensorUtils.list_of_flat_dict_to_dict_of_list(traj["next_obs"])
-
-    # list to numpy array
-    for k in traj:
-        if isinstance(traj[k], dict):
-            for kp in traj[k]:
-                traj[k][kp] = np.array(traj[k][kp])
-        else:
-            traj[k] = np.array(traj[k])
+        if t < traj_len:
+            obs_writer.write(t, next_obs)
+        if virtual_next_obs:
+            if t == traj_len:
+                next_obs_writer.write(0, next_obs)
+        elif next_obs_writer is not None:
+            next_obs_writer.write(t - 1, next_obs)
 
-    return traj
+    ep_data_grp.create_dataset("rewards", data=rewards)
+    ep_data_grp.create_dataset("dones", data=dones)
+    if virtual_next_obs:
+        create_virtual_next_obs(ep_data_grp)
 
 
-def dataset_states_to_obs(args):
+def get_env_meta(f_src, args):
     """
-    Main function to convert a dataset of states and actions to a dataset of observations.
+    Returns the env meta of the source dataset updated with the camera settings in @args,
+    and the env meta to create the env with (which may also turn on the renderer).
     """
-    # open source hdf5 file
-    f_src = h5py.File(args.dataset, "r")
-    demos = list(f_src["data"].keys())
-    inds = np.argsort([int(elem[5:]) for elem in demos])
-    demos = [demos[i] for i in inds]
-
-    # maybe reduce the number of demonstrations to playback
-    if args.n is not None:
-        demos = demos[: args.n]
-
-    # create environment with updated env_meta
     env_meta = json.loads(f_src["data"].attrs["env_args"])
     env_meta["env_kwargs"]["camera_heights"] = args.camera_height
     env_meta["env_kwargs"]["camera_widths"] = args.camera_width
@@ -127,19 +231,13 @@ def dataset_states_to_obs(args):
     env_meta_to_save = deepcopy(env_meta)
     if args.render:
         env_meta["env_kwargs"]["has_renderer"] = True
-    env = robosuite.make(
-        env_meta["env_name"],
-        **env_meta["env_kwargs"],
-    )
+    return env_meta_to_save, env_meta
 
-    # create output hdf5 file
-    os.makedirs(args.output_dir, exist_ok=True)
-    output_file_name = os.path.basename(args.dataset)[:-5] + "_im.hdf5"
-    output_file = os.path.join(args.output_dir, output_file_name)
-    f_dst = h5py.File(output_file, "w")
-    data_grp = f_dst.create_group("data")
 
-    # copy global attributes
+def copy_global_attributes(f_src, data_grp, env_meta_to_save):
+    """
+    Copies the attributes of the source data group to @data_grp, with the updated env meta.
+    """
     for k in f_src["data"].attrs:
         if k == "env_args":
             # save env meta to file
@@ -148,10 +246,34 @@ def dataset_states_to_obs(args):
             # copy other attributes
             data_grp.attrs[k] = f_src["data"].attrs[k]
 
-    # saving trajectories
-    for ind in tqdm(range(len(demos))):
-        ep = demos[ind]
 
+def process_demos(args, demos, output_file, worker_id=None):
+    """
+    Replays @demos of the source dataset with a new env and writes them with their
+    observations to @output_file.
+    """
+    # open source hdf5 file
+    f_src = h5py.File(args.dataset, "r")
+
+    # create environment with updated env_meta
+    env_meta_to_save, env_meta = get_env_meta(f_src, args)
+    env = robosuite.make(
+        env_meta["env_name"],
+        **env_meta["env_kwargs"],
+    )
+
+    # create output hdf5 file
+    f_dst = h5py.File(output_file, "w")
+    data_grp = f_dst.create_group("data")
+    copy_global_attributes(f_src, data_grp, env_meta_to_save)
+
+    # saving trajectories
+    progress = tqdm(
+        demos,
+        desc=None if worker_id is None else f"worker {worker_id}",
+        position=worker_id,
+    )
+    for ep in progress:
         # prepare initial state to reload from
         states = f_src["data/{}/states".format(ep)][()]
         initial_state = dict(
@@ -162,58 +284,126 @@ def dataset_states_to_obs(args):
         actions = f_src["data/{}/actions".format(ep)][()]
         actions_abs = f_src["data/{}/actions_abs".format(ep)][()]
 
-        traj = extract_trajectory(
+        ep_data_grp = data_grp.create_group(ep)
+        extract_trajectory(
             env=env,
+            ep_data_grp=ep_data_grp,
             initial_state=initial_state,
             states=states,
             actions=actions,
             actions_abs=actions_abs,
             render=args.render,
+            compress=args.compress,
+            exclude_next_obs=args.exclude_next_obs,
+            virtual_next_obs=args.virtual_next_obs,
+            block_size=args.block_size,
         )
 
-        # store transitions
-        ep_data_grp = data_grp.create_group(ep)
-        ep_data_grp.create_dataset("actions", data=np.array(traj["actions"]))
-        ep_data_grp.create_dataset("actions_abs", data=np.array(traj["actions_abs"]))
-        ep_data_grp.create_dataset("states", data=np.array(traj["states"]))
-        ep_data_grp.create_dataset("rewards", data=np.array(traj["rewards"]))
-        ep_data_grp.create_dataset("dones", data=np.array(traj["dones"]))
-        for k in traj["obs"]:
-            if args.compress:
-                ep_data_grp.create_dataset(
-                    "obs/{}".format(k),
-                    data=np.array(traj["obs"][k]),
-                    compression="gzip",
-                )
-            else:
-                ep_data_grp.create_dataset(
-                    "obs/{}".format(k), data=np.array(traj["obs"][k])
-                )
-            if not args.exclude_next_obs:
-                if args.compress:
-                    ep_data_grp.create_dataset(
-                        "next_obs/{}".format(k),
-                        data=np.array(traj["next_obs"][k]),
-                        compression="gzip",
-                    )
-                else:
-                    ep_data_grp.create_dataset(
-                        "next_obs/{}".format(k), data=np.array(traj["next_obs"][k])
-                    )
-
         # copy episode metadata
         ep_data_grp.attrs["model_file"] = initial_state[
             "model"
         ]  # model xml for this episode
-        ep_data_grp.attrs["num_samples"] = traj["actions"].shape[
+        ep_data_grp.attrs["num_samples"] = actions.shape[
             0
         ]  # number of transitions in this episode
 
-    print(f"Wrote {len(demos)} trajectories to {output_file}")
-
     # close hdf5 files
     f_src.close()
     f_dst.close()
+    env.close()
+
+
+def merge_shards(shard_files, demos, output_file):
+    """
+    Merges the demos written to @shard_files into @output_file, in the order of @demos.
+    Groups are copied by HDF5 without decompressing their datasets. The global attributes
+    are those of the first shard.
+    """
+    shards = []
+    try:
+        for shard_file in shard_files:
+            shards.append(h5py.File(shard_file, "r"))
+        demo_to_shard = {ep: shard for shard in shards for ep in shard["data"]}
+        with h5py.File(output_file, "w") as f_dst:
+            data_grp = f_dst.create_group("data")
+            for k, v in shards[0]["data"].attrs.items():
+                data_grp.attrs[k] = v
+            for ep in demos:
+                demo_to_shard[ep].copy(
+                    demo_to_shard[ep][f"data/{ep}"], data_grp, name=ep
+                )
+    finally:
+        for shard in shards:
+            shard.close()
+
+
+def dataset_states_to_obs(args):
+    """
+    Main function to convert a dataset of states and actions to a dataset of observations.
+    """
+    with h5py.File(args.dataset, "r") as f_src:
+        demos = list(f_src["data"].keys())
+    inds = np.argsort([int(elem[5:]) for elem in demos])
+    demos = [demos[i] for i in inds]
+
+    assert not (
+        args.virtual_next_obs and args.exclude_next_obs
+    ), "--virtual_next_obs and --exclude_next_obs are exclusive"
+
+    # maybe reduce the number of demonstrations to playback
+    if args.n is not None:
+        demos = demos[: args.n]
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_file_name = os.path.basename(args.dataset)[:-5] + "_im.hdf5"
+    output_file = os.path.join(args.output_dir, output_file_name)
+
+    num_workers = min(args.num_workers, len(demos))
+    if num_workers <= 1:
+        process_demos(args, demos, output_file)
+        print(f"Wrote {len(demos)} trajectories to {output_file}")
+        return
+
+    assert not args.render, "--render is not supported with --num_workers > 1"
+    # round-robin shards balance long and short demos across workers
+    shard_files = [
+        f"{output_file[:-5]}_shard_{i}.hdf5" for i in range(num_workers)
+    ]
+    ctx = mp.get_context("spawn")
+    processes = []
+    merging = merged = False
+    try:
+        for i in range(num_workers):
+            process = ctx.Process(
+                target=process_demos,
+                args=(args, demos[i::num_workers], shard_files[i], i),
+            )
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join()
+        failed = [i for i, process in enumerate(processes) if process.exitcode != 0]
+        if len(failed) > 0:
+            raise RuntimeError(f"dataset_states_to_obs workers {failed} failed")
+
+        merging = True
+        merge_shards(shard_files, demos, output_file)
+        merged = True
+    finally:
+        # workers still running if interrupted, shards are removed in any case
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for shard_file in shard_files:
+            if os.path.exists(shard_file):
+                os.remove(shard_file)
+        # do not leave a partially merged dataset behind
+        if merging and not merged and os.path.exists(output_file):
+            os.remove(output_file)
+    print(
+        f"Wrote {len(demos)} trajectories to {output_file} with {num_workers} workers"
+    )
 
 
 if __name__ == "__main__":
@@ -266,6 +456,13 @@ if __name__ == "__main__":
         help="(optional) exclude next obs in dataset",
     )
 
+    parser.add_argument(
+        "--virtual_next_obs",
+        action="store_true",
+        help="(optional) store next obs as HDF5 virtual datasets over obs and the final "
+        "observation, instead of a second copy of every observation",
+    )
+
     parser.add_argument(
         "--compress",
         action="store_true",
@@ -278,5 +475,21 @@ if __name__ == "__main__":
         help="(optional) render observations during playback",
     )
 
+    parser.add_argument(
+        "--block_size",
+        type=int,
+        default=64,
+        help="(optional) number of steps of observations held in memory and written "
+        "at once, also the chunk length of the observation datasets",
+    )
+
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=1,
+        help="(optional) number of processes replaying demos, each writing a shard of "
+        "the output that is merged in the original demo order at the end",
+    )
+
     args = parser.parse_args()
     dataset_states_to_obs(args)
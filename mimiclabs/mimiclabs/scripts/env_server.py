@@ -0,0 +1,77 @@
+"""
+Script to start, inspect and stop the local env server (see envs/env_server.py). The
+server hosts a pool of warm BDDL envs that trainer and evaluator processes of the node
+check out with RemoteVectorEnv, instead of each building their own envs.
+
+Example usage:
+    # start the server (in the background, or in its own terminal / tmux pane)
+    python scripts/env_server.py serve --max_instances 32 &
+
+    # in a training / evaluation script
+    from mimiclabs.mimiclabs.envs.env_server import RemoteVectorEnv
+    env = RemoteVectorEnv(bddl_file, num_envs=8, env_kwargs=dict(robots="Panda"))
+
+    python scripts/env_server.py status
+    python scripts/env_server.py stop
+"""
+
+import sys
+import argparse
+
+from mimiclabs.mimiclabs.envs.env_server import (
+    EnvServer,
+    get_env_server_status,
+    stop_env_server,
+)
+
+
+def serve(args):
+    EnvServer(
+        socket_path=args.socket_path,
+        max_instances=args.max_instances,
+        context=args.context,
+    ).serve_forever()
+
+
+def status(args):
+    server_status = get_env_server_status(args.socket_path)
+    print(f"{server_status['num_instances']} envs")
+    for task, num_idle in sorted(server_status["idle"].items()):
+        print(f"    {num_idle:4d} idle  {task}")
+
+
+def stop(args):
+    stop_env_server(args.socket_path)
+    print("stopped env server")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--socket_path",
+        type=str,
+        default=None,
+        help="socket of the server (defaults to macros.ENV_SERVER_SOCKET_PATH)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="start the env server")
+    serve_parser.add_argument(
+        "--max_instances",
+        type=int,
+        default=None,
+        help="number of envs to keep (defaults to macros.ENV_SERVER_MAX_INSTANCES)",
+    )
+    serve_parser.add_argument(
+        "--context",
+        type=str,
+        default="spawn",
+        choices=["spawn", "forkserver", "fork"],
+        help="multiprocessing start method of the env workers",
+    )
+
+    subparsers.add_parser("status", help="print the envs in the pool")
+    subparsers.add_parser("stop", help="stop the server")
+
+    args = parser.parse_args()
+    sys.exit({"serve": serve, "status": status, "stop": stop}[args.command](args) or 0)
@@ -0,0 +1,200 @@
+"""
+Script to generate convex collision proxies for all registered objaverse and robocasa
+objects (see envs/objects/collision_proxies.py), and store them in the proxy cache
+(macros.COLLISION_PROXY_FOLDER). Set macros.USE_COLLISION_PROXIES = True to make objects
+load their proxies.
+
+Unless --skip_check is passed, every proxy is checked against the original collision
+geometry by
+    - comparing the extents of the collision geometry in the object frame, which is what
+      the gripper pads close on when checking grasps, and
+    - dropping the object on a plane with both geometries and comparing the resting
+      height and the presence of contacts, which is what placement predicates check.
+
+Example usage:
+    python scripts/generate_collision_proxies.py
+
+    python scripts/generate_collision_proxies.py \
+        --objects objaverse_mug robocasa_apple0 \
+        --max_vertices 32 \
+        --overwrite
+"""
+
+import os
+import argparse
+import numpy as np
+
+import mujoco
+from robosuite.models.world import MujocoWorldBase
+from robosuite.utils.mjcf_utils import new_geom
+
+import mimiclabs.mimiclabs.macros as macros
+from mimiclabs.mimiclabs.envs.objects import get_object_dict
+from mimiclabs.mimiclabs.envs.objects.collision_proxies import (
+    CollisionProxyMixin,
+    compute_collision_proxies,
+    get_collision_proxy_path,
+    save_collision_proxies,
+)
+
+
+def simulate_drop(object_cls, use_proxies, drop_height=0.05, duration=2.0):
+    """
+    Drops an instance of @object_cls on a plane and returns the collision geometry
+    extents in the object frame, the resting height of the object and whether it
+    touches the plane at rest.
+    """
+    macros.USE_COLLISION_PROXIES = use_proxies
+    obj = object_cls()
+    world = MujocoWorldBase()
+    world.worldbody.append(
+        new_geom(name="floor", type="plane", size=(1, 1, 0.1), group=0)
+    )
+    world.merge_assets(obj)
+    obj_body = obj.get_obj()
+    obj_body.set("pos", f"0 0 {drop_height - obj.bottom_offset[2]}")
+    world.worldbody.append(obj_body)
+    model = mujoco.MjModel.from_xml_string(world.get_xml())
+    data = mujoco.MjData(model)
+
+    body_id = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_BODY, obj.root_body)
+    geom_ids = [
+        mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_GEOM, name)
+        for name in obj.contact_geoms
+    ]
+    mujoco.mj_forward(model, data)
+    extents = get_extents(model, data, body_id, geom_ids)
+
+    while data.time < duration:
+        mujoco.mj_step(model, data)
+    touching = any(
+        data.contact[i].geom1 in geom_ids or data.contact[i].geom2 in geom_ids
+        for i in range(data.ncon)
+    )
+    return extents, float(data.xpos[body_id][2]), touching
+
+
+def get_extents(model, data, body_id, geom_ids):
+    """
+    Returns the extents of the hulls of @geom_ids along the axes of body @body_id.
+    """
+    body_rot = data.xmat[body_id].reshape(3, 3)
+    lower, upper = np.full(3, np.inf), np.full(3, -np.inf)
+    for geom_id in geom_ids:
+        mesh_id = model.geom_dataid[geom_id]
+        if model.geom_type[geom_id] != mujoco.mjtGeom.mjGEOM_MESH or mesh_id < 0:
+            continue
+        adr, num = model.mesh_vertadr[mesh_id], model.mesh_vertnum[mesh_id]
+        geom_rot = data.geom_xmat[geom_id].reshape(3, 3)
+        verts = model.mesh_vert[adr : adr + num] @ geom_rot.T
+        verts = (verts + data.geom_xpos[geom_id] - data.xpos[body_id]) @ body_rot
+        lower = np.minimum(lower, verts.min(axis=0))
+        upper = np.maximum(upper, verts.max(axis=0))
+    return upper - lower
+
+
+def check_collision_proxies(object_cls, extent_tol, height_tol):
+    """
+    Returns a list of problems found when comparing the proxies of @object_cls to its
+    original collision geometry, empty if they behave the same.
+    """
+    use_proxies = macros.USE_COLLISION_PROXIES
+    try:
+        extents, height, touching = simulate_drop(object_cls, use_proxies=False)
+        proxy_extents, proxy_height, proxy_touching = simulate_drop(
+            object_cls, use_proxies=True
+        )
+    finally:
+        macros.USE_COLLISION_PROXIES = use_proxies
+
+    problems = []
+    extent_err = np.abs(extents - proxy_extents).max()
+    if extent_err > extent_tol:
+        problems.append(f"extents differ by {extent_err:.4f}m")
+    if abs(height - proxy_height) > height_tol:
+        problems.append(f"resting height differs by {abs(height - proxy_height):.4f}m")
+    if touching != proxy_touching:
+        problems.append("contact with the support differs at rest")
+    return problems
+
+
+def main(args):
+    object_classes = {
+        name: cls
+        for name, cls in get_object_dict().items()
+        if isinstance(cls, type) and issubclass(cls, CollisionProxyMixin)
+    }
+    if args.objects is not None:
+        object_classes = {name: object_classes[name] for name in args.objects}
+
+    failed = []
+    for name, object_cls in sorted(object_classes.items()):
+        xml_file = object_cls().file
+        path = get_collision_proxy_path(xml_file)
+        if os.path.exists(path) and not args.overwrite:
+            print(f"{name}: using cached proxies {path}")
+        else:
+            proxies = compute_collision_proxies(
+                xml_file, max_vertices=args.max_vertices
+            )
+            if len(proxies) == 0:
+                print(f"{name}: no collision meshes, skipping")
+                continue
+            path = save_collision_proxies(xml_file, proxies)
+            num_verts = sum(len(v) for v in proxies.values())
+            print(f"{name}: {len(proxies)} hull(s), {num_verts} vertices -> {path}")
+
+        if not args.skip_check:
+            problems = check_collision_proxies(
+                object_cls, args.extent_tol, args.height_tol
+            )
+            if len(problems) > 0:
+                failed.append(name)
+                print(f"{name}: CHECK FAILED ({'; '.join(problems)})")
+
+    if len(failed) > 0:
+        print(
+            f"{len(failed)} object(s) failed the check, consider a larger "
+            f"--max_vertices or removing their proxies: {failed}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--objects",
+        type=str,
+        nargs="+",
+        default=None,
+        help="registered object names (defaults to all objects supporting proxies)",
+    )
+    parser.add_argument(
+        "--max_vertices",
+        type=int,
+        default=64,
+        help="maximum number of vertices per proxy hull",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="regenerate proxies that are already cached",
+    )
+    parser.add_argument(
+        "--skip_check",
+        action="store_true",
+        help="skip checking proxies against the original collision geometry",
+    )
+    parser.add_argument(
+        "--extent_tol",
+        type=float,
+        default=0.003,
+        help="tolerance on collision geometry extents, in meters",
+    )
+    parser.add_argument(
+        "--height_tol",
+        type=float,
+        default=0.005,
+        help="tolerance on the resting height of dropped objects, in meters",
+    )
+    args = parser.parse_args()
+    main(args)
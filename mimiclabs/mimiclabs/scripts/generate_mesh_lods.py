@@ -0,0 +1,126 @@
+"""
+Script to generate decimated level-of-detail (LOD) variants of the visual meshes used by
+the MimicLabs scenes and all registered objects. LODs are written next to the original
+meshes as <file>.lod<level>.msh (see envs/mesh_utils.py). BDDL envs created with
+visual_mesh_lod="auto" pick a LOD level from their camera resolution, and fall back to the
+original meshes where no LOD was generated.
+
+Example usage:
+    python scripts/generate_mesh_lods.py
+
+    python scripts/generate_mesh_lods.py \
+        --xml_files /path/to/scene.xml /path/to/object.xml \
+        --overwrite
+"""
+
+import os
+import glob
+import argparse
+from tqdm import tqdm
+
+from robosuite.models.base import MujocoXML
+
+from mimiclabs.mimiclabs import assets_root as ASSETS_ROOT
+from mimiclabs.mimiclabs.envs.mesh_utils import (
+    MESH_LOD_FACE_RATIOS,
+    decimate_mesh,
+    get_mesh_lod_path,
+    get_original_mesh_path,
+    has_mesh_lod,
+    is_visual_geom,
+    load_mesh,
+    write_msh,
+)
+
+
+def get_default_xml_files():
+    """
+    Returns the scene XMLs shipped with MimicLabs and the XMLs of all registered objects.
+    """
+    from mimiclabs.mimiclabs.envs.objects import get_object_dict
+
+    xml_files = sorted(
+        glob.glob(os.path.join(ASSETS_ROOT, "scenes", "**", "*.xml"), recursive=True)
+    )
+    for name, object_cls in sorted(get_object_dict().items()):
+        try:
+            xml_file = getattr(object_cls(), "file", None)
+        except Exception as e:
+            print(f"WARNING: could not instantiate object {name}: {e}")
+            continue
+        if xml_file is not None and xml_file not in xml_files:
+            xml_files.append(xml_file)
+    return xml_files
+
+
+def get_visual_mesh_files(xml_file):
+    """
+    Returns the mesh files referenced by visual geoms in @xml_file.
+    """
+    xml = MujocoXML(xml_file)
+    mesh_files = {
+        mesh.get("name"): mesh.get("file")
+        for mesh in xml.asset.findall("mesh")
+        if mesh.get("file") is not None
+    }
+    visual_mesh_files = []
+    for geom in xml.worldbody.iter("geom"):
+        mesh_file = mesh_files.get(geom.get("mesh"))
+        if mesh_file is not None and is_visual_geom(geom):
+            mesh_file = get_original_mesh_path(mesh_file)
+            if mesh_file not in visual_mesh_files:
+                visual_mesh_files.append(mesh_file)
+    return visual_mesh_files
+
+
+def main(args):
+    xml_files = args.xml_files if args.xml_files else get_default_xml_files()
+
+    mesh_files = []
+    for xml_file in xml_files:
+        try:
+            for mesh_file in get_visual_mesh_files(xml_file):
+                if mesh_file not in mesh_files and os.path.exists(mesh_file):
+                    mesh_files.append(mesh_file)
+        except Exception as e:
+            print(f"WARNING: could not parse {xml_file}: {e}")
+    print(f"Found {len(mesh_files)} visual meshes in {len(xml_files)} xml files")
+
+    num_faces, num_lod_faces = 0, {lod: 0 for lod in MESH_LOD_FACE_RATIOS}
+    for mesh_file in tqdm(mesh_files):
+        if not args.overwrite and all(
+            has_mesh_lod(mesh_file, lod) for lod in MESH_LOD_FACE_RATIOS
+        ):
+            continue
+        try:
+            mesh = load_mesh(mesh_file)
+        except Exception as e:
+            print(f"WARNING: could not load {mesh_file}: {e}")
+            continue
+        num_faces += len(mesh["faces"])
+        for lod, face_ratio in MESH_LOD_FACE_RATIOS.items():
+            lod_mesh = decimate_mesh(mesh, face_ratio)
+            num_lod_faces[lod] += len(lod_mesh["faces"])
+            write_msh(get_mesh_lod_path(mesh_file, lod), lod_mesh)
+
+    if num_faces > 0:
+        for lod, count in num_lod_faces.items():
+            print(f"LOD {lod}: {count} / {num_faces} faces ({count / num_faces:.1%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--xml_files",
+        type=str,
+        nargs="+",
+        default=None,
+        help="MJCF files whose visual meshes to process (defaults to scenes and objects)",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="regenerate LODs that already exist",
+    )
+    args = parser.parse_args()
+    main(args)
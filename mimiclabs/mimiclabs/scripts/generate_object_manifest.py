@@ -0,0 +1,154 @@
+"""
+Script to generate envs/objects/object_manifest.py, which maps every object category
+registered in envs/objects to the module and class that define it. get_object_fn() uses
+the manifest to import only the module of the requested category, so that optional
+dependencies of other object modules (robocasa, mimicgen) are not needed at startup.
+
+The object modules are parsed, not imported, so the script runs without any of their
+dependencies installed. Rerun it after adding or renaming a registered object.
+
+Example usage:
+    python scripts/generate_object_manifest.py
+
+    python scripts/generate_object_manifest.py --check
+"""
+
+import os
+import re
+import ast
+import glob
+import argparse
+import importlib.util
+
+import mimiclabs.mimiclabs as mimiclabs_pkg
+
+
+OBJECTS_DIR = os.path.join(os.path.dirname(mimiclabs_pkg.__file__), "envs", "objects")
+MANIFEST_PATH = os.path.join(OBJECTS_DIR, "object_manifest.py")
+
+
+def get_category_name(class_name):
+    """
+    Returns the key under which libero's register_object stores class @class_name.
+    """
+    return "_".join(re.sub(r"([A-Z0-9])", r" \1", class_name).split()).lower()
+
+
+def get_registered_classes(module_file):
+    """
+    Returns the names of the classes in @module_file decorated with register_object.
+    """
+    with open(module_file, "r") as f:
+        tree = ast.parse(f.read(), filename=module_file)
+    class_names = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for decorator in node.decorator_list:
+            name = decorator.attr if isinstance(decorator, ast.Attribute) else None
+            if isinstance(decorator, ast.Name):
+                name = decorator.id
+            if name == "register_object":
+                class_names.append(node.name)
+                break
+    return class_names
+
+
+def get_libero_categories():
+    """
+    Returns a dictionary from category name to module name for the objects registered by
+    libero's object modules. libero's register_object refuses to register a category
+    twice, so these names cannot be reused by the object modules in envs/objects.
+    """
+    libero_spec = importlib.util.find_spec("libero")
+    if libero_spec is None:
+        raise SystemExit("libero is not installed, cannot check object categories")
+    libero_objects_dir = os.path.join(
+        libero_spec.submodule_search_locations[0], "libero", "envs", "objects"
+    )
+    categories = {}
+    for module_file in sorted(glob.glob(os.path.join(libero_objects_dir, "*.py"))):
+        module_name = os.path.splitext(os.path.basename(module_file))[0]
+        for class_name in get_registered_classes(module_file):
+            categories[get_category_name(class_name)] = f"libero {module_name}"
+    return categories
+
+
+def build_manifest():
+    """
+    Returns a dictionary from category name to (module name, class name) for all object
+    modules in envs/objects. Raises if a category is registered twice, including by
+    libero's object modules.
+    """
+    libero_categories = get_libero_categories()
+    manifest = {}
+    for module_file in sorted(glob.glob(os.path.join(OBJECTS_DIR, "*.py"))):
+        module_name = os.path.splitext(os.path.basename(module_file))[0]
+        if module_name in ["__init__", "object_manifest"]:
+            continue
+        for class_name in get_registered_classes(module_file):
+            category_name = get_category_name(class_name)
+            if category_name in manifest:
+                raise ValueError(
+                    f"Object category {category_name} is registered by both "
+                    f"{manifest[category_name][0]} and {module_name}"
+                )
+            if category_name in libero_categories:
+                raise ValueError(
+                    f"Object category {category_name} is registered by both "
+                    f"{libero_categories[category_name]} and {module_name}"
+                )
+            manifest[category_name] = (module_name, class_name)
+    return manifest
+
+
+def format_manifest(manifest):
+    """
+    Returns the source of object_manifest.py for @manifest.
+    """
+    lines = [
+        '"""',
+        "Object category -> (module in envs/objects, class name), used by get_object_fn()",
+        "to import object modules on first use.",
+        "",
+        "Generated by scripts/generate_object_manifest.py, do not edit by hand.",
+        '"""',
+        "",
+        "OBJECT_MANIFEST = {",
+    ]
+    for category_name, (module_name, class_name) in sorted(manifest.items()):
+        lines.append(f'    "{category_name}": ("{module_name}", "{class_name}"),')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def main(args):
+    manifest = build_manifest()
+    source = format_manifest(manifest)
+    if args.check:
+        current = None
+        if os.path.exists(MANIFEST_PATH):
+            with open(MANIFEST_PATH, "r") as f:
+                current = f.read()
+        if current != source:
+            raise SystemExit(
+                f"{MANIFEST_PATH} is out of date, rerun scripts/generate_object_manifest.py"
+            )
+        print(f"{MANIFEST_PATH} is up to date ({len(manifest)} objects)")
+        return
+
+    with open(MANIFEST_PATH, "w") as f:
+        f.write(source)
+    num_modules = len(set(module_name for module_name, _ in manifest.values()))
+    print(f"Wrote {len(manifest)} objects from {num_modules} modules to {MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only check that the manifest is up to date",
+    )
+    args = parser.parse_args()
+    main(args)
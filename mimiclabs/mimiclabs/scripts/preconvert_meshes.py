@@ -0,0 +1,156 @@
+"""
+Script to convert all OBJ / STL meshes referenced by the MimicLabs scenes and registered
+objects to MuJoCo's binary .msh format, so that model compilation does not parse text
+meshes (see envs/mesh_utils.py). Converted meshes are written next to the originals as
+<file>.msh and recorded in the manifest at macros.MESH_MANIFEST_PATH along with the hash,
+size and modification time of the original. BDDL envs load the converted meshes whenever
+the original is unchanged and macros.USE_PRECONVERTED_MESHES is set.
+
+Unless --skip_check is passed, every converted mesh is compiled alongside the original
+and discarded if the resulting mass, inertia or geom size differ.
+
+Example usage:
+    python scripts/preconvert_meshes.py
+
+    python scripts/preconvert_meshes.py \
+        --xml_files /path/to/scene.xml /path/to/object.xml \
+        --overwrite
+"""
+
+import os
+import argparse
+import numpy as np
+from tqdm import tqdm
+
+import mujoco
+from robosuite.models.base import MujocoXML
+
+from mimiclabs.mimiclabs.envs.mesh_utils import (
+    get_file_hash,
+    get_preconverted_mesh_path,
+    is_manifest_entry_valid,
+    load_mesh,
+    load_mesh_manifest,
+    save_mesh_manifest,
+    weld_vertices,
+    write_msh,
+)
+from mimiclabs.mimiclabs.scripts.generate_mesh_lods import get_default_xml_files
+
+
+def get_mesh_files(xml_file):
+    """
+    Returns the OBJ and STL mesh files referenced by @xml_file.
+    """
+    xml = MujocoXML(xml_file)
+    mesh_files = []
+    for mesh in xml.asset.findall("mesh"):
+        mesh_file = mesh.get("file")
+        if mesh_file is None or get_preconverted_mesh_path(mesh_file) is None:
+            continue
+        mesh_file = os.path.abspath(mesh_file)
+        if mesh_file not in mesh_files:
+            mesh_files.append(mesh_file)
+    return mesh_files
+
+
+def check_preconverted_mesh(mesh_file, msh_file, tol=1e-4):
+    """
+    Returns True if @msh_file compiles to the same mass, inertia and geom size as
+    @mesh_file.
+    """
+
+    def _compile(path):
+        return mujoco.MjModel.from_xml_string(
+            f'<mujoco><asset><mesh name="mesh" file="{path}"/></asset><worldbody><body>'
+            f'<freejoint/><geom type="mesh" mesh="mesh"/></body></worldbody></mujoco>'
+        )
+
+    model, msh_model = _compile(mesh_file), _compile(msh_file)
+    for key in ["body_mass", "body_inertia", "body_ipos", "geom_size"]:
+        value, msh_value = getattr(model, key), getattr(msh_model, key)
+        if np.any(np.abs(value - msh_value) > tol * (np.abs(value) + 1e-9)):
+            return False
+    return True
+
+
+def main(args):
+    xml_files = args.xml_files if args.xml_files else get_default_xml_files()
+
+    mesh_files = []
+    for xml_file in xml_files:
+        try:
+            for mesh_file in get_mesh_files(xml_file):
+                if mesh_file not in mesh_files and os.path.exists(mesh_file):
+                    mesh_files.append(mesh_file)
+        except Exception as e:
+            print(f"WARNING: could not parse {xml_file}: {e}")
+    print(f"Found {len(mesh_files)} OBJ / STL meshes in {len(xml_files)} xml files")
+
+    manifest = {
+        mesh_file: entry
+        for mesh_file, entry in load_mesh_manifest().items()
+        if os.path.exists(mesh_file)
+    }
+    num_converted, failed = 0, []
+    for mesh_file in tqdm(mesh_files):
+        entry = manifest.get(mesh_file)
+        if not args.overwrite and is_manifest_entry_valid(mesh_file, entry):
+            continue
+        stat = os.stat(mesh_file)
+        sha1 = get_file_hash(mesh_file)
+        msh_file = get_preconverted_mesh_path(mesh_file)
+        if (
+            not args.overwrite
+            and entry is not None
+            and entry["sha1"] == sha1
+            and os.path.exists(entry["msh"])
+        ):
+            # only the modification time changed (e.g. after a fresh checkout)
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            continue
+
+        manifest.pop(mesh_file, None)
+        try:
+            write_msh(msh_file, weld_vertices(load_mesh(mesh_file)))
+            if not args.skip_check and not check_preconverted_mesh(mesh_file, msh_file):
+                raise ValueError("compiled model differs from the original")
+        except Exception as e:
+            failed.append(mesh_file)
+            print(f"WARNING: could not convert {mesh_file}: {e}")
+            if os.path.exists(msh_file):
+                os.remove(msh_file)
+            continue
+        manifest[mesh_file] = dict(
+            sha1=sha1, size=stat.st_size, mtime_ns=stat.st_mtime_ns, msh=msh_file
+        )
+        num_converted += 1
+
+    save_mesh_manifest(manifest)
+    print(
+        f"Converted {num_converted} meshes, {len(manifest)} meshes in manifest, "
+        f"{len(failed)} failed"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--xml_files",
+        type=str,
+        nargs="+",
+        default=None,
+        help="MJCF files whose meshes to convert (defaults to scenes and objects)",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="reconvert meshes that are already in the manifest",
+    )
+    parser.add_argument(
+        "--skip_check",
+        action="store_true",
+        help="skip checking converted meshes against the originals",
+    )
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,108 @@
+"""
+Script to start, use and stop the zygote fork server (see zygote.py). The server
+imports robosuite, mujoco, libero, mimicgen and all registered objects once, and runs
+each requested script in a forked copy of itself, so that launching a script takes
+milliseconds instead of re-importing the simulator stack.
+
+Example usage:
+    # start the server (in the background, or in its own terminal / tmux pane)
+    python scripts/zygote.py serve &
+
+    # run scripts through the server, with the same arguments as usual
+    python scripts/zygote.py run scripts/dataset_states_to_obs.py \
+        --dataset /path/to/dataset.hdf5 --output_dir /path/to/output_dir
+    python scripts/zygote.py run --fallback scripts/generate_dataset.py \
+        --config /path/to/config.json --auto-remove-exp
+    python scripts/zygote.py run -m scripts.generate_object_manifest -- --check
+
+    python scripts/zygote.py stop
+"""
+
+import sys
+import argparse
+import subprocess
+
+from mimiclabs.mimiclabs.zygote import (
+    DEFAULT_PRELOAD_MODULES,
+    ZygoteServer,
+    is_zygote_running,
+    run_in_zygote,
+    stop_zygote,
+)
+
+
+def serve(args):
+    preload_modules = list(DEFAULT_PRELOAD_MODULES) + (args.preload or [])
+    ZygoteServer(
+        socket_path=args.socket_path, preload_modules=preload_modules
+    ).serve_forever()
+
+
+def run(args):
+    if len(args.args) > 0 and args.args[0] == "--":
+        args.args = args.args[1:]
+    if args.module is not None:
+        target, script_args = dict(module=args.module), args.args
+        cmd = [sys.executable, "-m", args.module] + script_args
+    else:
+        assert len(args.args) > 0, "provide the script to run"
+        target, script_args = dict(script=args.args[0]), args.args[1:]
+        cmd = [sys.executable] + args.args
+
+    if args.fallback and not is_zygote_running(args.socket_path):
+        # run in a new interpreter, as if the script was launched directly
+        return subprocess.call(cmd)
+
+    returncode = run_in_zygote(args=script_args, socket_path=args.socket_path, **target)
+    # report death by signal like a shell would
+    return 128 - returncode if returncode < 0 else returncode
+
+
+def stop(args):
+    stop_zygote(args.socket_path)
+    print("stopped zygote server")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--socket_path",
+        type=str,
+        default=None,
+        help="socket of the server (defaults to macros.ZYGOTE_SOCKET_PATH)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="start the zygote server")
+    serve_parser.add_argument(
+        "--preload",
+        type=str,
+        nargs="+",
+        default=None,
+        help="modules to import before forking, in addition to the defaults",
+    )
+
+    run_parser = subparsers.add_parser("run", help="run a script through the server")
+    run_parser.add_argument(
+        "-m",
+        dest="module",
+        type=str,
+        default=None,
+        help="run a module (like python -m) instead of a script",
+    )
+    run_parser.add_argument(
+        "--fallback",
+        action="store_true",
+        help="run the script in a new interpreter if no server is running",
+    )
+    run_parser.add_argument(
+        "args",
+        nargs=argparse.REMAINDER,
+        help="script to run followed by its arguments (with -m, only the arguments, "
+        "after --)",
+    )
+
+    subparsers.add_parser("stop", help="stop the server")
+
+    args = parser.parse_args()
+    sys.exit({"serve": serve, "run": run, "stop": stop}[args.command](args) or 0)
@@ -1,10 +1,12 @@
 import os
-import fcntl
+import sys
 
 import importlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
 
 import mimiclabs
-import mimiclabs.mimiclabs.macros as macros
 
 
 def get_robosuite_version():
@@ -21,8 +23,40 @@ def get_robosuite_version():
         )
 
 
+class _SkipPackageInit(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """
+    Meta path finder that imports the package @name from directory @path as an empty
+    package, without running its __init__.py. Submodules are found and imported as usual.
+    """
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname != self.name:
+            return None
+        spec = importlib.machinery.ModuleSpec(
+            fullname, self, origin=self.path, is_package=True
+        )
+        spec.submodule_search_locations = [self.path]
+        return spec
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        pass
+
+
 class disable_module_import:
     """
+    Skips the __init__.py of a package for imports made inside the context, so that
+    submodules can be imported without the side effects of the package __init__.
+    The package is skipped in memory through a sys.meta_path finder, so concurrent
+    processes do not block each other and nothing on disk is modified. Packages already
+    imported before entering the context are not affected.
+
     Example usage:
         with disable_module_import("libero", "libero", "envs"):
             from libero.libero.envs.utils import *
@@ -33,26 +67,16 @@ class disable_module_import:
             package_path = importlib.util.find_spec(
                 modules[0]
             ).submodule_search_locations[0]
-        except (ModuleNotFoundError, AttributeError):
+        except (ModuleNotFoundError, AttributeError, TypeError):
             raise ImportError(
                 f"Module {modules[0]} not found. Please ensure it is installed."
             )
-        self.path = os.path.join(package_path, *modules[1:], "__init__.py")
-
-        # Create a lock file to prevent multiple processes from modifying the same file.
-        base_dir = os.path.join(macros.MIMICLABS_TMP_FOLDER, "locks")
-        os.makedirs(base_dir, exist_ok=True)
-        self._lock_file = os.path.join(base_dir, "_".join(modules) + ".lock")
-        self._lock = None
+        self.path = os.path.join(package_path, *modules[1:])
+        self._finder = _SkipPackageInit(".".join(modules), self.path)
 
     def __enter__(self):
-        self._lock = open(self._lock_file, "w")
-        fcntl.flock(self._lock, fcntl.LOCK_EX)
-        if os.path.exists(self.path):
-            os.rename(self.path, self.path + ".bak")
+        sys.meta_path.insert(0, self._finder)
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if os.path.exists(self.path + ".bak"):
-            os.rename(self.path + ".bak", self.path)
-        fcntl.flock(self._lock, fcntl.LOCK_UN)
-        self._lock.close()
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
@@ -0,0 +1,340 @@
+"""
+Fork server ("zygote") that imports the simulator stack once and runs scripts in forked
+copies of itself, so that short jobs do not pay for importing robosuite, mujoco, libero,
+mimicgen and the object registry in every new process.
+
+The server listens on a Unix socket (macros.ZYGOTE_SOCKET_PATH). A client sends the
+script (or module) to run, its arguments, working directory and environment, together
+with its stdin / stdout / stderr file descriptors. The server forks a worker that takes
+over these descriptors and runs the script as __main__, and reports the worker's exit
+code back to the client, which exits with it. Signals received by the client are
+forwarded to the worker.
+
+Only imports are shared between workers. Nothing that holds threads, file handles or
+GL contexts should be created in the server before forking, and environment variables
+that are read at import time (e.g. MUJOCO_GL) are fixed by the server's environment.
+
+See scripts/zygote.py for the command line interface.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import signal
+import socket
+import importlib
+import traceback
+
+import mimiclabs.mimiclabs.macros as macros
+
+
+# modules imported by the server before forking, optional ones may fail to import
+DEFAULT_PRELOAD_MODULES = [
+    "numpy",
+    "h5py",
+    "mujoco",
+    "robosuite",
+    "robomimic.utils.tensor_utils",
+    "mimiclabs.mimiclabs.envs.problems",
+    "mimicgen.scripts.generate_dataset",
+    "mimiclabs.mimicgen.config",
+]
+
+# environment variables read at import time, which workers cannot change
+IMPORT_TIME_ENV_VARS = ["MUJOCO_GL", "PYOPENGL_PLATFORM", "MIMICLABS_TMP_FOLDER"]
+
+
+def _send_message(conn, message):
+    conn.sendall(json.dumps(message).encode() + b"\n")
+
+
+def _recv_message(conn_file):
+    line = conn_file.readline()
+    if not line:
+        raise ConnectionError("zygote connection closed")
+    return json.loads(line)
+
+
+def _get_exit_code(e):
+    """
+    Returns the process exit code for SystemExit @e, as the interpreter would.
+    """
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+class ZygoteServer:
+    """
+    Imports @preload_modules once and serves run requests on @socket_path by forking.
+    """
+
+    def __init__(self, socket_path=None, preload_modules=None):
+        self.socket_path = (
+            socket_path if socket_path is not None else macros.ZYGOTE_SOCKET_PATH
+        )
+        self.preload_modules = (
+            preload_modules
+            if preload_modules is not None
+            else list(DEFAULT_PRELOAD_MODULES)
+        )
+        self._sock = None
+        self._handlers = set()
+        # values before preloading, which may set some of them (robosuite sets MUJOCO_GL)
+        self._import_time_env = {
+            name: os.environ.get(name) for name in IMPORT_TIME_ENV_VARS
+        }
+
+    def preload(self):
+        """
+        Imports the preload modules and every registered object module.
+        """
+        t = time.time()
+        for module in self.preload_modules:
+            try:
+                importlib.import_module(module)
+            except ImportError as e:
+                print(f"WARNING: zygote could not preload {module}: {e}")
+        if "mimiclabs.mimiclabs.envs.objects" in sys.modules:
+            sys.modules["mimiclabs.mimiclabs.envs.objects"].get_object_dict()
+        print(f"zygote: preloaded {len(sys.modules)} modules in {time.time() - t:.1f}s")
+
+    def serve_forever(self):
+        """
+        Preloads modules and serves requests until a stop request is received.
+        """
+        if is_zygote_running(self.socket_path):
+            raise RuntimeError(
+                f"A zygote server is already listening on {self.socket_path}"
+            )
+        self.preload()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.socket_path)
+        self._sock.listen(128)
+        self._sock.settimeout(1.0)
+        print(f"zygote: listening on {self.socket_path} (pid {os.getpid()})")
+        try:
+            while True:
+                self._reap_handlers()
+                try:
+                    conn, _ = self._sock.accept()
+                except socket.timeout:
+                    continue
+                conn.settimeout(None)
+                if not self._handle_connection(conn):
+                    break
+        finally:
+            self._sock.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            print("zygote: stopped")
+
+    def _reap_handlers(self):
+        for pid in list(self._handlers):
+            if os.waitpid(pid, os.WNOHANG)[0] != 0:
+                self._handlers.remove(pid)
+
+    def _handle_connection(self, conn):
+        """
+        Reads a request from @conn and serves it. Returns False on a stop request.
+        """
+        try:
+            _, fds, _, _ = socket.recv_fds(conn, 1, 3)
+            request = _recv_message(conn.makefile("rb"))
+        except Exception as e:
+            print(f"WARNING: zygote received an invalid request: {e}")
+            conn.close()
+            return True
+
+        if request.get("command") == "stop":
+            for fd in fds:
+                os.close(fd)
+            _send_message(conn, dict(stopped=True))
+            conn.close()
+            return False
+
+        # flush so that buffered output is not written again by the forked processes
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            self._sock.close()
+            code = 1
+            try:
+                code = self._run_handler(conn, fds, request)
+            finally:
+                os._exit(code)
+        for fd in fds:
+            os.close(fd)
+        conn.close()
+        self._handlers.add(pid)
+        return True
+
+    def _run_handler(self, conn, fds, request):
+        """
+        Forks the worker for @request, waits for it and reports its exit code on @conn.
+        """
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        pid = os.fork()
+        if pid == 0:
+            conn.close()
+            _run_worker(fds, request, self._import_time_env)
+        for fd in fds:
+            os.close(fd)
+        _send_message(conn, dict(pid=pid))
+        _, status = os.waitpid(pid, 0)
+        _send_message(conn, dict(returncode=os.waitstatus_to_exitcode(status)))
+        conn.close()
+        return 0
+
+
+def _run_worker(fds, request, import_time_env):
+    """
+    Runs @request in the current (forked) process with the client's stdio @fds, and exits
+    with the script's exit code. @import_time_env holds the server's values of
+    IMPORT_TIME_ENV_VARS before preloading.
+    """
+    code = 1
+    try:
+        for sig in [signal.SIGINT, signal.SIGTERM, signal.SIGCHLD]:
+            signal.signal(sig, signal.SIG_DFL)
+        for i, fd in enumerate(fds):
+            if fd != i:
+                os.dup2(fd, i)
+                os.close(fd)
+        sys.stdin = os.fdopen(0, "r", closefd=False)
+        sys.stdout = os.fdopen(
+            1, "w", buffering=1 if os.isatty(1) else -1, closefd=False
+        )
+        sys.stderr = os.fdopen(2, "w", buffering=1, closefd=False)
+
+        for name, value in import_time_env.items():
+            if request["env"].get(name) != value:
+                print(
+                    f"WARNING: {name} differs between the client and the zygote server, "
+                    f"modules were imported with the server's value {value}",
+                    file=sys.stderr,
+                )
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+
+        # forked workers would otherwise share the server's random state
+        random.seed()
+        if "numpy" in sys.modules:
+            sys.modules["numpy"].random.seed()
+
+        import runpy
+
+        if request.get("module") is not None:
+            sys.argv = [request["module"]] + request["args"]
+            sys.path.insert(0, request["cwd"])
+            runpy.run_module(request["module"], run_name="__main__", alter_sys=True)
+        else:
+            script = os.path.abspath(request["script"])
+            sys.argv = [request["script"]] + request["args"]
+            sys.path.insert(0, os.path.dirname(script))
+            runpy.run_path(script, run_name="__main__")
+        code = 0
+    except SystemExit as e:
+        code = _get_exit_code(e)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def is_zygote_running(socket_path=None):
+    """
+    Returns True if a zygote server accepts connections on @socket_path.
+    """
+    socket_path = socket_path if socket_path is not None else macros.ZYGOTE_SOCKET_PATH
+    if not os.path.exists(socket_path):
+        return False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def _connect(socket_path, request):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path)
+    socket.send_fds(sock, [b"\0"], [0, 1, 2])
+    _send_message(sock, request)
+    return sock
+
+
+def run_in_zygote(script=None, args=(), module=None, socket_path=None):
+    """
+    Runs @script (or @module with -m semantics) with arguments @args in a worker forked
+    by the zygote server on @socket_path, with this process's stdio, working directory
+    and environment. Returns the worker's exit code (negative if it was killed by a
+    signal). Raises ConnectionError if no server is running.
+    """
+    assert (script is None) != (module is None), "pass exactly one of script and module"
+    socket_path = socket_path if socket_path is not None else macros.ZYGOTE_SOCKET_PATH
+    request = dict(
+        command="run",
+        script=script,
+        module=module,
+        args=list(args),
+        cwd=os.getcwd(),
+        env=dict(os.environ),
+    )
+    try:
+        sock = _connect(socket_path, request)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise ConnectionError(
+            f"No zygote server on {socket_path}, start one with scripts/zygote.py serve"
+        ) from e
+
+    conn_file = sock.makefile("rb")
+    pid = _recv_message(conn_file)["pid"]
+
+    def _forward_signal(sig, frame):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    handlers = {
+        sig: signal.signal(sig, _forward_signal)
+        for sig in [signal.SIGINT, signal.SIGTERM, signal.SIGHUP]
+    }
+    try:
+        return _recv_message(conn_file)["returncode"]
+    finally:
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
+        sock.close()
+
+
+def stop_zygote(socket_path=None):
+    """
+    Asks the zygote server on @socket_path to stop. Workers that are running finish.
+    """
+    socket_path = socket_path if socket_path is not None else macros.ZYGOTE_SOCKET_PATH
+    sock = _connect(socket_path, dict(command="stop"))
+    try:
+        _recv_message(sock.makefile("rb"))
+    finally:
+        sock.close()